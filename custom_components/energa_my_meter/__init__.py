@@ -7,9 +7,10 @@ import logging
 import voluptuous as vol
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_SCAN_INTERVAL, CONF_USERNAME, Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady, PlatformNotReady
 from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.start import async_at_started
 from homeassistant.helpers.typing import ConfigType
 
 from .common import async_config_entry_by_username
@@ -18,6 +19,8 @@ from .const import DEFAULT_SCAN_INTERVAL, DOMAIN, CONF_SELECTED_METER_ID, \
     CONF_NUMBER_OF_DAYS_TO_LOAD, PREVIOUS_DAYS_NUMBER_TO_BE_LOADED, CONF_SELECTED_METER_PPE, CONF_SELECTED_METER_NAME
 from .energa.errors import EnergaMyMeterAuthorizationError, EnergaWebsiteLoadingError
 from .hass_integration.energa_coordinator import EnergaCoordinator
+from .hass_integration.entry_store import EnergaEntryStore
+from .hass_integration.startup_scheduler import EnergaStartupScheduler, async_get_startup_scheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,6 +39,8 @@ CONFIG_SCHEMA = vol.Schema({DOMAIN: [vol.Any(
 )]}, extra=vol.ALLOW_EXTRA)
 
 PLATFORMS = [Platform.SENSOR]
+# The entry data deciding which sensors are created - changing any of them requires reloading the entry
+RELOAD_DATA_KEYS = [CONF_SELECTED_METER_ID, CONF_SELECTED_METER_NUMBER, CONF_SELECTED_ZONES, CONF_SELECTED_MODES]
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -76,23 +81,35 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     polling_interval = entry.options.get(CONF_SCAN_INTERVAL) or DEFAULT_SCAN_INTERVAL
 
-    try:
-        coordinator = EnergaCoordinator(hass, polling_interval=polling_interval, entry=entry)
-        coordinator.set_stats_skipping(True)
-        await coordinator.async_refresh()
-        coordinator.set_stats_skipping(False)
-    except EnergaWebsiteLoadingError as error:
-        _LOGGER.debug("Energa loading error: {%s}", error)
-        raise PlatformNotReady from error
-    except EnergaMyMeterAuthorizationError as error:
-        _LOGGER.warning("Could not log into Energa My Meter: {%s}", error)
-        raise ConfigEntryNotReady from error
+    coordinator = EnergaCoordinator(hass, polling_interval=polling_interval, entry=entry)
+    await coordinator.store.async_load()
+    scheduler = async_get_startup_scheduler(hass)
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+    async def _async_first_refresh() -> None:
+        coordinator.set_stats_skipping(True)
+        try:
+            await coordinator.async_refresh()
+        finally:
+            coordinator.set_stats_skipping(False)
+
+    starting = not hass.is_running
+    if starting:
+        # During the startup the entry works with the data saved before the restart (or without any data) until its
+        # slot comes up, then everything (including the statistics) is loaded with a single refresh
+        if not coordinator.load_warm_data():
+            if not hass_data.get(CONF_SELECTED_METER_PPE):
+                # The unique IDs of the sensors contain the PPE number, which only the refresh finds out
+                raise ConfigEntryNotReady('The first refresh of the entry waits until Home Assistant has started')
+            coordinator.load_empty_data()
+        entry.async_on_unload(scheduler.async_schedule(entry.data[CONF_USERNAME], coordinator.async_refresh))
+    else:
+        await _async_refresh_on_setup(scheduler, entry, _async_first_refresh)
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
 
     hass_data["unsub_options_update_listener"] = entry.add_update_listener(options_update_listener)
-    hass_data[CONF_SELECTED_METER_NAME] = coordinator.get_data().get('meter_name')
+    if coordinator.get_data().get('meter_name'):
+        hass_data[CONF_SELECTED_METER_NAME] = coordinator.get_data().get('meter_name')
     if not hass_data.get(CONF_SELECTED_METER_PPE):
         hass_data[CONF_SELECTED_METER_PPE] = coordinator.get_data().get('ppe_number')
 
@@ -102,12 +119,47 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     await hass.async_create_task(
         hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     )
+    if not starting:
+        # The sensors are added with the data loaded above, the statistics skipped by it are loaded (with the session
+        # it kept open) as soon as Home Assistant has started, instead of waiting for the whole update interval
+        @callback
+        def _async_start_statistics_refresh(_hass: HomeAssistant) -> None:
+            entry.async_create_background_task(
+                hass, scheduler.async_run(entry.data[CONF_USERNAME], coordinator.async_refresh),
+                f'{DOMAIN} first statistics refresh {entry.entry_id}'
+            )
+
+        entry.async_on_unload(async_at_started(hass, _async_start_statistics_refresh))
     return True
 
 
+async def _async_refresh_on_setup(scheduler: EnergaStartupScheduler, entry: ConfigEntry, refresh) -> None:
+    """Refreshes the data before the entry is set up, translating the login errors into setup errors"""
+    try:
+        await scheduler.async_run(entry.data[CONF_USERNAME], refresh)
+    except EnergaWebsiteLoadingError as error:
+        _LOGGER.debug("Energa loading error: {%s}", error)
+        raise PlatformNotReady from error
+    except EnergaMyMeterAuthorizationError as error:
+        _LOGGER.warning("Could not log into Energa My Meter: {%s}", error)
+        raise ConfigEntryNotReady from error
+
+
 async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update."""
-    await hass.config_entries.async_reload(config_entry.entry_id)
+    """
+    Handle options update.
+    The entry is reloaded only when the selection of the sensors changes, other changes are applied in place,
+    so the coordinator and its session are kept.
+    """
+    hass_data = hass.data[DOMAIN][config_entry.entry_id]
+    if any(hass_data.get(key) != config_entry.data.get(key) for key in RELOAD_DATA_KEYS):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+        return
+    # The values missing in the entry (like the PPE number) were filled in during the setup and are kept
+    hass_data.update({key: value for key, value in config_entry.data.items() if value is not None})
+    hass_data["coordinator"].async_set_polling_interval(
+        config_entry.options.get(CONF_SCAN_INTERVAL) or DEFAULT_SCAN_INTERVAL
+    )
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -116,3 +168,8 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the persistent state of the removed config entry."""
+    await EnergaEntryStore(hass, entry.entry_id).async_remove()
@@ -4,8 +4,10 @@ Adding the support for Home Assistant's GUI installation of the integration
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+from datetime import datetime
 from typing import Any, Dict
 
 import voluptuous as vol
@@ -29,6 +31,7 @@ from .const import (
     CONF_SELECTED_METER_ID, CONFIG_FLOW_CAPTCHA_ERROR, CONF_NUMBER_OF_DAYS_TO_LOAD,
     PREVIOUS_DAYS_NUMBER_TO_BE_LOADED, CONF_SELECTED_ZONES, CONFIG_FLOW_STEP_STATISTICS, CONF_SELECTED_MODES,
     CONF_SELECTED_METER_PPE, CONF_SELECTED_METER_NAME, CONFIG_FLOW_WEBSITE_ERROR,
+    CONFIG_FLOW_FIRST_STATISTICS_DATE_TIMEOUT, CONFIG_FLOW_FIRST_STATISTICS_DATE_SUBMIT_TIMEOUT,
 )
 from .energa.client import EnergaMyMeterClient
 from .energa.errors import (
@@ -48,6 +51,11 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
     def __init__(self) -> None:
         self._data: dict[str, Any] = {}
         self._options: dict[str, Any] = {}
+        # One session is kept for all steps of the flow, together with the data already loaded with it
+        self._energa: EnergaMyMeterClient | None = None
+        self._meters: list[dict] | None = None
+        self._zones: dict[Any, list[str]] = {}
+        self._first_dates: dict[Any, asyncio.Future[datetime | None]] = {}
 
     @staticmethod
     @callback
@@ -91,15 +99,13 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
         errors: Dict[str, str] = {}
 
         if user_input is not None:
-            energa = EnergaMyMeterClient()
+            # The credentials may point to another account, so nothing loaded before is reused
+            await self._async_close_session()
+            self._meters = None
+            self._zones = {}
+            self._cancel_first_dates()
             try:
-                await self.hass.async_add_executor_job(
-                    energa.open_connection,
-                    user_input[CONF_USERNAME],
-                    user_input[CONF_PASSWORD]
-                )
-                # noinspection PyTypeChecker
-                await self.hass.async_add_executor_job(energa.disconnect)
+                await self._async_open_session(user_input[CONF_USERNAME], user_input[CONF_PASSWORD])
             except RuntimeError as error:
                 _LOGGER.error('An unknown error occurred: {%s}', error)
                 errors["base"] = CONFIG_FLOW_UNKNOWN_ERROR
@@ -155,17 +161,11 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
 
         options = []
         try:
-            energa = EnergaMyMeterClient()
-            await self.hass.async_add_executor_job(
-                energa.open_connection,
-                self._data[CONF_USERNAME],
-                self._data[CONF_PASSWORD]
-            )
-
-            # noinspection PyTypeChecker
-            meters = await self.hass.async_add_executor_job(energa.get_meters)
-            # noinspection PyTypeChecker
-            await self.hass.async_add_executor_job(energa.disconnect)
+            if self._meters is None:
+                energa = await self._async_get_session()
+                # noinspection PyTypeChecker
+                self._meters = await self.hass.async_add_executor_job(energa.get_meters)
+            meters = self._meters
 
             _LOGGER.debug("Found %s meter(s) on the specified account.", len(meters))
 
@@ -185,6 +185,8 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
             errors["base"] = CONFIG_FLOW_UNAUTHORIZED_ERROR
         except EnergaNoSuitableMetersFoundError:
             errors["base"] = CONFIG_FLOW_NO_SUPPORTED_METERS_ERROR
+        if errors:
+            await self._async_close_session()
 
         schema = vol.Schema({
             vol.Required(CONF_SELECTED_METER_NUMBER): SelectSelector(
@@ -208,46 +210,41 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
                 self._data[CONF_SELECTED_MODES] = user_input[CONF_SELECTED_MODES]
                 self._data[CONF_NUMBER_OF_DAYS_TO_LOAD] = user_input[CONF_NUMBER_OF_DAYS_TO_LOAD]
 
+                # The form could be shown before the first statistics date was found - the limit is applied now
+                first_date = await self._async_get_first_date(
+                    self._data[CONF_SELECTED_METER_ID], CONFIG_FLOW_FIRST_STATISTICS_DATE_SUBMIT_TIMEOUT
+                )
+                if first_date:
+                    difference = max((dt_util.now() - first_date).days, 1)
+                    self._data[CONF_NUMBER_OF_DAYS_TO_LOAD] = min(self._data[CONF_NUMBER_OF_DAYS_TO_LOAD], difference)
+                else:
+                    _LOGGER.warning('The first statistics date is unknown, the number of days to load (%s) '
+                                    'is not limited by it', self._data[CONF_NUMBER_OF_DAYS_TO_LOAD])
+
                 meter_name = self._data.get(CONF_SELECTED_METER_NAME) if self._data.get(
                     CONF_SELECTED_METER_NAME) else f'{self._data[CONF_SELECTED_METER_NUMBER]}'
                 await self.async_set_unique_id(
                     f'energa{self._data[CONF_USERNAME]}.{self._data[CONF_SELECTED_METER_NUMBER]}')
                 title = DEFAULT_ENTRY_TITLE.format(meter_name=meter_name)
+                await self._async_close_session()
                 return self.async_create_entry(title=title, data=self._data)
         else:
             options = []
             difference = None
             first_date = None
             try:
-                energa = EnergaMyMeterClient()
-                await self.hass.async_add_executor_job(
-                    energa.open_connection,
-                    self._data[CONF_USERNAME],
-                    self._data[CONF_PASSWORD]
-                )
-                zones = await self.hass.async_add_executor_job(
-                    energa.get_supported_zones,
-                    self._data[CONF_SELECTED_METER_ID],
-                    dt_util.now(),
-                    None
+                meter_id = self._data[CONF_SELECTED_METER_ID]
+                discovery_deadline = asyncio.get_running_loop().time() + CONFIG_FLOW_FIRST_STATISTICS_DATE_TIMEOUT
+                zones = await self._async_get_zones(meter_id)
+                first_date = await self._async_get_first_date(
+                    meter_id, discovery_deadline - asyncio.get_running_loop().time()
                 )
-                try:
-                    first_date = await self.hass.async_add_executor_job(
-                        energa.get_first_statistics_date,
-                        self._data[CONF_SELECTED_METER_ID],
-                    )
-                except EnergaClientError:
-                    _LOGGER.warning('There was an error when calculating the first statistics date!')
-                    first_date = None
 
                 if first_date:
                     difference = (dt_util.now() - first_date).days
                     _LOGGER.debug("First statistics date is %s (%s days ago)",
                                   first_date.strftime('%Y/%m/%d'), difference)
 
-                # noinspection PyTypeChecker
-                await self.hass.async_add_executor_job(energa.disconnect)
-
                 _LOGGER.debug("Found %s zone(s) on the specified account.", len(zones))
 
                 for zone in zones:
@@ -261,6 +258,8 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
                 errors["base"] = CONFIG_FLOW_UNAUTHORIZED_ERROR
             except EnergaNoSuitableMetersFoundError:
                 errors["base"] = CONFIG_FLOW_NO_SUPPORTED_METERS_ERROR
+            if errors:
+                await self._async_close_session()
 
             schema = vol.Schema({
                 vol.Required(CONF_SELECTED_ZONES): SelectSelector(
@@ -302,6 +301,86 @@ class EnergaConfigFlow(ConfigFlow, domain=DOMAIN):
                     'fistStatisticDaysDifference': difference
                 })
 
+    @callback
+    def async_remove(self) -> None:
+        """Closes the Energa session when the flow is aborted or removed before creating the entry"""
+        if self._energa is not None:
+            # noinspection PyTypeChecker
+            self.hass.async_add_executor_job(self._energa.disconnect)
+            self._energa = None
+        self._cancel_first_dates()
+
+    async def _async_open_session(self, username: str, password: str) -> EnergaMyMeterClient:
+        """Logs in to the Energa website - the session is kept for the next steps of the flow"""
+        energa = EnergaMyMeterClient()
+        await self.hass.async_add_executor_job(energa.open_connection, username, password)
+        self._energa = energa
+        return energa
+
+    async def _async_get_session(self) -> EnergaMyMeterClient:
+        """The session opened in the user step, or a new one if it was closed after an error"""
+        if self._energa is None:
+            return await self._async_open_session(self._data[CONF_USERNAME], self._data[CONF_PASSWORD])
+        return self._energa
+
+    async def _async_close_session(self) -> None:
+        """Disconnects from the Energa website, if the session is open"""
+        energa, self._energa = self._energa, None
+        if energa is not None:
+            # noinspection PyTypeChecker
+            await self.hass.async_add_executor_job(energa.disconnect)
+
+    async def _async_get_zones(self, meter_id) -> list[str]:
+        """
+        The zones supported by the meter, loaded once per meter.
+        The first statistics date is looked for at the same time, with its own browser using the same session.
+        """
+        energa = await self._async_get_session()
+        if meter_id not in self._first_dates:
+            self._first_dates[meter_id] = asyncio.ensure_future(
+                self.hass.async_add_executor_job(self._get_first_statistics_date, energa, meter_id)
+            )
+        if meter_id not in self._zones:
+            self._zones[meter_id] = await self.hass.async_add_executor_job(
+                energa.get_supported_zones, meter_id, dt_util.now(), None
+            )
+        return self._zones[meter_id]
+
+    async def _async_get_first_date(self, meter_id, timeout: float) -> datetime | None:
+        """The first statistics date of the meter - or None, if it is unknown or still not found after the timeout"""
+        discovery = self._first_dates.get(meter_id)
+        if discovery is None:
+            return None
+        if not discovery.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(discovery), max(timeout, 0))
+            except TimeoutError:
+                _LOGGER.debug('The first statistics date is still being looked for, showing the form without it')
+                return None
+        return discovery.result()
+
+    def _cancel_first_dates(self) -> None:
+        """Stops looking for the first statistics dates that have not been looked for yet"""
+        for discovery in self._first_dates.values():
+            discovery.cancel()
+        self._first_dates = {}
+
+    @staticmethod
+    def _get_first_statistics_date(energa: EnergaMyMeterClient, meter_id) -> datetime | None:
+        """
+        Looks for the first statistics date, the errors only mean that it stays unknown.
+        The client is forked only for the search and closed afterward - within the job, so the job cancelled before
+        it has started does not leave any fork open.
+        """
+        forked = energa.fork()
+        try:
+            return forked.get_first_statistics_date(meter_id)
+        except EnergaClientError:
+            _LOGGER.warning('There was an error when calculating the first statistics date!')
+            return None
+        finally:
+            forked.disconnect()
+
 
 class EnergaMyMeterOptionsFlowHandler(OptionsFlow):
     """Handles options flow for the component."""
@@ -16,6 +16,10 @@ CONFIG_FLOW_NO_SUPPORTED_METERS_ERROR = 'no_supported_meters'
 CONFIG_FLOW_STEP_USER = 'user'
 CONFIG_FLOW_STEP_METER = 'meter'
 CONFIG_FLOW_STEP_STATISTICS = 'statistics'
+# How long the statistics step waits for the first statistics date before showing the form without it
+CONFIG_FLOW_FIRST_STATISTICS_DATE_TIMEOUT = 5
+# How long the submitted statistics step waits for the first statistics date to limit the number of days to load
+CONFIG_FLOW_FIRST_STATISTICS_DATE_SUBMIT_TIMEOUT = 30
 
 CONF_SELECTED_METER_ID = 'selected_meter_internal_id'
 CONF_SELECTED_METER_NUMBER = 'selected_meter'
@@ -26,6 +30,22 @@ CONF_SELECTED_MODES = 'selected_modes'
 CONF_NUMBER_OF_DAYS_TO_LOAD = 'number_of_days_to_load'
 
 PREVIOUS_DAYS_NUMBER_TO_BE_LOADED = 10
-MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE = 60
+# The number of days loaded in a single statistics cycle adapts to the website responsiveness within those limits
+INITIAL_DAYS_TO_BE_LOADED_AT_ONCE = 60
+MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE = 7
+MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE = 730
+CHUNK_SIZE_GROWTH_MAXIMUM_SECONDS_PER_DAY = 3
+# Loaded statistics are imported after every that many days, so an interrupted cycle keeps its progress
+STATISTICS_COMMIT_DAYS = 7
+# Days with estimated values are loaded again until Energa publishes the real data
+ESTIMATED_DAYS_TRACKING_PERIOD = 30
+# The number of days with estimates or missing hours that are loaded again during a single refresh
+DAYS_RELOAD_LIMIT = 14
+# The last days loaded again once a day, so the corrections of the historical data published by Energa are noticed
+REVALIDATION_DAYS = 3
+# After that time (in seconds) a refresh stops sending requests and saves the statistics loaded so far
+REFRESH_DEADLINE_SECONDS = 900
+# The first refreshes of all entries after the Home Assistant restart are spread over that many seconds
+STARTUP_REFRESH_WINDOW_SECONDS = 300
 
 DEBUGGING_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f%z'
@@ -0,0 +1,83 @@
+"""
+Command-line export of the hourly statistics from the Energa website, working without Home Assistant.
+
+Usage (from the custom_components/energa_my_meter directory):
+    python -m energa --username USER --meter 12345 --start 2020-01-01 --output energa.csv
+
+The password is taken from the ENERGA_PASSWORD environment variable or asked for.
+Running the export again with the same state file continues from the last exported day.
+"""
+import argparse
+import getpass
+import logging
+import os
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from .client import EnergaMyMeterClient
+from .errors import EnergaClientError
+from .exporter import CsvRowsWriter, EnergaExporter, EnergaExportState, ParquetRowsWriter
+from .stats_modes import EnergaStatsModes
+
+ENERGA_TIME_ZONE = 'Europe/Warsaw'
+
+
+def parse_arguments(arguments: list[str]) -> argparse.Namespace:
+    """Parses the command-line arguments"""
+    parser = argparse.ArgumentParser(prog='python -m energa', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--meter', type=int, action='append', required=True, dest='meters',
+                        help='the internal Energa ID of the meter, can be repeated')
+    parser.add_argument('--mode', choices=[mode.name for mode in EnergaStatsModes], action='append', dest='modes',
+                        help='the statistics to export, can be repeated (by default ENERGY_CONSUMED)')
+    parser.add_argument('--zone', action='append', dest='zones',
+                        help='the zone to export (exactly as returned by Energa), can be repeated (by default all)')
+    parser.add_argument('--start', type=date.fromisoformat, required=True, help='the first day (YYYY-MM-DD)')
+    parser.add_argument('--end', type=date.fromisoformat, default=date.today() - timedelta(days=1),
+                        help='the last day (YYYY-MM-DD), by default yesterday')
+    parser.add_argument('--output', type=Path, required=True)
+    parser.add_argument('--format', choices=['csv', 'parquet'], help='by default taken from the output extension')
+    parser.add_argument('--state', type=Path, help='the resume state file, by default next to the output')
+    parser.add_argument('--workers', type=int, default=2, help='the number of days loaded at the same time')
+    parser.add_argument('--time-zone', default=ENERGA_TIME_ZONE, help='the time zone of the days')
+    parser.add_argument('--verbose', action='store_true')
+    return parser.parse_args(arguments)
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """Runs the export and returns the exit code"""
+    args = parse_arguments(sys.argv[1:] if arguments is None else arguments)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    output_format = args.format or ('parquet' if args.output.suffix == '.parquet' else 'csv')
+    state = EnergaExportState(args.state or args.output.with_name(f'{args.output.name}.state.json'))
+    try:
+        writer = ParquetRowsWriter(args.output) if output_format == 'parquet' else CsvRowsWriter(args.output)
+    except RuntimeError as error:
+        logging.error('The export cannot start: %s.', error)
+        return 1
+    password = os.environ.get('ENERGA_PASSWORD') or getpass.getpass('Energa password: ')
+
+    client = EnergaMyMeterClient()
+    try:
+        client.open_connection(args.username, password)
+        exporter = EnergaExporter(client, writer, state, args.workers)
+        rows = exporter.export(
+            args.meters, [EnergaStatsModes[mode] for mode in args.modes or [EnergaStatsModes.ENERGY_CONSUMED.name]],
+            args.zones, (args.start, args.end), ZoneInfo(args.time_zone)
+        )
+    except EnergaClientError as error:
+        logging.error('The export failed: %r. Run it again to continue from the last exported day.', error)
+        return 1
+    finally:
+        client.disconnect()
+        writer.close()
+    logging.info('Exported %s rows into %s', rows, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Circuit breaker for the requests sent to the Energa website.
+When the website keeps failing, there is no point in sending more requests (and waiting for their timeouts):
+the breaker opens and fails fast, until the reset timeout passes and a single probe request is allowed.
+"""
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Callable
+
+from .const import ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD, ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT, \
+    ENERGA_CIRCUIT_BREAKER_MAXIMUM_RESET_TIMEOUT
+from .errors import EnergaWebsiteUnavailableError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EnergaCircuitState(Enum):
+    """A list of possible circuit breaker states"""
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+
+class EnergaCircuitBreaker:
+    """Thread-safe circuit breaker counting consecutive failures of the requests"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._state = EnergaCircuitState.CLOSED
+        self._failures = 0
+        self._reset_timeout = ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+        self._opened_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> EnergaCircuitState:
+        """The current state of the breaker"""
+        return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the requests are currently blocked"""
+        return self._state == EnergaCircuitState.OPEN
+
+    def seconds_until_probe(self) -> float | None:
+        """How long to wait before the probe request can be sent, None if the requests are not blocked"""
+        with self._lock:
+            if self._state != EnergaCircuitState.OPEN:
+                return None
+            return max(0.0, self._opened_until - self._clock())
+
+    def before_request(self) -> None:
+        """Raises an error instead of letting the request through, if the website is considered down"""
+        with self._lock:
+            if self._state == EnergaCircuitState.CLOSED:
+                return
+            if self._state == EnergaCircuitState.OPEN and self._clock() >= self._opened_until:
+                _LOGGER.debug('Sending a probe request to check whether the Energa website is back...')
+                self._state = EnergaCircuitState.HALF_OPEN
+                return
+            raise EnergaWebsiteUnavailableError(
+                f'The Energa website is failing, the next attempt in {max(0, self._opened_until - self._clock()):.0f}s'
+            )
+
+    def cancel_probe(self) -> None:
+        """The request let through was not sent after all - if it was the probe, the next request can be the probe"""
+        with self._lock:
+            if self._state == EnergaCircuitState.HALF_OPEN:
+                self._state = EnergaCircuitState.OPEN
+                self._opened_until = self._clock()
+
+    def record_success(self) -> None:
+        """The website responded - closing the breaker"""
+        with self._lock:
+            if self._state != EnergaCircuitState.CLOSED:
+                _LOGGER.info('The Energa website is responding again')
+            self._state = EnergaCircuitState.CLOSED
+            self._failures = 0
+            self._reset_timeout = ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+
+    def record_failure(self) -> None:
+        """The request failed - opening the breaker after too many failures or after a failed probe"""
+        with self._lock:
+            self._failures += 1
+            if self._state == EnergaCircuitState.HALF_OPEN:
+                self._reset_timeout = min(ENERGA_CIRCUIT_BREAKER_MAXIMUM_RESET_TIMEOUT, self._reset_timeout * 2)
+            elif self._failures < ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD:
+                return
+            self._state = EnergaCircuitState.OPEN
+            self._opened_until = self._clock() + self._reset_timeout
+        _LOGGER.warning('The Energa website keeps failing. Requests are paused for %ss', self._reset_timeout)
+
+
+_CIRCUIT_BREAKERS: dict[tuple[str, str], EnergaCircuitBreaker] = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(host: str, username: str) -> EnergaCircuitBreaker:
+    """Returns the circuit breaker shared by every connection of the account to the specified host"""
+    with _CIRCUIT_BREAKERS_LOCK:
+        key = (host, username)
+        if key not in _CIRCUIT_BREAKERS:
+            _CIRCUIT_BREAKERS[key] = EnergaCircuitBreaker()
+        return _CIRCUIT_BREAKERS[key]
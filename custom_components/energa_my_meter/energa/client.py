@@ -11,6 +11,7 @@ from .errors import (
 )
 from .scrapper import EnergaWebsiteScrapper
 from .stats_modes import EnergaStatsModes, EnergaStatsTypes
+from .timeouts import EnergaDeadline
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,19 +19,35 @@ _LOGGER = logging.getLogger(__name__)
 class EnergaMyMeterClient:
     """Base logic of gathering the data from the Energa website - the order of requests and scraping the data"""
 
-    def __init__(self):
-        self._energa_integration: EnergaWebsiteConnector = EnergaWebsiteConnector()
+    def __init__(self, connector: EnergaWebsiteConnector | None = None, connected: bool = False):
+        self._energa_integration: EnergaWebsiteConnector = connector or EnergaWebsiteConnector()
+        self._connected = connected
+
+    @property
+    def is_connected(self) -> bool:
+        """Whether the connection was opened (the session on the website may still have expired since then)"""
+        return self._connected
 
     def open_connection(self, username: str, password: str):
         """Opens a new connection to the Energa website. This should be done as rarely as possible"""
         _LOGGER.debug("Opening a new connection to the Energa website...")
         self._energa_integration.authenticate(username, password)
+        self._connected = True
 
     def disconnect(self):
         """Disconnects from the Energa website"""
         _LOGGER.debug('Closing the connection to the Energa website...')
+        self._connected = False
         self._energa_integration.disconnect()
 
+    def fork(self) -> 'EnergaMyMeterClient':
+        """Returns a client using the already opened connection, which can send requests concurrently with this one"""
+        return EnergaMyMeterClient(self._energa_integration.fork(), connected=self._connected)
+
+    def set_deadline(self, deadline: EnergaDeadline | None):
+        """Sets the moment after which no more requests will be sent (until the deadline is removed)"""
+        self._energa_integration.deadline = deadline
+
     def get_meters(self):
         """Returns the list of meters found on the website for the specified user"""
         website = self._energa_integration.open_account_page()
@@ -1,31 +1,45 @@
 """
 Contains the internal wrapper for Energa My Meter website.
-Handles the underlying browser framework
+Handles the underlying browser framework.
+The browser (mechanize) and the HTML parser (lxml) are imported with the first request, not with the integration.
 """
+# pylint: disable=import-outside-toplevel
+from __future__ import annotations
 
 import json
 import logging
+import random
+import time
 import urllib
 from datetime import timedelta, datetime
+from typing import TYPE_CHECKING
 from urllib.error import HTTPError
+from urllib.parse import urlsplit
 
-import lxml.html
-import mechanize
-from homeassistant.util import dt as dt_util
-from mechanize import Browser
-
-from .const import ENERGA_MY_METER_DATA_URL, ENERGA_REQUESTS_TIMEOUT, \
-    ENERGA_HISTORICAL_DATA_URL, ENERGA_MY_METER_LOGIN_URL, ENERGA_ACCOUNT_DATA_URL
+from .circuit_breaker import EnergaCircuitBreaker, get_circuit_breaker
+from .const import ENERGA_MY_METER_DATA_URL, \
+    ENERGA_HISTORICAL_DATA_URL, ENERGA_MY_METER_LOGIN_URL, ENERGA_ACCOUNT_DATA_URL, ENERGA_MY_METER_HOST, \
+    ENERGA_REQUESTS_ATTEMPTS, ENERGA_REQUESTS_RETRY_BACKOFF
 from .data import EnergaStatisticsData
 from .errors import (
     EnergaWebsiteLoadingError,
     EnergaMyMeterAuthorizationError,
-    EnergaMyMeterCaptchaRequirementError, EnergaStatisticsCouldNotBeLoadedError, EnergaMyMeterWebsiteError
+    EnergaMyMeterCaptchaRequirementError, EnergaStatisticsCouldNotBeLoadedError, EnergaMyMeterWebsiteError,
+    EnergaDeadlineExceededError
 )
+from .rate_limiter import EnergaRateLimiter, get_rate_limiter
+from .request_budget import EnergaRequestBudget, get_request_budget
 from .scrapper import EnergaWebsiteScrapper
 from .stats_modes import EnergaStatsModes, EnergaStatsTypes
+from .timeouts import EnergaDeadline, get_endpoint_timeouts
+
+if TYPE_CHECKING:
+    from mechanize import Browser
 
 _LOGGER = logging.getLogger(__name__)
+
+# Errors raised when the website could not be reached or responded with an error status
+NETWORK_ERRORS = (HTTPError, urllib.error.URLError, TimeoutError, ConnectionError)
 ENERGA_CERT = """-----BEGIN CERTIFICATE-----
 MIIHdzCCBV+gAwIBAgIQcC5Lkwug6Xwrzg7NfD1leTANBgkqhkiG9w0BAQsFADBS
 MQswCQYDVQQGEwJQTDEhMB8GA1UECgwYQXNzZWNvIERhdGEgU3lzdGVtcyBTLkEu
@@ -73,6 +87,14 @@ class EnergaWebsiteConnector:
     """Simple wrapper for accessing the Energa website with mechanize framework"""
     _browser: Browser
 
+    def __init__(self, rate_limiter: EnergaRateLimiter | None = None,
+                 circuit_breaker: EnergaCircuitBreaker | None = None, account: str = ''):
+        self._rate_limiter: EnergaRateLimiter = rate_limiter or EnergaRateLimiter()
+        self._circuit_breaker: EnergaCircuitBreaker = circuit_breaker or EnergaCircuitBreaker()
+        self._request_budget: EnergaRequestBudget = get_request_budget(ENERGA_MY_METER_HOST)
+        self._account = account
+        self.deadline: EnergaDeadline | None = None
+
     @property
     def browser(self):
         """Returns the currently configured browser"""
@@ -86,14 +108,30 @@ class EnergaWebsiteConnector:
     def authenticate(self, username: str, password: str, browser: Browser = None) -> bool:
         """Forces logging the user out & authenticates to the Energa website"""
         self._browser: Browser = browser if browser else self._prepare_browser()
+        self._rate_limiter = get_rate_limiter(ENERGA_MY_METER_HOST, username)
+        self._circuit_breaker = get_circuit_breaker(ENERGA_MY_METER_HOST, username)
+        self._account = username
         self._browser.cookiejar.clear()
         html_result = self._authorize_user(username, password)
         self._verify_logged_in(html_result)
         return html_result
 
     def disconnect(self):
-        """Disconnects from the Energa website"""
-        self._browser.close()
+        """Disconnects from the Energa website (there is nothing to close when the browser was never prepared)"""
+        browser = getattr(self, '_browser', None)
+        if browser is not None:
+            browser.close()
+
+    def fork(self) -> 'EnergaWebsiteConnector':
+        """
+        Returns a connector logged in with the same session (cookies) and sharing the pacing of the requests.
+        The browser keeps the state of the last response, so every thread sending requests needs its own one.
+        """
+        connector = EnergaWebsiteConnector(self._rate_limiter, self._circuit_breaker, self._account)
+        connector.browser = self._prepare_browser()
+        connector.browser.set_cookiejar(self._browser.cookiejar)
+        connector.deadline = self.deadline
+        return connector
 
     def get_historical_consumption_for_day(
             self, start_date: datetime, meter_id: int, mode: EnergaStatsModes,
@@ -115,7 +153,7 @@ class EnergaWebsiteConnector:
                               current_period.strftime('%Y/%m/%d'), int(current_period.timestamp()) * 1000)
                 response = self._get_statistic_for_date(
                     current_period.replace(hour=0, minute=0, second=0, microsecond=0), stat_type, meter_id, mode)
-                tz = dt_util.get_time_zone(response.timezone)
+                tz = response.time_zone
 
                 if len(response.historical_points) == 0:
                     _LOGGER.debug(
@@ -152,7 +190,7 @@ class EnergaWebsiteConnector:
                 return result
             return None
 
-        except (HTTPError, urllib.error.URLError) as error:
+        except NETWORK_ERRORS as error:
             _LOGGER.error('Got an error response from the energa website when getting historical stats %s (id: %s): %s',
                           ENERGA_HISTORICAL_DATA_URL, meter_id, error)
             raise EnergaWebsiteLoadingError from error
@@ -160,6 +198,7 @@ class EnergaWebsiteConnector:
     def _get_statistic_for_date(self, start_date: datetime, stat_type: EnergaStatsTypes, meter_id: int,
                                 mode: EnergaStatsModes, tariff_name: str | None = None) -> EnergaStatisticsData:
         """Returns the data returned by Energa when asking for a specific statistic period"""
+        import mechanize
         try:
             request_data = {
                 'mainChartDate': int(start_date.timestamp() * 1000),
@@ -170,19 +209,20 @@ class EnergaWebsiteConnector:
             if tariff_name:
                 request_data['tariffName'] = tariff_name
             request = mechanize.Request(url=ENERGA_HISTORICAL_DATA_URL, method='GET', data=request_data)
-            response = self._browser.open(request, timeout=ENERGA_REQUESTS_TIMEOUT)
-            json_response = response.read()
-            result = json.loads(json_response)
+            json_response = self._send(request)
+            result = json.loads(json_response) if json_response is not None else None
             if result is None or not result.get('success'):
                 raise EnergaStatisticsCouldNotBeLoadedError
+            self._rate_limiter.report_success()
             return EnergaStatisticsData(result.get('response'))
-        except (HTTPError, urllib.error.URLError) as error:
+        except NETWORK_ERRORS as error:
             _LOGGER.error('Got an error response from the energa website %s (id: %s): %s',
                           ENERGA_HISTORICAL_DATA_URL, meter_id, error)
             raise EnergaWebsiteLoadingError from error
 
     def _authorize_user(self, username: str, password: str):
         """Authorize user and return the logged in website. It uses simple POST form request"""
+        import mechanize
         login_page = self._open_page(ENERGA_MY_METER_LOGIN_URL)
 
         token = EnergaWebsiteScrapper.get_xrf_token(login_page)
@@ -200,6 +240,7 @@ class EnergaWebsiteConnector:
 
     def open_home_page(self, meter_id: int | None = None, ppe: int | None = None):
         """Opens the main view of Energa My Meter that contains most of the information"""
+        import mechanize
         request_data = {}
         if meter_id and ppe:
             request_data['mpc'] = meter_id
@@ -211,6 +252,7 @@ class EnergaWebsiteConnector:
 
     def open_account_page(self):
         """Opens the main view of Energa My Meter that contains the list of meters configured for the account"""
+        import mechanize
         request = mechanize.Request(url=ENERGA_ACCOUNT_DATA_URL, method='GET')
         html_result = self._open_page(request)
         self._verify_logged_in(html_result)
@@ -219,25 +261,106 @@ class EnergaWebsiteConnector:
     def _open_page(self, url):
         """Opens the home page of Energa My Meter website"""
         try:
-            response = self._browser.open(url, timeout=ENERGA_REQUESTS_TIMEOUT)
-            if response is not None:
-                html_response = response.read()
-            else:
+            html_response = self._send(url)
+            if html_response is None:
                 raise EnergaWebsiteLoadingError
-        except (HTTPError, urllib.error.URLError) as error:
+        except NETWORK_ERRORS as error:
             _LOGGER.error('Got an error response from the energa website %s: %s', url, error)
-            hdrs = getattr(error, 'headers', None) or error.info()
-            _LOGGER.error("HTTP %s on %s; Location=%s; Set-Cookie=%s",
-                          error.code, url, hdrs.get('Location'), hdrs.get('Set-Cookie'))
+            if isinstance(error, HTTPError):
+                hdrs = getattr(error, 'headers', None) or error.info()
+                _LOGGER.error("HTTP %s on %s; Location=%s; Set-Cookie=%s",
+                              error.code, url, hdrs.get('Location'), hdrs.get('Set-Cookie'))
 
             raise EnergaWebsiteLoadingError from error
         result = self._parse_response(html_response)
 
         if EnergaWebsiteScrapper.is_error_shown(html=result):
             _LOGGER.warning("The Energa website is currently showing an error on the page")
+            self._rate_limiter.report_throttled()
             raise EnergaMyMeterWebsiteError
+
+        # Captcha itself is reported by the login verification, here it only tells that we are too fast
+        if EnergaWebsiteScrapper.is_captcha_shown(result):
+            self._rate_limiter.report_throttled()
+        else:
+            self._rate_limiter.report_success()
         return result
 
+    def _send(self, request) -> bytes | None:
+        """
+        Sends the request and returns the body of the response.
+        The request is paced (for the account and for all accounts together), it is not sent at all while the website
+        is down, and transient errors are retried.
+        The timeout depends on the latency of the endpoint and, like waiting for the pacing, never exceeds the time left
+        until the deadline.
+        """
+        endpoint = self._get_endpoint(request)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._circuit_breaker.before_request()
+            try:
+                self._rate_limiter.acquire(self._get_time_left())
+                self._request_budget.acquire(self._account, self._get_time_left())
+                timeout = self._get_timeout(endpoint)
+            except BaseException:
+                # Nothing was sent, so nothing is known about the website (a pending probe must not block it forever)
+                self._circuit_breaker.cancel_probe()
+                raise
+            started = time.monotonic()
+            try:
+                response = self._browser.open(request, timeout=timeout)
+                body = response.read() if response is not None else None
+            except NETWORK_ERRORS as error:
+                if not self._is_transient(error):
+                    self._circuit_breaker.record_success()
+                    raise
+                self._circuit_breaker.record_failure()
+                if attempt >= ENERGA_REQUESTS_ATTEMPTS or self._circuit_breaker.is_open:
+                    raise
+                delay = random.uniform(0, ENERGA_REQUESTS_RETRY_BACKOFF * 2 ** (attempt - 1))
+                if self.deadline is not None and self.deadline.remaining() <= delay:
+                    raise
+                _LOGGER.debug('The request to the Energa website failed (%s). Retrying in %.1fs...', error, delay)
+                time.sleep(delay)
+                continue
+            except Exception:
+                # Any other failure of the request (like an incomplete response) still counts as a failure
+                self._circuit_breaker.record_failure()
+                raise
+            get_endpoint_timeouts().record(endpoint, time.monotonic() - started)
+            self._circuit_breaker.record_success()
+            return body
+
+    def _get_timeout(self, endpoint: str) -> float:
+        """Returns the socket timeout for the next request, raising an error if there is no time left for it"""
+        timeout = get_endpoint_timeouts().get_timeout(endpoint).socket_timeout
+        remaining = self._get_time_left()
+        return timeout if remaining is None else min(timeout, remaining)
+
+    def _get_time_left(self) -> float | None:
+        """Returns the seconds left until the deadline (None without any), raising an error if there are none left"""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline.remaining()
+        if remaining <= 0:
+            raise EnergaDeadlineExceededError
+        return remaining
+
+    @staticmethod
+    def _get_endpoint(request) -> str:
+        """The path of the requested URL - the latency of every page is tracked separately"""
+        import mechanize
+        url = request.get_full_url() if isinstance(request, mechanize.Request) else str(request)
+        return urlsplit(url).path
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Client errors (like 404) mean the website works - repeating the same request will not help"""
+        if isinstance(error, HTTPError):
+            return error.code >= 500 or error.code == 429
+        return True
+
     @staticmethod
     def _verify_logged_in(html_result):
         """Throws a suitable exception if there was any error loading the user data"""
@@ -253,12 +376,14 @@ class EnergaWebsiteConnector:
     @staticmethod
     def _parse_response(html_response):
         """Parses the HTML response"""
+        import lxml.html
         return lxml.html.fromstring(html_response)
 
     @staticmethod
     def _prepare_browser() -> Browser:
         """Prepares a new browser for Energa calls"""
-        browser: Browser = Browser()
+        import mechanize
+        browser: Browser = mechanize.Browser()
         browser.set_handle_robots(False)
         browser.set_handle_equiv(False)
         browser.set_handle_refresh(False)
@@ -1,8 +1,38 @@
 """Base configuration for Energa integration"""
 
-ENERGA_MY_METER_URL = 'https://mojlicznik.energa-operator.pl'
+ENERGA_MY_METER_HOST = 'mojlicznik.energa-operator.pl'
+ENERGA_MY_METER_URL = f'https://{ENERGA_MY_METER_HOST}'
 ENERGA_MY_METER_LOGIN_URL = f'{ENERGA_MY_METER_URL}/dp/UserLogin.do'
 ENERGA_MY_METER_DATA_URL = f'{ENERGA_MY_METER_URL}/dp/UserData.do'
 ENERGA_ACCOUNT_DATA_URL = f'{ENERGA_MY_METER_URL}/dp/UserAccount.do'
 ENERGA_HISTORICAL_DATA_URL = f'{ENERGA_MY_METER_URL}/dp/resources/chart'
+
+# Timeouts of the requests (in seconds). The read timeout adapts to the latency observed for every endpoint
 ENERGA_REQUESTS_TIMEOUT = 10
+ENERGA_REQUESTS_CONNECT_TIMEOUT = 5
+ENERGA_REQUESTS_MINIMUM_READ_TIMEOUT = 3
+ENERGA_REQUESTS_MAXIMUM_READ_TIMEOUT = 30
+ENERGA_REQUESTS_LATENCY_PERCENTILE = 0.95
+ENERGA_REQUESTS_LATENCY_FACTOR = 3
+ENERGA_REQUESTS_LATENCY_SAMPLES = 50
+ENERGA_REQUESTS_LATENCY_MINIMUM_SAMPLES = 5
+
+# Pacing of the requests sent to the Energa website (in requests per second), shared by all entries of an account
+ENERGA_REQUESTS_INITIAL_RATE = 1.0
+ENERGA_REQUESTS_MINIMUM_RATE = 0.05
+ENERGA_REQUESTS_MAXIMUM_RATE = 5.0
+ENERGA_REQUESTS_RATE_INCREASE = 0.05
+ENERGA_REQUESTS_RATE_DECREASE_FACTOR = 0.5
+ENERGA_REQUESTS_BURST = 3
+# The cap of all requests sent to the Energa website by all accounts together (from the same IP address)
+ENERGA_HOST_REQUESTS_PER_MINUTE = 120
+ENERGA_HOST_REQUESTS_BURST = 5
+
+# Retrying the requests that failed because of transient errors (with jittered exponential backoff, in seconds)
+ENERGA_REQUESTS_ATTEMPTS = 3
+ENERGA_REQUESTS_RETRY_BACKOFF = 2
+
+# Failing fast when the Energa website is down (timeouts in seconds)
+ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD = 5
+ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT = 60
+ENERGA_CIRCUIT_BREAKER_MAXIMUM_RESET_TIMEOUT = 1800
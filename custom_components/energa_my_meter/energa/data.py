@@ -1,8 +1,19 @@
 """
 Simple model classes for data related to Energa My Meter
 """
+import hashlib
 import json
-from datetime import datetime
+from array import array
+from datetime import datetime, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+def get_time_zone(name: str) -> tzinfo | None:
+    """The time zone of the specified name (like Europe/Warsaw) - or None, if it is not known"""
+    try:
+        return ZoneInfo(name)
+    except (ValueError, ZoneInfoNotFoundError):
+        return None
 
 
 class EnergaHistoricalPoint:
@@ -62,20 +73,75 @@ class EnergaStatisticsData:
         self._unit = response['unit']
         self._date_from = response['mainChartDate']
         self._date_to = response['mainChartDateTo']
-        self._historical_points: [EnergaHistoricalPoint] = []
+        self._historical_points: [EnergaHistoricalPoint] | None = None
         self._zones = []
 
         for zone in response.get('zones', []):
             self._zones.append(zone['label'])
 
-        for point in response.get('mainChart', []):
-            self._historical_points.append(EnergaHistoricalPoint(point, self._zones))
+        # The chart is decoded into columns once, the values of a zone are decoded only when the zone is used
+        chart = response.get('mainChart', [])
+        self._raw_timestamps = [point['tm'] for point in chart]
+        self._timestamps = [int(int(timestamp) / 1000) for timestamp in self._raw_timestamps]
+        self._estimated = [point['est'] for point in chart]
+        self._raw_values = [point['zones'] for point in chart]
+        self._values: dict[str, array] = {}
+        self._dates: [datetime | None] = [None] * len(chart)
 
     @property
     def historical_points(self) -> [EnergaHistoricalPoint]:
         """The list of the historical points, sorted by timestamp"""
+        if self._historical_points is None:
+            self._historical_points = [
+                EnergaHistoricalPoint({'tm': timestamp, 'est': estimated, 'zones': values}, self._zones)
+                for timestamp, estimated, values in zip(self._raw_timestamps, self._estimated, self._raw_values)
+            ]
         return self._historical_points
 
+    @property
+    def timestamps(self) -> [int]:
+        """The normalized timestamps of the historical points, in the same (sorted) order"""
+        return self._timestamps
+
+    @property
+    def estimated(self) -> [bool]:
+        """Whether the historical points are estimated, in the same order"""
+        return self._estimated
+
+    def get_values(self, zone: str) -> array:
+        """The values of the zone for every historical point (0 when missing) - decoded on the first use"""
+        values = self._values.get(zone)
+        if values is None:
+            if zone not in self._zones:
+                # The zone is not in the response (e.g. the tariff has changed) - nothing was measured in it
+                values = array('d', [0.0]) * len(self._raw_values)
+            else:
+                index = self._zones.index(zone)
+                values = array('d', (
+                    float(point_values[index]) if len(point_values) > index and point_values[index] else 0
+                    for point_values in self._raw_values
+                ))
+            self._values[zone] = values
+        return values
+
+    @property
+    def time_zone(self) -> tzinfo | None:
+        """The time zone that historical points timestamps belong to"""
+        return get_time_zone(self._timezone)
+
+    def get_dates(self, start: int = 0) -> [datetime]:
+        """
+        The dates of the historical points (from the specified index) in the time zone of the statistics.
+        Every point is converted at most once, no matter how many times its date is used.
+        """
+        missing = [index for index in range(start, len(self._dates)) if self._dates[index] is None]
+        if missing:
+            time_zone = self.time_zone
+            timestamps = self.timestamps
+            for index in missing:
+                self._dates[index] = datetime.fromtimestamp(timestamps[index], tz=time_zone)
+        return self._dates[start:]
+
     @property
     def date_from(self):
         """The start date of the historical data query range"""
@@ -106,6 +172,12 @@ class EnergaStatisticsData:
         """The list of zones"""
         return self._zones
 
+    @property
+    def content_hash(self) -> str:
+        """Fingerprint of the points of the response - it changes whenever Energa corrects any of the values"""
+        content = [self._raw_timestamps, self._raw_values, self._estimated]
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
     def get_first_non_empty_stat(self) -> EnergaHistoricalPoint | None:
         """Returns the first non-empty historical statistic"""
         for point in self.historical_points:
@@ -145,6 +217,15 @@ class EnergaMeterReading:
     def __str__(self):
         return f'{{"name":"{self.meter_name}","time":"{self.reading_time}","value":{self.value}}}'
 
+    def as_dict(self) -> dict:
+        """The JSON-serializable representation of the reading"""
+        return {'name': self.meter_name, 'time': self.reading_time, 'value': self.value}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'EnergaMeterReading':
+        """Restores the reading saved with as_dict"""
+        return EnergaMeterReading(data['name'], data['time'], data['value'])
+
     def __eq__(self, other) -> bool:
         """Compares two instances"""
         return (
@@ -219,6 +300,17 @@ class EnergaData:
         """Returns the value of the specified key"""
         return self._data.get(key, def_value)
 
+    def as_dict(self) -> dict:
+        """The JSON-serializable representation of the data, so it can be saved between Home Assistant restarts"""
+        return {**self._data, 'meter_readings': [reading.as_dict() for reading in self._data['meter_readings']]}
+
+    @staticmethod
+    def from_dict(data: dict) -> 'EnergaData':
+        """Restores the data saved with as_dict"""
+        return EnergaData(
+            {**data, 'meter_readings': [EnergaMeterReading.from_dict(reading) for reading in data['meter_readings']]}
+        )
+
     def __eq__(self, other) -> bool:
         """Compares two EnergaData instances"""
         return isinstance(other, EnergaData) and self._data == other._data
@@ -31,3 +31,11 @@ class EnergaStatisticsCouldNotBeLoadedError(EnergaClientError):
 
 class EnergaConnectionNotOpenedError(EnergaClientError):
     """Raised when the connection to the Energa website was not opened"""
+
+
+class EnergaWebsiteUnavailableError(EnergaWebsiteLoadingError):
+    """Raised without sending any request, because the Energa website has been failing recently"""
+
+
+class EnergaDeadlineExceededError(EnergaClientError):
+    """Raised instead of sending a request when the time planned for the whole refresh has run out"""
@@ -0,0 +1,195 @@
+"""
+Bulk export of the hourly statistics from the Energa website to CSV or Parquet files, without Home Assistant.
+The days are loaded by several threads sharing one logged-in session and written in order, one day at a time.
+The last exported day of every meter and mode is kept in a JSON state file, so an interrupted export is resumed.
+"""
+import csv
+import json
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, tzinfo
+from pathlib import Path
+from typing import Iterator
+
+from .client import EnergaMyMeterClient
+from .data import EnergaStatisticsData
+from .stats_modes import EnergaStatsModes
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = ['meter_id', 'mode', 'zone', 'start', 'timestamp', 'value', 'estimated']
+
+
+class EnergaExportState:
+    """The last exported day of every meter and mode, saved after every day"""
+
+    def __init__(self, path: Path | None):
+        self._path = path
+        self._days: dict[str, str] = {}
+        if path is not None and path.exists():
+            self._days = json.loads(path.read_text(encoding='utf-8'))
+
+    def get_first_day(self, meter_id: int, mode: EnergaStatsModes, start: date) -> date:
+        """The first day of the range that is not exported yet"""
+        exported = self._days.get(self._get_key(meter_id, mode))
+        if exported is None:
+            return start
+        return max(start, date.fromisoformat(exported) + timedelta(days=1))
+
+    def mark(self, meter_id: int, mode: EnergaStatsModes, day: date) -> None:
+        """Remembers the day as exported (together with all days before it)"""
+        self._days[self._get_key(meter_id, mode)] = day.isoformat()
+        if self._path is not None:
+            temporary_path = self._path.with_name(f'{self._path.name}.tmp')
+            temporary_path.write_text(json.dumps(self._days, indent=2), encoding='utf-8')
+            os.replace(temporary_path, self._path)
+
+    @staticmethod
+    def _get_key(meter_id: int, mode: EnergaStatsModes) -> str:
+        """The key of the meter and mode in the state file"""
+        return f'{meter_id}/{mode.name}'
+
+
+class CsvRowsWriter:
+    """Appends the rows to the CSV file, writing the header only into a new file"""
+
+    def __init__(self, path: Path):
+        is_new = not path.exists() or path.stat().st_size == 0
+        # pylint: disable-next=consider-using-with
+        self._file = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        if is_new:
+            self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, rows: list[list]) -> None:
+        """Writes the rows of a single day"""
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def close(self) -> None:
+        """Closes the file"""
+        self._file.close()
+
+
+class ParquetRowsWriter:
+    """
+    Writes the rows to the Parquet file (requires pyarrow). Parquet files cannot be appended,
+    so a resumed export writes the next numbered part next to the file (like export-1.parquet).
+    """
+
+    def __init__(self, path: Path):
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            import pyarrow
+            # pylint: disable-next=import-outside-toplevel
+            from pyarrow import parquet
+        except ImportError as error:
+            raise RuntimeError('Exporting to Parquet requires the pyarrow package') from error
+        base_path, part = path, 0
+        while path.exists():
+            part += 1
+            path = base_path.with_name(f'{base_path.stem}-{part}{base_path.suffix}')
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([
+            ('meter_id', pyarrow.int64()), ('mode', pyarrow.string()), ('zone', pyarrow.string()),
+            ('start', pyarrow.string()), ('timestamp', pyarrow.int64()), ('value', pyarrow.float64()),
+            ('estimated', pyarrow.bool_()),
+        ])
+        self._writer = parquet.ParquetWriter(path, self._schema)
+
+    def write(self, rows: list[list]) -> None:
+        """Writes the rows of a single day as a new row group"""
+        if rows:
+            columns = list(zip(*rows))
+            self._writer.write_table(self._pyarrow.Table.from_arrays(
+                [self._pyarrow.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+                schema=self._schema
+            ))
+
+    def close(self) -> None:
+        """Finishes the file"""
+        self._writer.close()
+
+
+class EnergaExporter:
+    """Loads the statistics of the selected meters, modes and zones day by day and hands the rows to the writer"""
+
+    def __init__(self, client: EnergaMyMeterClient, writer: CsvRowsWriter | ParquetRowsWriter,
+                 state: EnergaExportState, workers: int = 2):
+        self.client = client
+        self.writer = writer
+        self.state = state
+        self.workers = max(workers, 1)
+        self._local = threading.local()
+        # The clients forked by the threads of the workers, disconnected when the days are loaded
+        self._forks: list[EnergaMyMeterClient] = []
+        self._forks_lock = threading.Lock()
+
+    def export(self, meter_ids: list[int], modes: list[EnergaStatsModes], zones: list[str] | None,
+               period: tuple[date, date], time_zone: tzinfo) -> int:
+        """Exports all days of the period (both included) that are not exported yet and returns the number of rows"""
+        start, end = period
+        exported = 0
+        for meter_id in meter_ids:
+            for mode in modes:
+                first_day = self.state.get_first_day(meter_id, mode, start)
+                days = [first_day + timedelta(days=offset) for offset in range((end - first_day).days + 1)]
+                _LOGGER.info('Exporting %s days of the meter %s (%s)...', len(days), meter_id, mode.name)
+                for day, data in self.load_days(meter_id, mode, days, time_zone):
+                    rows = self._get_rows(meter_id, mode, zones, data)
+                    self.writer.write(rows)
+                    self.state.mark(meter_id, mode, day)
+                    exported += len(rows)
+        return exported
+
+    def load_days(self, meter_id: int, mode: EnergaStatsModes, days: list[date],
+                   time_zone: tzinfo) -> Iterator[tuple[date, EnergaStatisticsData]]:
+        """Loads the days in order, with at most twice as many requests queued as there are workers"""
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='energa-export') as executor:
+                pending: deque[tuple[date, Future]] = deque()
+                for day in days:
+                    starting_point = datetime(day.year, day.month, day.day, tzinfo=time_zone)
+                    pending.append((day, executor.submit(self._load_day, meter_id, mode, starting_point)))
+                    if len(pending) >= self.workers * 2:
+                        loaded_day, future = pending.popleft()
+                        yield loaded_day, future.result()
+                while pending:
+                    loaded_day, future = pending.popleft()
+                    yield loaded_day, future.result()
+        finally:
+            self._disconnect_forks()
+
+    def _load_day(self, meter_id: int, mode: EnergaStatsModes, starting_point: datetime) -> EnergaStatisticsData:
+        """Loads a single day with the client of the current thread (a browser cannot be shared by threads)"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.client.fork()
+            with self._forks_lock:
+                self._forks.append(client)
+        return client.get_statistics(meter_id, starting_point, mode)
+
+    def _disconnect_forks(self) -> None:
+        """Closes the clients of the workers - the threads using them have finished"""
+        with self._forks_lock:
+            forks, self._forks = self._forks, []
+        for client in forks:
+            client.disconnect()
+
+    @staticmethod
+    def _get_rows(meter_id: int, mode: EnergaStatsModes, zones: list[str] | None,
+                  data: EnergaStatisticsData) -> list[list]:
+        """The rows of every hour and selected zone of the day (all zones of the response, if none are selected)"""
+        rows = []
+        dates = data.get_dates()
+        for zone in zones if zones is not None else data.zones:
+            if zone not in data.zones:
+                continue
+            values = data.get_values(zone)
+            for index, timestamp in enumerate(data.timestamps):
+                rows.append([meter_id, mode.name, zone, dates[index].isoformat(), timestamp, values[index],
+                             bool(data.estimated[index])])
+        return rows
@@ -0,0 +1,99 @@
+"""
+Pacing of the requests sent to the Energa website.
+Energa protects the website with captcha when it receives too many requests, so every account gets an adaptive
+token bucket: it slows down when the website starts defending itself and speeds up while the responses stay clean.
+"""
+import logging
+import threading
+import time
+from typing import Callable
+
+from .const import ENERGA_REQUESTS_INITIAL_RATE, ENERGA_REQUESTS_MINIMUM_RATE, ENERGA_REQUESTS_MAXIMUM_RATE, \
+    ENERGA_REQUESTS_RATE_INCREASE, ENERGA_REQUESTS_RATE_DECREASE_FACTOR, ENERGA_REQUESTS_BURST
+from .errors import EnergaDeadlineExceededError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EnergaTokenBucket:
+    """Tokens gathered at the rate up to the burst - not thread-safe, its owner guards it with its own lock"""
+
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._clock = clock
+        self._last_refill = clock()
+
+    def refill(self) -> None:
+        """Adds the tokens gathered since the last refill"""
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def wait_time(self) -> float:
+        """The number of seconds until the next token is gathered (0 when there is one already)"""
+        return (1 - self.tokens) / self.rate if self.tokens < 1 else 0
+
+
+class EnergaRateLimiter:
+    """Thread-safe token bucket with an additive increase / multiplicative decrease of its rate"""
+
+    def __init__(
+            self,
+            rate: float = ENERGA_REQUESTS_INITIAL_RATE,
+            burst: int = ENERGA_REQUESTS_BURST,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], None] = time.sleep,
+    ):
+        self._bucket = EnergaTokenBucket(rate, burst, clock)
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """The current number of requests allowed per second"""
+        return self._bucket.rate
+
+    def acquire(self, max_wait: float | None = None) -> None:
+        """
+        Blocks the calling thread until the next request can be sent.
+        Raises EnergaDeadlineExceededError (without taking the token) if that would take longer than the maximum wait.
+        """
+        with self._lock:
+            self._bucket.refill()
+            wait_time = self._bucket.wait_time()
+            if max_wait is not None and wait_time > max_wait:
+                raise EnergaDeadlineExceededError
+            self._bucket.tokens -= 1
+        if wait_time > 0:
+            _LOGGER.debug('Pacing the requests to the Energa website: waiting %.2fs...', wait_time)
+            self._sleep(wait_time)
+
+    def report_success(self) -> None:
+        """The website answered correctly - the rate can slowly grow"""
+        with self._lock:
+            self._bucket.refill()
+            self._bucket.rate = min(ENERGA_REQUESTS_MAXIMUM_RATE, self._bucket.rate + ENERGA_REQUESTS_RATE_INCREASE)
+
+    def report_throttled(self) -> None:
+        """The website started defending itself (captcha, error page) - slowing down and dropping the burst"""
+        with self._lock:
+            self._bucket.refill()
+            self._bucket.rate = max(ENERGA_REQUESTS_MINIMUM_RATE,
+                                    self._bucket.rate * ENERGA_REQUESTS_RATE_DECREASE_FACTOR)
+            self._bucket.tokens = min(self._bucket.tokens, 0)
+        _LOGGER.info('The Energa website is throttling the requests. Slowing down to %.2f requests/s', self.rate)
+
+
+_RATE_LIMITERS: dict[tuple[str, str], EnergaRateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(host: str, username: str) -> EnergaRateLimiter:
+    """Returns the rate limiter shared by every connection of the account to the specified host"""
+    with _RATE_LIMITERS_LOCK:
+        key = (host, username)
+        if key not in _RATE_LIMITERS:
+            _RATE_LIMITERS[key] = EnergaRateLimiter()
+        return _RATE_LIMITERS[key]
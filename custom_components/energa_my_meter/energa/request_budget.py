@@ -0,0 +1,95 @@
+"""
+The budget of the requests sent to the Energa website by all accounts together.
+Every account is paced on its own, but all of them share the IP address - and the website may block it as a whole.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+from .const import ENERGA_HOST_REQUESTS_PER_MINUTE, ENERGA_HOST_REQUESTS_BURST
+from .errors import EnergaDeadlineExceededError
+from .rate_limiter import EnergaTokenBucket
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EnergaRequestBudget:
+    """
+    Thread-safe token bucket of the host with a fair queue: when the budget is exhausted, the accounts waiting for it
+    take turns (one request each), so the account loading a long history does not starve the other ones.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: float = ENERGA_HOST_REQUESTS_PER_MINUTE,
+            burst: int = ENERGA_HOST_REQUESTS_BURST,
+            clock: Callable[[], float] = time.monotonic,
+            wait: Callable[[threading.Condition, float | None], None] = threading.Condition.wait,
+    ):
+        self._bucket = EnergaTokenBucket(requests_per_minute / 60, burst, clock)
+        self._clock = clock
+        self._wait = wait
+        self._condition = threading.Condition()
+        # The accounts with requests waiting for the budget, in the order of their turns
+        self._turns: deque[str] = deque()
+        self._waiting: dict[str, int] = {}
+
+    @property
+    def waiting(self) -> int:
+        """The number of requests waiting for the budget"""
+        with self._condition:
+            return sum(self._waiting.values())
+
+    def acquire(self, account: str, max_wait: float | None = None) -> None:
+        """
+        Blocks the calling thread until it is the turn of the account and the request fits into the budget.
+        Raises EnergaDeadlineExceededError (giving up the turn) if the request cannot be sent within the maximum wait.
+        """
+        give_up_at = self._clock() + max_wait if max_wait is not None else None
+        with self._condition:
+            self._waiting[account] = self._waiting.get(account, 0) + 1
+            if account not in self._turns:
+                self._turns.append(account)
+            while True:
+                self._bucket.refill()
+                if self._turns[0] == account and self._bucket.tokens >= 1:
+                    break
+                wait_time = None if self._turns[0] != account else self._bucket.wait_time()
+                if give_up_at is not None:
+                    remaining = give_up_at - self._clock()
+                    if remaining <= 0 or (wait_time is not None and wait_time > remaining):
+                        self._leave(account)
+                        raise EnergaDeadlineExceededError
+                    wait_time = min(wait_time, remaining) if wait_time is not None else remaining
+                if self._turns[0] == account:
+                    _LOGGER.debug('The requests budget of the Energa website is exhausted. Waiting for a turn...')
+                self._wait(self._condition, wait_time)
+            self._bucket.tokens -= 1
+            self._leave(account)
+
+    def _leave(self, account: str) -> None:
+        """
+        Removes the request of the account from the queue - the account goes to the end of the queue, if it has more
+        requests waiting (has to be called with the lock acquired)
+        """
+        self._turns.remove(account)
+        self._waiting[account] -= 1
+        if self._waiting[account]:
+            self._turns.append(account)
+        else:
+            del self._waiting[account]
+        self._condition.notify_all()
+
+
+_REQUEST_BUDGETS: dict[str, EnergaRequestBudget] = {}
+_REQUEST_BUDGETS_LOCK = threading.Lock()
+
+
+def get_request_budget(host: str) -> EnergaRequestBudget:
+    """Returns the budget shared by all connections to the specified host"""
+    with _REQUEST_BUDGETS_LOCK:
+        if host not in _REQUEST_BUDGETS:
+            _REQUEST_BUDGETS[host] = EnergaRequestBudget()
+        return _REQUEST_BUDGETS[host]
@@ -2,7 +2,7 @@
 from datetime import datetime
 from urllib import parse
 
-from custom_components.energa_my_meter.energa.data import EnergaMeterReading
+from .data import EnergaMeterReading
 
 
 class EnergaWebsiteScrapper:
@@ -0,0 +1,90 @@
+"""
+Timeouts of the requests sent to the Energa website.
+The login page, the heavy HTML pages and the small JSON chart endpoint respond in very different times,
+so every endpoint gets its own timeout derived from the latency observed recently.
+"""
+import math
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable
+
+from .const import ENERGA_REQUESTS_TIMEOUT, ENERGA_REQUESTS_CONNECT_TIMEOUT, ENERGA_REQUESTS_MINIMUM_READ_TIMEOUT, \
+    ENERGA_REQUESTS_MAXIMUM_READ_TIMEOUT, ENERGA_REQUESTS_LATENCY_PERCENTILE, ENERGA_REQUESTS_LATENCY_FACTOR, \
+    ENERGA_REQUESTS_LATENCY_SAMPLES, ENERGA_REQUESTS_LATENCY_MINIMUM_SAMPLES
+
+
+@dataclass(frozen=True)
+class EnergaRequestTimeout:
+    """Time budgets of a single request"""
+    connect: float
+    read: float
+
+    @property
+    def socket_timeout(self) -> float:
+        """
+        The browser applies a single socket timeout to both connecting and every read,
+        so it has to cover the bigger of the budgets.
+        """
+        return max(self.connect, self.read)
+
+
+class EnergaEndpointTimeouts:
+    """Thread-safe collection of the recent latencies of every endpoint"""
+
+    def __init__(self):
+        self._latencies: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, latency: float) -> None:
+        """Saves the time of a successful request"""
+        with self._lock:
+            if endpoint not in self._latencies:
+                self._latencies[endpoint] = deque(maxlen=ENERGA_REQUESTS_LATENCY_SAMPLES)
+            self._latencies[endpoint].append(latency)
+
+    def get_timeout(self, endpoint: str) -> EnergaRequestTimeout:
+        """Returns the timeout for the endpoint - the default one until enough requests were observed"""
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, []))
+        if len(latencies) < ENERGA_REQUESTS_LATENCY_MINIMUM_SAMPLES:
+            return EnergaRequestTimeout(ENERGA_REQUESTS_CONNECT_TIMEOUT, ENERGA_REQUESTS_TIMEOUT)
+
+        percentile_index = math.ceil(len(latencies) * ENERGA_REQUESTS_LATENCY_PERCENTILE) - 1
+        percentile = latencies[min(len(latencies) - 1, percentile_index)]
+        read_timeout = min(
+            ENERGA_REQUESTS_MAXIMUM_READ_TIMEOUT,
+            max(ENERGA_REQUESTS_MINIMUM_READ_TIMEOUT, percentile * ENERGA_REQUESTS_LATENCY_FACTOR)
+        )
+        return EnergaRequestTimeout(ENERGA_REQUESTS_CONNECT_TIMEOUT, read_timeout)
+
+    def clear(self) -> None:
+        """Forgets all observed latencies"""
+        with self._lock:
+            self._latencies.clear()
+
+
+class EnergaDeadline:
+    """The point in time when the whole refresh should stop sending requests"""
+
+    def __init__(self, seconds: float, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._deadline = clock() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left until the deadline (negative when it has already passed)"""
+        return self._deadline - self._clock()
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed"""
+        return self.remaining() <= 0
+
+
+_ENDPOINT_TIMEOUTS = EnergaEndpointTimeouts()
+
+
+def get_endpoint_timeouts() -> EnergaEndpointTimeouts:
+    """Returns the latency statistics shared by all connections in the process"""
+    return _ENDPOINT_TIMEOUTS
@@ -0,0 +1,27 @@
+"""
+Progress of loading the history backwards, kept inside the persistent state of the entry.
+On the first loading only the most recent days are loaded, then the older days are loaded backwards, chunk by chunk.
+"""
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+from ..energa.stats_modes import EnergaStatsModes
+
+HISTORY_START_STORAGE_KEY = 'history_start'
+
+
+class EnergaBackfillState:
+    """Keeps the start of the oldest loaded day (as a timestamp) for every statistics mode"""
+
+    def __init__(self, state: dict):
+        self._state = state
+
+    def get_start(self, mode: EnergaStatsModes) -> datetime | None:
+        """The oldest day loaded so far - or None, if the history was loaded forward from the start"""
+        start = self._state.get(HISTORY_START_STORAGE_KEY, {}).get(mode.name)
+        return dt_util.as_local(dt_util.utc_from_timestamp(start)) if start is not None else None
+
+    def set_start(self, mode: EnergaStatsModes, day: datetime) -> None:
+        """Saves the oldest day loaded so far"""
+        self._state.setdefault(HISTORY_START_STORAGE_KEY, {})[mode.name] = int(day.timestamp())
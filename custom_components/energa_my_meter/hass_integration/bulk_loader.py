@@ -0,0 +1,200 @@
+"""
+Offline loading of the history exported by `python -m energa` straight into the recorder database.
+Importing years of history through the recorder takes a day per callback, while this writes every statistic
+in a single transaction. It must be run while Home Assistant is stopped.
+
+Usage (from the Home Assistant configuration directory):
+    python -m custom_components.energa_my_meter.hass_integration.bulk_loader \\
+        --database home-assistant_v2.db --meter 1234=12345 energa.csv
+
+Only the hours before the first hour already saved for the statistic are loaded, so the loader can be run
+after the integration loaded the recent days. The sums of the saved hours are increased by the loaded total.
+The start of the loaded history is saved in the state of the config entries of the meters, so the integration
+does not load these days again.
+"""
+import argparse
+import csv
+import json
+import logging
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable
+
+from homeassistant.components.recorder.db_schema import SCHEMA_VERSION
+from homeassistant.const import UnitOfEnergy
+
+from .backfill_state import HISTORY_START_STORAGE_KEY
+from .entry_store import STORAGE_VERSION
+from ..common import generate_entity_name, generate_stats_base_entity_name, generate_stats_display_name
+from ..const import CONF_SELECTED_METER_NUMBER, DOMAIN
+from ..energa.stats_modes import EnergaStatsModes
+
+_LOGGER = logging.getLogger(__name__)
+
+# The tables keeping the sums of the statistic, all of them need to be moved when the history is inserted before them
+SUM_TABLES = ['statistics', 'statistics_short_term']
+
+
+class EnergaBulkLoader:
+    """Writes the hourly values of the statistics into the recorder SQLite database"""
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        try:
+            schema_version, = connection.execute('SELECT MAX(schema_version) FROM schema_changes').fetchone()
+        except sqlite3.OperationalError:
+            schema_version = None
+        if schema_version is None or schema_version < SCHEMA_VERSION:
+            raise RuntimeError('The recorder database is missing or too old, start Home Assistant once to migrate it')
+        if schema_version > SCHEMA_VERSION:
+            raise RuntimeError(f'The recorder database (schema {schema_version}) is newer than the installed '
+                               f'Home Assistant (schema {SCHEMA_VERSION}), run the loader with the same version')
+
+    def load(self, statistic_id: str, name: str, hours: Iterable[tuple[float, float]]) -> list[float]:
+        """
+        Saves the values of the hours (start timestamp, value) which are older than the first saved hour.
+        Returns the starts of the saved hours.
+        """
+        with self.connection:
+            metadata_id = self.get_metadata_id(statistic_id, name)
+            first_saved, = self.connection.execute(
+                'SELECT MIN(start_ts) FROM statistics WHERE metadata_id = ?', (metadata_id,)
+            ).fetchone()
+            values = dict(hours)
+            starts = sorted(start for start in values if first_saved is None or start < first_saved)
+            if len(starts) == 0:
+                return []
+            states = [values[start] for start in starts]
+            sums = list(accumulate(states))
+            created = time.time()
+            self.connection.executemany(
+                'INSERT INTO statistics (created_ts, metadata_id, start_ts, state, sum) VALUES (?, ?, ?, ?, ?)',
+                zip([created] * len(starts), [metadata_id] * len(starts), starts, states, sums)
+            )
+            if first_saved is not None:
+                for table in SUM_TABLES:
+                    self.connection.execute(
+                        f'UPDATE {table} SET sum = sum + ? WHERE metadata_id = ? AND start_ts >= ?',
+                        (sums[-1], metadata_id, first_saved)
+                    )
+        _LOGGER.info('Saved %s hours of %s (%s - %s)', len(starts), statistic_id,
+                     datetime.fromtimestamp(starts[0]), datetime.fromtimestamp(starts[-1]))
+        return starts
+
+    def get_metadata_id(self, statistic_id: str, name: str) -> int:
+        """The ID of the statistic metadata - created the same way as the statistics sensor does, if missing"""
+        row = self.connection.execute(
+            'SELECT id FROM statistics_meta WHERE statistic_id = ?', (statistic_id,)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        return self.connection.execute(
+            'INSERT INTO statistics_meta (statistic_id, source, unit_of_measurement, has_mean, has_sum, name) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (statistic_id, 'recorder', UnitOfEnergy.KILO_WATT_HOUR, False, True, name)
+        ).lastrowid
+
+
+def read_export(path: Path,
+                meter_numbers: dict[int, str]) -> dict[tuple[str, EnergaStatsModes, str], list[tuple[float, float]]]:
+    """
+    Groups the hours of the CSV export by the meter number, the mode and the zone.
+    The hours of the meters without a number and without a value are skipped.
+    """
+    statistics = {}
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            meter_number = meter_numbers.get(int(row['meter_id']))
+            if meter_number is None or row['value'] == '':
+                continue
+            statistics.setdefault((meter_number, EnergaStatsModes[row['mode']], row['zone']), []).append(
+                (datetime.fromisoformat(row['start']).timestamp(), float(row['value']))
+            )
+    return statistics
+
+
+def update_history_starts(storage: Path, history_starts: dict[tuple[str, EnergaStatsModes], float]) -> None:
+    """
+    Saves the start of the loaded history (per meter number and mode) in the state of the config entries of the meters,
+    unless the entry has already loaded older days
+    """
+    entries_path = storage / 'core.config_entries'
+    if not entries_path.exists():
+        _LOGGER.warning('No config entries found in %s, the state of the integration is not updated', storage)
+        return
+    entries = json.loads(entries_path.read_text(encoding='utf-8'))['data']['entries']
+    for entry in entries:
+        if entry['domain'] != DOMAIN:
+            continue
+        meter_number = str(entry['data'].get(CONF_SELECTED_METER_NUMBER))
+        starts = {mode: start for (number, mode), start in history_starts.items() if number == meter_number}
+        if len(starts) == 0:
+            continue
+        key = f'{DOMAIN}.{entry["entry_id"]}'
+        state_path = storage / key
+        state = json.loads(state_path.read_text(encoding='utf-8')) if state_path.exists() else {
+            'version': STORAGE_VERSION, 'minor_version': 1, 'key': key, 'data': {}
+        }
+        saved_starts = state['data'].setdefault(HISTORY_START_STORAGE_KEY, {})
+        for mode, start in starts.items():
+            if saved_starts.get(mode.name) is None or start < saved_starts[mode.name]:
+                saved_starts[mode.name] = int(start)
+        state_path.write_text(json.dumps(state, indent=2), encoding='utf-8')
+        _LOGGER.info('Saved the start of the loaded history in the state of the entry %s', entry['title'])
+
+
+def _parse_meter(value: str) -> tuple[int, str]:
+    """Parses the meter as INTERNAL_ID=METER_NUMBER"""
+    meter_id, separator, meter_number = value.partition('=')
+    if not separator or not meter_id.isdigit() or not meter_number:
+        raise argparse.ArgumentTypeError(f'Expected INTERNAL_ID=METER_NUMBER, got {value}')
+    return int(meter_id), meter_number
+
+
+def main(arguments: list[str] | None = None) -> int:
+    """Loads the export files and returns the exit code"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database', type=Path, default=Path('home-assistant_v2.db'))
+    parser.add_argument('--storage', type=Path, default=Path('.storage'),
+                        help='the storage directory of Home Assistant, keeping the state of the config entries')
+    parser.add_argument('--meter', type=_parse_meter, action='append', required=True, dest='meters',
+                        help='the internal Energa ID of the exported meter and the number of the configured meter '
+                             '(used in the entity IDs) as INTERNAL_ID=METER_NUMBER, can be repeated')
+    parser.add_argument('exports', type=Path, nargs='+', help='the CSV files written by python -m energa')
+    args = parser.parse_args(sys.argv[1:] if arguments is None else arguments)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if not args.database.exists():
+        logging.error('The recorder database %s does not exist', args.database)
+        return 1
+
+    connection = sqlite3.connect(args.database)
+    history_starts = {}
+    try:
+        loader = EnergaBulkLoader(connection)
+        saved = 0
+        for export in args.exports:
+            for (meter_number, mode, zone), hours in read_export(export, dict(args.meters)).items():
+                starts = loader.load(
+                    generate_entity_name(meter_number, generate_stats_base_entity_name(mode, zone)),
+                    generate_stats_display_name(mode, zone), hours
+                )
+                saved += len(starts)
+                if len(starts) > 0:
+                    history_start = history_starts.get((meter_number, mode), starts[0])
+                    history_starts[(meter_number, mode)] = min(history_start, starts[0])
+        update_history_starts(args.storage, history_starts)
+    except (RuntimeError, sqlite3.Error, OSError, ValueError) as error:
+        logging.error('Loading the history failed: %s', error)
+        return 1
+    finally:
+        connection.close()
+    logging.info('Saved %s hours in total', saved)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
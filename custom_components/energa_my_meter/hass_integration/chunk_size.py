@@ -0,0 +1,47 @@
+"""
+Self-tuning number of days loaded from Energa in a single statistics cycle.
+It grows while the cycles finish quickly without errors and shrinks after timeouts or bot-protection responses.
+"""
+import logging
+
+from ..const import INITIAL_DAYS_TO_BE_LOADED_AT_ONCE, MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE, \
+    MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE, CHUNK_SIZE_GROWTH_MAXIMUM_SECONDS_PER_DAY
+
+_LOGGER = logging.getLogger(__name__)
+
+CHUNK_SIZE_STORAGE_KEY = 'chunk_size'
+
+
+class EnergaChunkSizeTuner:
+    """Keeps the current chunk size inside the persistent state of the entry"""
+
+    def __init__(self, state: dict):
+        self._state = state
+
+    @property
+    def size(self) -> int:
+        """The number of days that should be loaded in the next cycle"""
+        size = self._state.get(CHUNK_SIZE_STORAGE_KEY, INITIAL_DAYS_TO_BE_LOADED_AT_ONCE)
+        return min(MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE, max(MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE, int(size)))
+
+    def record_success(self, chunk_exhausted: bool, requested_days: int, duration: float) -> None:
+        """
+        The cycle has finished without errors.
+        The chunk only grows if it was fully used (the backfill is not finished yet) and the days loaded quickly.
+        """
+        if not chunk_exhausted or duration > requested_days * CHUNK_SIZE_GROWTH_MAXIMUM_SECONDS_PER_DAY:
+            return
+        self._update(self.size * 2)
+
+    def record_failure(self) -> None:
+        """The cycle was interrupted by a timeout or by the Energa bot protection"""
+        self._update(self.size // 2)
+
+    def _update(self, size: int) -> None:
+        """Saves the new size in the persistent state"""
+        previous_size = self.size
+        self._state[CHUNK_SIZE_STORAGE_KEY] = min(
+            MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE, max(MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE, size)
+        )
+        if previous_size != self.size:
+            _LOGGER.debug('Changing the number of days loaded at once from %s to %s', previous_size, self.size)
@@ -0,0 +1,94 @@
+"""
+Index of the hours saved in the recorder for every statistic.
+It is built once with a single query, updated with every import, and allows finding the days with missing hours
+without asking the recorder about every day.
+"""
+import bisect
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from homeassistant.util import dt as dt_util
+
+
+class EnergaCoverageIndex:
+    """Thread-safe bitmaps of the saved hours (one bit per hour) for every statistic and (local) day"""
+
+    def __init__(self):
+        self._days: dict[str, dict[int, int]] = {}
+        self._loaded: set[str] = set()
+        self._lock = threading.Lock()
+
+    def is_loaded(self, statistic_id: str) -> bool:
+        """Whether the index was already built from the recorder for the statistic"""
+        return statistic_id in self._loaded
+
+    def load(self, statistic_id: str, starts: Iterable[float]) -> None:
+        """Builds the index of the statistic from the starts (timestamps) of all its saved hours"""
+        self._mark(statistic_id, starts)
+        with self._lock:
+            self._loaded.add(statistic_id)
+
+    def mark(self, statistic_id: str, starts: Iterable[datetime]) -> None:
+        """Marks the imported hours as saved"""
+        self._mark(statistic_id, (start.timestamp() for start in starts))
+
+    def missing_days(self, statistic_id: str) -> list[int]:
+        """
+        Days with missing hours between the first fully loaded day and the last saved day of the statistic.
+        Days before it contain at most the placeholders saved when Energa had no data, the last one may be incomplete.
+        """
+        with self._lock:
+            days = dict(self._days.get(statistic_id, {}))
+        complete = [day for day, bitmap in sorted(days.items()) if bitmap == self._full_bitmap(day)]
+        if len(complete) == 0:
+            return []
+        last_day = max(days)
+        result = []
+        day = dt_util.as_local(dt_util.utc_from_timestamp(complete[0]))
+        while day.timestamp() < last_day:
+            timestamp = int(day.timestamp())
+            if days.get(timestamp, 0) != self._full_bitmap(timestamp):
+                result.append(timestamp)
+            day = dt_util.start_of_local_day(day + timedelta(days=1))
+        return result
+
+    def next_saved_hour(self, statistic_id: str, since: datetime) -> datetime | None:
+        """The first saved hour of the statistic at or after the specified moment"""
+        with self._lock:
+            days = self._days.get(statistic_id, {})
+            sorted_days = sorted(days)
+            start_day = self._day_of(since.timestamp())
+            for day in sorted_days[bisect.bisect_left(sorted_days, start_day):]:
+                bitmap = days[day]
+                first_bit = max(0, int(since.timestamp() - day) // 3600) if day == start_day else 0
+                for bit in range(first_bit, bitmap.bit_length()):
+                    if bitmap >> bit & 1:
+                        return dt_util.utc_from_timestamp(day + bit * 3600)
+        return None
+
+    def _mark(self, statistic_id: str, starts: Iterable[float]) -> None:
+        """Sets the bits of the hours"""
+        with self._lock:
+            days = self._days.setdefault(statistic_id, {})
+            day = next_day = None
+            for start in starts:
+                # The hours usually come sorted, so the day is computed only when the hour is outside of the last one
+                if day is None or not day <= start < next_day:
+                    day = self._day_of(start)
+                    next_day = dt_util.start_of_local_day(
+                        dt_util.as_local(dt_util.utc_from_timestamp(day)) + timedelta(days=1)
+                    ).timestamp()
+                days[day] = days.get(day, 0) | 1 << int(start - day) // 3600
+
+    @staticmethod
+    def _day_of(timestamp: float) -> int:
+        """The start of the local day containing the moment"""
+        return int(dt_util.start_of_local_day(dt_util.as_local(dt_util.utc_from_timestamp(timestamp))).timestamp())
+
+    @staticmethod
+    def _full_bitmap(day: int) -> int:
+        """The bitmap of the day with all hours saved - the number of hours differs on the days of time changes"""
+        start = dt_util.as_local(dt_util.utc_from_timestamp(day))
+        hours = int(dt_util.start_of_local_day(start + timedelta(days=1)).timestamp() - day) // 3600
+        return (1 << hours) - 1
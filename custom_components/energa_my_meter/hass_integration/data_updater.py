@@ -1,19 +1,27 @@
 """Contains logic of connecting to Energa and getting the data Home Assistant uses"""
+import bisect
 import logging
 from datetime import datetime, timedelta
+from typing import Iterable, Iterator
 
 from homeassistant.components.recorder.models import StatisticData
-from homeassistant.components.recorder.statistics import get_last_statistics
+from homeassistant.components.recorder.statistics import get_last_statistics, statistics_during_period
 from homeassistant.core import HomeAssistant
 from homeassistant.util import dt as dt_util
 
+from .backfill_state import EnergaBackfillState
+from .coverage_index import EnergaCoverageIndex
+from .day_hashes import EnergaDayHashes
+from .days_index import EnergaDaysIndex, ESTIMATED_DAYS_STORAGE_KEY, VERIFIED_DAYS_STORAGE_KEY
+from .statistics_rebaser import EnergaStatisticsRebaser, StatisticsSink, AdjustmentsSink
 from ..common import generate_entity_name, generate_stats_base_entity_name
 from ..const import CONF_NUMBER_OF_DAYS_TO_LOAD, DEBUGGING_DATE_FORMAT, CONF_SELECTED_ZONES, \
-    MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE, CONF_SELECTED_METER_PPE
+    INITIAL_DAYS_TO_BE_LOADED_AT_ONCE, CONF_SELECTED_METER_PPE, STATISTICS_COMMIT_DAYS, \
+    ESTIMATED_DAYS_TRACKING_PERIOD, DAYS_RELOAD_LIMIT, PREVIOUS_DAYS_NUMBER_TO_BE_LOADED, REVALIDATION_DAYS
 from ..const import CONF_SELECTED_METER_NUMBER, CONF_SELECTED_METER_ID
 from ..energa.client import EnergaMyMeterClient
-from ..energa.data import EnergaData, EnergaStatisticsData, EnergaHistoricalPoint
-from ..energa.errors import EnergaClientError
+from ..energa.data import EnergaData, EnergaStatisticsData
+from ..energa.errors import EnergaClientError, EnergaDeadlineExceededError
 from ..energa.stats_modes import EnergaStatsModes
 
 _LOGGER = logging.getLogger(__name__)
@@ -22,10 +30,29 @@ _LOGGER = logging.getLogger(__name__)
 class EnergaDataUpdater:
     """Manages updating the data from Energa into Home Assistant"""
 
-    def __init__(self, client: EnergaMyMeterClient, hass_data: dict, hass: HomeAssistant):
+    def __init__(self, client: EnergaMyMeterClient, hass_data: dict, hass: HomeAssistant,
+                 chunk_size: int = INITIAL_DAYS_TO_BE_LOADED_AT_ONCE, statistics_sink: StatisticsSink | None = None,
+                 *, adjustments_sink: AdjustmentsSink | None = None, state: dict | None = None,
+                 coverage: EnergaCoverageIndex | None = None):
         self.client = client
+        self.statistics_sink = statistics_sink
+        self.adjustments_sink = adjustments_sink
+        state = state if state is not None else {}
+        self.estimates = EnergaDaysIndex(state, ESTIMATED_DAYS_STORAGE_KEY)
+        self.verified_days = EnergaDaysIndex(state, VERIFIED_DAYS_STORAGE_KEY)
+        self.day_hashes = EnergaDayHashes(state)
+        self.backfill = EnergaBackfillState(state)
+        self.coverage = coverage if coverage is not None else EnergaCoverageIndex()
+        self.rebaser = EnergaStatisticsRebaser(hass, self.coverage, self._import, adjustments_sink)
         self.data = hass_data
         self.hass = hass
+        self.chunk_size = chunk_size
+        self.requested_days = 0
+        self.chunk_exhausted = False
+        self.deadline_exceeded = False
+        self.errors: [EnergaClientError] = []
+        # Modes whose recent days were loaded for the first time now - they are not in the recorder yet
+        self._new_histories: set[str] = set()
 
     def gather_basic_data(self) -> EnergaData:
         """Refreshes main information available on the account"""
@@ -34,8 +61,14 @@ class EnergaDataUpdater:
             self.data.get(CONF_SELECTED_METER_PPE)
         )
 
-    def gather_stats(self, mode: EnergaStatsModes) -> dict:
-        """Refreshes the statistics (per hour) from Energa for a specified mode"""
+    def gather_stats(self, mode: EnergaStatsModes) -> dict[str, int]:
+        """
+        Refreshes the statistics (per hour) from Energa for a specified mode.
+        The days are fetched, parsed and summed one by one, and the statistics are handed to the sink
+        every few days - so the memory usage does not depend on the number of loaded days,
+        and an interrupted cycle keeps everything loaded before the interruption.
+        Returns the number of statistics saved for every zone.
+        """
         zones = self.data[CONF_SELECTED_ZONES]
 
         if len(zones) == 0:
@@ -48,8 +81,9 @@ class EnergaDataUpdater:
         )
         starting_point = self._find_starting_point(last_inserted_stat_date)
         finishing_point = self._find_finishing_point()
+        if last_inserted_stat_date is None:
+            starting_point = self._start_with_recent_days(mode, starting_point, finishing_point)
 
-        current_day = starting_point
         _LOGGER.debug(
             'Loading statistics from Energa for %s from %s to %s (last loaded stat is %s)...',
             mode.name,
@@ -58,87 +92,39 @@ class EnergaDataUpdater:
             last_inserted_stat_date.strftime(DEBUGGING_DATE_FORMAT) if last_inserted_stat_date else None
         )
 
-        loaded_days = 0
-        estimates = []
+        saved = {zone: 0 for zone in zones}
+        errors_count = len(self.errors)
+        days_to_commit = 0
         try:
-            while (current_day.timestamp() <= finishing_point.timestamp()
-                   and loaded_days < MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE):
-                _LOGGER.debug(
-                    'Loading the statistics for the meter %s from %s for mode %s',
-                    self.data[CONF_SELECTED_METER_NUMBER],
-                    current_day.strftime(DEBUGGING_DATE_FORMAT),
-                    mode.name
-                )
-                historical_data: EnergaStatisticsData = self.client.get_statistics(
-                    self.data[CONF_SELECTED_METER_ID],
-                    current_day,
-                    mode
-                )
-                loaded_days += 1
-                stats_timezone = dt_util.get_time_zone(historical_data.timezone)
-
-                if len(historical_data.historical_points) == 0:
-                    _LOGGER.debug('No statistics in %s. Skipping the day...',
-                                  current_day.strftime(DEBUGGING_DATE_FORMAT))
-                    current_day = current_day + timedelta(days=1)
-                    continue
-
-                for point in historical_data.historical_points:
-                    point_date = point.get_date(tz=stats_timezone)
-
-                    current_day = point_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-
-                    # If this point is already saved, let's just skip that to avoid duplicate entries
-                    if (last_inserted_stat_date is not None
-                            and point_date <= last_inserted_stat_date.astimezone(stats_timezone)):
-                        continue
-
-                    if point.is_estimated:
-                        _LOGGER.debug(
-                            'Energa returned an estimate on %s - we should skip that until we will get a real data.',
-                            point.get_date(tz=stats_timezone).strftime(DEBUGGING_DATE_FORMAT)
-                        )
-                        estimates.append(point)
-                        continue
-
-                    if len(estimates) > 0:
-                        _LOGGER.debug(
-                            "Found a new normal-value point. Loading %s previously skipped estimates...",
-                            len(estimates)
-                        )
-                        for estimate in estimates:
-                            estimate_date = estimate.get_date(tz=stats_timezone)
-                            self._process_point_as_statistic(
-                                estimate, estimate_date, historical_data.zones, previous_results, statistics
-                            )
-                        estimates = []
-
-                    self._process_point_as_statistic(
-                        point, point_date, historical_data.zones, previous_results, statistics
-                    )
+            days = self._fetch_days(mode, starting_point, finishing_point)
+            for historical_data, first_new_point in self._parse_days(mode, days, last_inserted_stat_date):
+                self._process_day_as_statistics(historical_data, first_new_point, zones, previous_results, statistics)
+                days_to_commit += 1
+                if days_to_commit >= STATISTICS_COMMIT_DAYS:
+                    self._commit(mode, statistics, saved)
+                    days_to_commit = 0
+        except EnergaDeadlineExceededError:
+            _LOGGER.warning('The time planned for the refresh has run out. Saving the statistics loaded so far...')
+            self.deadline_exceeded = True
         except EnergaClientError as error:
             _LOGGER.error("There was an error when getting the statistics: %s.", error)
+            self.errors.append(error)
+        self._commit(mode, statistics, saved)
 
-        if len(estimates) > 0:
-            _LOGGER.debug(
-                "Skipping processing %s estimates, because they were not followed by the real data: [%s]",
-                len(estimates), estimates
-            )
-
-        # Only do this for the data packages that are in the past
-        if (starting_point + timedelta(days=MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE)
-                < dt_util.now().replace(hour=0, minute=0, second=0, microsecond=0)):
+        # Only do this for the data packages that are in the past and were fully loaded
+        if (len(self.errors) == errors_count and not self.deadline_exceeded and starting_point
+                + timedelta(days=self.chunk_size) < dt_util.now().replace(hour=0, minute=0, second=0, microsecond=0)):
             for zone in zones:
-                if len(statistics[zone]) == 0:
+                if saved[zone] == 0:
                     point_dt = (
-                            starting_point + timedelta(days=max(MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE - 1, 1))
+                            starting_point + timedelta(days=max(self.chunk_size - 1, 1))
                     ).replace(hour=0, minute=0, second=0, microsecond=0)
 
                     _LOGGER.info(
                         "No statistics found in the period of %s + %s days for zone '%s'. " +
                         "Adding a simple statistic at the %s, so we won't repeat...",
                         starting_point.strftime(DEBUGGING_DATE_FORMAT),
-                        MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE,
+                        self.chunk_size,
                         zone,
                         point_dt.strftime(DEBUGGING_DATE_FORMAT)
                     )
@@ -148,20 +134,284 @@ class EnergaDataUpdater:
                             sum=previous_results.get(zone, 0),
                             state=0
                         ))
+            self._commit(mode, statistics, saved)
+
+        return saved
+
+    def backfill_history(self, mode: EnergaStatsModes) -> dict[str, int]:
+        """
+        Loads the days before the oldest loaded day, the newest first, at most the chunk size of days.
+        They are saved behind the statistics that are already saved and all later sums are adjusted by their total.
+        Returns the number of statistics saved for every zone.
+        """
+        zones = self.data[CONF_SELECTED_ZONES]
+        history_start = self.backfill.get_start(mode)
+        if len(zones) == 0 or history_start is None or mode.name in self._new_histories:
+            return {}
+        oldest_day = (dt_util.now() - timedelta(days=self.data[CONF_NUMBER_OF_DAYS_TO_LOAD])).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if history_start <= oldest_day:
+            return {}
+
+        _LOGGER.debug('Loading the history for mode %s before %s...', mode.name,
+                      history_start.strftime(DEBUGGING_DATE_FORMAT))
+        loaded = {zone: {} for zone in zones}
+        first_loaded_day = history_start
+        loaded_days = 0
+        try:
+            while first_loaded_day > oldest_day and loaded_days < self.chunk_size:
+                day = dt_util.start_of_local_day(first_loaded_day - timedelta(days=1))
+                historical_data = self.client.get_statistics(self.data[CONF_SELECTED_METER_ID], day, mode)
+                loaded_days += 1
+                self.requested_days += 1
+                self._track_day(mode, historical_data, 0)
+                self._collect_values(historical_data, (day, first_loaded_day), loaded)
+                first_loaded_day = day
+        except EnergaDeadlineExceededError:
+            self.deadline_exceeded = True
+        except EnergaClientError as error:
+            _LOGGER.error("There was an error when loading the history: %s.", error)
+            self.errors.append(error)
+        if loaded_days >= self.chunk_size:
+            self.chunk_exhausted = True
+        if first_loaded_day == history_start:
+            return {}
+
+        statistic_ids = {zone: self._get_statistic_id(mode, zone) for zone in zones}
+        differences = self.rebaser.rebase(mode, statistic_ids, [((first_loaded_day, history_start), loaded)])
+        if zones[0] not in differences:
+            _LOGGER.debug('The recent statistics of mode %s are not saved yet. The history will be loaded later.',
+                          mode.name)
+            return {}
+        self.backfill.set_start(mode, first_loaded_day)
+        return {zone: len(loaded[zone]) if zone in differences else 0 for zone in zones}
+
+    def _start_with_recent_days(self, mode: EnergaStatsModes, starting_point: datetime,
+                                finishing_point: datetime) -> datetime:
+        """
+        On the first loading only the most recent days are loaded forward, so they are available right away.
+        The older days are loaded backwards by backfill_history during the following refreshes.
+        """
+        recent_start = dt_util.start_of_local_day(finishing_point - timedelta(days=self.chunk_size - 1))
+        if recent_start <= starting_point:
+            return starting_point
+        _LOGGER.debug('Loading the recent days of mode %s first - the older ones will be loaded later...', mode.name)
+        self.backfill.set_start(mode, recent_start)
+        self._new_histories.add(mode.name)
+        return recent_start
+
+    def _fetch_days(self, mode: EnergaStatsModes, starting_point: datetime,
+                    finishing_point: datetime) -> Iterator[EnergaStatisticsData]:
+        """Downloads the statistics day by day, at most the chunk size of days"""
+        current_day = starting_point
+        loaded_days = 0
+        while current_day.timestamp() <= finishing_point.timestamp() and loaded_days < self.chunk_size:
+            _LOGGER.debug(
+                'Loading the statistics for the meter %s from %s for mode %s',
+                self.data[CONF_SELECTED_METER_NUMBER],
+                current_day.strftime(DEBUGGING_DATE_FORMAT),
+                mode.name
+            )
+            historical_data: EnergaStatisticsData = self.client.get_statistics(
+                self.data[CONF_SELECTED_METER_ID],
+                current_day,
+                mode
+            )
+            loaded_days += 1
+            self.requested_days += 1
+            yield historical_data
+
+            if len(historical_data.timestamps) == 0:
+                _LOGGER.debug('No statistics in %s. Skipping the day...',
+                              current_day.strftime(DEBUGGING_DATE_FORMAT))
+                current_day = current_day + timedelta(days=1)
+            else:
+                last_point_date = historical_data.get_dates(len(historical_data.timestamps) - 1)[0]
+                current_day = last_point_date.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        if loaded_days >= self.chunk_size:
+            self.chunk_exhausted = True
+
+    def _parse_days(self, mode: EnergaStatsModes, days: Iterable[EnergaStatisticsData],
+                    last_inserted_stat_date: datetime | None) -> Iterator[tuple[EnergaStatisticsData, int]]:
+        """
+        Yields every downloaded day together with the index of its first point that is not saved yet.
+        Points that are already saved are skipped. Estimates are saved as well (so the loading can move forward),
+        but their days are remembered to be downloaded again when Energa publishes the real values.
+        """
+        last_inserted_timestamp = last_inserted_stat_date.timestamp() if last_inserted_stat_date else None
+        for historical_data in days:
+            # The points that are already saved are skipped to avoid duplicate entries
+            first_new_point = 0
+            if last_inserted_timestamp is not None:
+                first_new_point = bisect.bisect_right(historical_data.timestamps, last_inserted_timestamp)
+            self._track_day(mode, historical_data, first_new_point)
+            yield historical_data, first_new_point
+
+    def _track_day(self, mode: EnergaStatsModes, historical_data: EnergaStatisticsData, first_new_point: int) -> None:
+        """
+        Remembers the content hash of a recent day and the estimated points from the first new point,
+        so the day is downloaded again when Energa publishes the real values.
+        """
+        timestamps = historical_data.timestamps
+        if len(timestamps) > 0:
+            day = dt_util.start_of_local_day(dt_util.as_local(dt_util.utc_from_timestamp(timestamps[0])))
+            if day >= dt_util.start_of_local_day() - timedelta(days=REVALIDATION_DAYS):
+                self.day_hashes.set(mode, int(day.timestamp()), historical_data.content_hash)
+        oldest_tracked_day = (self._find_finishing_point() - timedelta(days=ESTIMATED_DAYS_TRACKING_PERIOD)).timestamp()
+        for index in range(first_new_point, len(timestamps)):
+            if historical_data.estimated[index] and timestamps[index] >= oldest_tracked_day:
+                point_date = historical_data.get_dates(index)[0]
+                _LOGGER.debug(
+                    'Energa returned an estimate on %s - the day will be loaded again to get the real data.',
+                    point_date.strftime(DEBUGGING_DATE_FORMAT)
+                )
+                self.estimates.add(mode, dt_util.start_of_local_day(dt_util.as_local(point_date)))
+
+    def reload_days(self, mode: EnergaStatsModes) -> None:
+        """
+        Downloads again the days that contained estimates, the days with hours missing in the recorder
+        and (once a day) the last few days, then saves the hours that have changed or were missing.
+        All statistics after the changed day are adjusted by the difference, so the sums stay continuous.
+        """
+        zones = self.data[CONF_SELECTED_ZONES]
+        if len(zones) == 0:
+            return
+        statistic_ids = {zone: self._get_statistic_id(mode, zone) for zone in zones}
+        self._load_coverage(list(statistic_ids.values()))
+        verified_days = set(self.verified_days.days(mode))
+        missing_days = {
+            day for statistic_id in statistic_ids.values() for day in self.coverage.missing_days(statistic_id)
+            if day not in verified_days
+        }
+        estimated_days = set(self.estimates.days(mode))
+        today = dt_util.start_of_local_day()
+        revalidated_days = set()
+        if not self.day_hashes.is_revalidated(mode, int(today.timestamp())):
+            revalidated_days = {
+                int(dt_util.start_of_local_day(today - timedelta(days=days_ago)).timestamp())
+                for days_ago in range(1, REVALIDATION_DAYS + 1)
+            }
+        # The last days first (so they are checked every day), then the estimated days, then the missing days - each
+        # group from the oldest day, so a long gap in the recorder is filled in over several refreshes
+        prioritized_days = sorted(revalidated_days) + sorted(estimated_days - revalidated_days) + sorted(
+            missing_days - estimated_days - revalidated_days
+        )
+        days = sorted(prioritized_days[:DAYS_RELOAD_LIMIT])
+        if len(days) == 0:
+            return
+
+        _LOGGER.debug('Loading again %s days with estimated, missing or recent statistics for mode %s...',
+                      len(days), mode.name)
+        loaded_days = []
+        try:
+            for day in days:
+                loaded_days.append((day, self.client.get_statistics(
+                    self.data[CONF_SELECTED_METER_ID], dt_util.as_local(dt_util.utc_from_timestamp(day)), mode
+                )))
+                self.requested_days += 1
+        except EnergaDeadlineExceededError:
+            self.deadline_exceeded = True
+        except EnergaClientError as error:
+            _LOGGER.error("There was an error when loading the days again: %s.", error)
+            self.errors.append(error)
+
+        changed_days = []
+        for day, historical_data in loaded_days:
+            content_hash = historical_data.content_hash
+            if (day not in missing_days and day not in estimated_days
+                    and self.day_hashes.get(mode, day) == content_hash):
+                # Energa returned exactly the same data as before - nothing to compare with the recorder
+                continue
+            self.day_hashes.set(mode, day, content_hash)
+            changed_days.append((day, historical_data))
+            if day in missing_days:
+                self.verified_days.add(mode, day)
+            if not any(historical_data.estimated):
+                self.estimates.remove(mode, day)
+        self.rebaser.rebase(mode, statistic_ids, self._group_days(zones, changed_days))
+        if revalidated_days.issubset(day for day, _ in loaded_days):
+            self.day_hashes.mark_revalidated(mode, int(today.timestamp()))
+
+    @staticmethod
+    def _group_days(zones: [str], days: list[tuple[int, EnergaStatisticsData]]) \
+            -> list[tuple[tuple[datetime, datetime], dict[str, dict[float, float]]]]:
+        """
+        Joins the consecutive days into periods with the values of every zone (by the timestamp of the hour),
+        so every period is read from the recorder and adjusted only once.
+        """
+        periods = []
+        for day, historical_data in days:
+            day_start = dt_util.as_local(dt_util.utc_from_timestamp(day))
+            day_end = dt_util.start_of_local_day(day_start + timedelta(days=1))
+            if len(periods) == 0 or periods[-1][0][1] != day_start:
+                periods.append(((day_start, day_end), {zone: {} for zone in zones}))
+            (period_start, _), values = periods[-1]
+            periods[-1] = ((period_start, day_end), values)
+            EnergaDataUpdater._collect_values(historical_data, (day_start, day_end), values)
+        return periods
+
+    @staticmethod
+    def _collect_values(historical_data: EnergaStatisticsData, period: tuple[datetime, datetime],
+                        values: dict[str, dict[float, float]]) -> None:
+        """
+        Adds the values of the points in the period to the values of every zone (by the timestamp of the hour).
+        The zones missing in the response are skipped, so their saved hours are kept instead of being zeroed.
+        """
+        timestamps = historical_data.timestamps
+        first = bisect.bisect_left(timestamps, period[0].timestamp())
+        last = bisect.bisect_left(timestamps, period[1].timestamp())
+        for zone, zone_values in values.items():
+            if zone not in historical_data.zones:
+                continue
+            zone_values.update(zip(timestamps[first:last], historical_data.get_values(zone)[first:last]))
+
+    def _load_coverage(self, statistic_ids: [str]) -> None:
+        """Builds the index of the saved hours with a single query for all statistics that are not indexed yet"""
+        not_loaded = {statistic_id for statistic_id in statistic_ids if not self.coverage.is_loaded(statistic_id)}
+        if len(not_loaded) == 0:
+            return
+        days_to_load = self.data.get(CONF_NUMBER_OF_DAYS_TO_LOAD) or PREVIOUS_DAYS_NUMBER_TO_BE_LOADED
+        since = self._find_finishing_point() - timedelta(days=days_to_load + 1)
+        rows = statistics_during_period(self.hass, since, None, not_loaded, 'hour', None, {'state'})
+        for statistic_id in not_loaded:
+            self.coverage.load(statistic_id, (row['start'] for row in rows.get(statistic_id, [])))
+
+    def _import(self, mode: EnergaStatsModes, statistics: dict[str, list[StatisticData]]) -> None:
+        """Hands the statistics over to the sink and marks their hours as saved"""
+        if self.statistics_sink:
+            self.statistics_sink(mode, statistics)
+        for zone, zone_statistics in statistics.items():
+            self.coverage.mark(self._get_statistic_id(mode, zone), (row['start'] for row in zone_statistics))
+
+    def _get_statistic_id(self, mode: EnergaStatsModes, zone: str) -> str:
+        """The ID of the statistic of the zone in the mode"""
+        return generate_entity_name(self.data[CONF_SELECTED_METER_NUMBER], generate_stats_base_entity_name(mode, zone))
 
-        return statistics
+    def _commit(self, mode: EnergaStatsModes, statistics: dict[str, list[StatisticData]],
+                saved: dict[str, int]) -> None:
+        """Hands the summed statistics over to the sink and starts collecting the next batch"""
+        if not any(statistics.values()):
+            return
+        self._import(mode, {zone: list(zone_statistics) for zone, zone_statistics in statistics.items()})
+        for zone, zone_statistics in statistics.items():
+            saved[zone] += len(zone_statistics)
+            zone_statistics.clear()
 
     @staticmethod
-    def _process_point_as_statistic(
-            point: EnergaHistoricalPoint, point_date: datetime, zones: [str], previous_results, statistics
-    ):
-        """Processes the point as a new statistic to save"""
+    def _process_day_as_statistics(historical_data: EnergaStatisticsData, first_new_point: int, zones: [str],
+                                   previous_results, statistics):
+        """Processes the new points of the day as new statistics to save, zone by zone"""
+        dates = historical_data.get_dates(first_new_point)
         for zone in zones:
-            point_value = point.get_value_for_zone(zone)
-            current_sum = previous_results.get(zone, 0) + point_value
-            statistic = StatisticData(start=point_date, sum=current_sum, state=point_value)
+            if zone not in historical_data.zones:
+                continue
+            current_sum = previous_results.get(zone, 0)
+            zone_statistics = statistics[zone]
+            for point_date, point_value in zip(dates, historical_data.get_values(zone)[first_new_point:]):
+                current_sum += point_value
+                zone_statistics.append(StatisticData(start=point_date, sum=current_sum, state=point_value))
             previous_results[zone] = current_sum
-            statistics[zone].append(statistic)
 
     def _get_previous_execution(self, zones: [str], mode: EnergaStatsModes):
         """Returns the context of the last processed execution"""
@@ -171,8 +421,7 @@ class EnergaDataUpdater:
         previous_results = {}
         statistics = {}
         for zone in zones:
-            stat_name = generate_entity_name(self.data[CONF_SELECTED_METER_NUMBER],
-                                             generate_stats_base_entity_name(mode, zone))
+            stat_name = self._get_statistic_id(mode, zone)
             previous_stat = get_last_statistics(self.hass, 1, stat_name, True, {"sum", "state"})
             if len(previous_stat) == 1 and len(previous_stat[stat_name]) == 1 and \
                     "sum" in previous_stat[stat_name][0] and "end" in previous_stat[stat_name][0]:
@@ -0,0 +1,40 @@
+"""
+Fingerprints of the recently downloaded days kept inside the persistent state of the entry.
+The last days are downloaded again once a day and only the ones with a different fingerprint are saved again.
+"""
+from datetime import datetime
+
+from ..energa.stats_modes import EnergaStatsModes
+
+DAY_HASHES_STORAGE_KEY = 'day_hashes'
+REVALIDATED_STORAGE_KEY = 'revalidated_on'
+
+
+class EnergaDayHashes:
+    """Keeps the fingerprints of the days (by the timestamp of their start) for every statistics mode"""
+
+    def __init__(self, state: dict):
+        self._state = state
+
+    def get(self, mode: EnergaStatsModes, day: int) -> str | None:
+        """The fingerprint of the day saved before"""
+        # The keys are strings - the state is saved as JSON
+        return self._state.get(DAY_HASHES_STORAGE_KEY, {}).get(mode.name, {}).get(str(day))
+
+    def set(self, mode: EnergaStatsModes, day: int, content_hash: str) -> None:
+        """Saves the fingerprint of the day"""
+        self._state.setdefault(DAY_HASHES_STORAGE_KEY, {}).setdefault(mode.name, {})[str(day)] = content_hash
+
+    def prune(self, oldest: datetime) -> None:
+        """Removes the fingerprints of the days older than the specified one"""
+        for hashes in self._state.get(DAY_HASHES_STORAGE_KEY, {}).values():
+            for day in [day for day in hashes if int(day) < oldest.timestamp()]:
+                del hashes[day]
+
+    def is_revalidated(self, mode: EnergaStatsModes, today: int) -> bool:
+        """Whether the last days were already downloaded again today"""
+        return self._state.get(REVALIDATED_STORAGE_KEY, {}).get(mode.name) == today
+
+    def mark_revalidated(self, mode: EnergaStatsModes, today: int) -> None:
+        """Remembers that the last days were downloaded again today"""
+        self._state.setdefault(REVALIDATED_STORAGE_KEY, {})[mode.name] = today
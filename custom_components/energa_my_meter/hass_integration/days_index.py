@@ -0,0 +1,42 @@
+"""
+Sets of days (per statistics mode) kept inside the persistent state of the entry.
+They tell which days have to be downloaded again from Energa - or which of them should not be downloaded anymore.
+"""
+from datetime import datetime
+
+from ..energa.stats_modes import EnergaStatsModes
+
+# Days that contained estimated values. They are downloaded again until Energa publishes the real data
+ESTIMATED_DAYS_STORAGE_KEY = 'estimated_days'
+# Days missing in the recorder that were already downloaded again - Energa has nothing more for them
+VERIFIED_DAYS_STORAGE_KEY = 'verified_days'
+
+
+class EnergaDaysIndex:
+    """Keeps the starts of the days (as timestamps) inside the persistent state of the entry"""
+
+    def __init__(self, state: dict, storage_key: str):
+        self._state = state
+        self._storage_key = storage_key
+
+    def days(self, mode: EnergaStatsModes) -> list[int]:
+        """The days of the mode, the oldest first"""
+        return sorted(self._state.get(self._storage_key, {}).get(mode.name, []))
+
+    def add(self, mode: EnergaStatsModes, day: datetime | int) -> None:
+        """Adds the day to the index"""
+        days = self._state.setdefault(self._storage_key, {}).setdefault(mode.name, [])
+        timestamp = day if isinstance(day, int) else int(day.timestamp())
+        if timestamp not in days:
+            days.append(timestamp)
+
+    def remove(self, mode: EnergaStatsModes, day: int) -> None:
+        """Removes the day from the index"""
+        days = self._state.get(self._storage_key, {}).get(mode.name, [])
+        if day in days:
+            days.remove(day)
+
+    def prune(self, oldest: datetime) -> None:
+        """Removes the days older than the specified one"""
+        for mode_name, days in self._state.get(self._storage_key, {}).items():
+            self._state[self._storage_key][mode_name] = [day for day in days if day >= oldest.timestamp()]
@@ -2,26 +2,47 @@
 The implementation of the DataUpdateCoordinator in Home Assistant - an entity that asynchronously loads the data for
 multiple types of sensors.
 """
+import functools
 import logging
-from datetime import timedelta
+import time
+from datetime import datetime, timedelta
 
 from homeassistant.components.recorder.models import StatisticData
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.recorder import get_instance
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
+from .chunk_size import EnergaChunkSizeTuner
+from .coverage_index import EnergaCoverageIndex
 from .data_updater import EnergaDataUpdater
-from ..const import CONF_SELECTED_MODES
+from .day_hashes import EnergaDayHashes
+from .days_index import EnergaDaysIndex, ESTIMATED_DAYS_STORAGE_KEY, VERIFIED_DAYS_STORAGE_KEY
+from .entry_store import EnergaEntryStore
+from .statistics_queue import EnergaStatisticsQueue, EnergaStatisticsAdjustment
+from .statistics_rebaser import StatisticsSink, AdjustmentsSink
+from ..const import CONF_SELECTED_MODES, REFRESH_DEADLINE_SECONDS, DOMAIN, ESTIMATED_DAYS_TRACKING_PERIOD, \
+    REVALIDATION_DAYS, CONF_NUMBER_OF_DAYS_TO_LOAD, PREVIOUS_DAYS_NUMBER_TO_BE_LOADED
+from ..energa.circuit_breaker import get_circuit_breaker
 from ..energa.client import EnergaMyMeterClient
-from ..energa.data import EnergaMeterReading
+from ..energa.const import ENERGA_MY_METER_HOST
+from ..energa.data import EnergaData, EnergaMeterReading
+from ..energa.errors import EnergaMyMeterAuthorizationError, EnergaWebsiteUnavailableError
 from ..energa.stats_modes import EnergaStatsModes
+from ..energa.timeouts import EnergaDeadline
 
 _LOGGER = logging.getLogger(__name__)
 
 STATISTICS_DATA_KEY_NAME = 'stats'
 MAIN_DATA_KEY_NAME = 'main'
+# The account data of the last refresh is kept in the entry store, so it is available right after the restart
+MAIN_DATA_STORAGE_KEY = 'main_data'
+# Sent (with the mode and the zone) when new statistics are waiting in the queue of the entry
+STATISTICS_QUEUED_SIGNAL = f'{DOMAIN}_statistics_queued_{{entry_id}}'
 
 
 class EnergaCoordinator(DataUpdateCoordinator):
@@ -34,15 +55,98 @@ class EnergaCoordinator(DataUpdateCoordinator):
             entry: ConfigEntry,
     ):
         self.entry = entry
+        self.store = EnergaEntryStore(hass, entry.entry_id)
+        self.statistics_queue = EnergaStatisticsQueue()
+        self.coverage = EnergaCoverageIndex()
         self._skip_stats_update = False
+        self._unsub_probe = None
+        # The session of the quick refresh (without the statistics), kept for the statistics refresh right after it
+        self._session: EnergaMyMeterClient | None = None
         super().__init__(hass, _LOGGER, name="Energa My Meter", update_interval=timedelta(minutes=polling_interval))
 
     async def _async_update_data(self) -> dict:
         """Refreshing the data event"""
         hass_data = dict(self.entry.data)
-        return await get_instance(self.hass).async_add_executor_job(
-            self.refresh_data, hass_data, self.hass, self._skip_stats_update
-        )
+        keep_session = self._skip_stats_update
+        client, self._session = self._session or EnergaMyMeterClient(), None
+        # The sensors take their statistics as soon as they are queued, so whatever is left since the previous refresh
+        # has no sensor to import it (it is disabled or was never added) - the days missing in the recorder are loaded
+        # again once the sensor is there
+        self.statistics_queue.clear()
+        try:
+            # The recorder executor does not pass keyword arguments on
+            result = await get_instance(self.hass).async_add_executor_job(functools.partial(
+                self.refresh_data, hass_data, self.hass, self._skip_stats_update, self.store.data,
+                self.queue_statistics, self.queue_adjustment, coverage=self.coverage, client=client,
+                keep_connection=keep_session
+            ))
+        except Exception as error:
+            # The session of a failed refresh is not kept - the next refresh logs in again
+            await self.hass.async_add_executor_job(client.disconnect)
+            if isinstance(error, EnergaWebsiteUnavailableError):
+                raise UpdateFailed(str(error)) from error
+            raise
+        finally:
+            self._schedule_probe(hass_data[CONF_USERNAME])
+        if keep_session:
+            self._session = client
+        self.store.data[MAIN_DATA_STORAGE_KEY] = result[MAIN_DATA_KEY_NAME].as_dict()
+        await self.store.async_save()
+        return result
+
+    def load_warm_data(self) -> bool:
+        """
+        Uses the account data saved during the last refresh before the first refresh after the restart.
+        Returns False when there is nothing saved yet.
+        """
+        saved = self.store.data.get(MAIN_DATA_STORAGE_KEY)
+        if not saved:
+            return False
+        self.data = {MAIN_DATA_KEY_NAME: EnergaData.from_dict(saved), STATISTICS_DATA_KEY_NAME: {}}
+        return True
+
+    def load_empty_data(self) -> None:
+        """Starts without any account data - the sensors stay unavailable until the first refresh"""
+        self.data = {MAIN_DATA_KEY_NAME: EnergaData({'meter_readings': []}), STATISTICS_DATA_KEY_NAME: {}}
+
+    async def async_shutdown(self) -> None:
+        """Cancel the scheduled probe together with the coordinator"""
+        await super().async_shutdown()
+        self.statistics_queue.clear()
+        if self._session:
+            session, self._session = self._session, None
+            await self.hass.async_add_executor_job(session.disconnect)
+        if self._unsub_probe:
+            self._unsub_probe()
+            self._unsub_probe = None
+
+    def _schedule_probe(self, username: str) -> None:
+        """
+        When the Energa website is down, requests fail fast until the circuit breaker allows a probe.
+        The probe refresh is scheduled right at that moment, instead of waiting for the whole update interval.
+        """
+        if self._unsub_probe:
+            self._unsub_probe()
+            self._unsub_probe = None
+        delay = get_circuit_breaker(ENERGA_MY_METER_HOST, username).seconds_until_probe()
+        if delay is not None:
+            _LOGGER.debug('The Energa website is down. Scheduling a probe refresh in %.0fs', delay)
+            self._unsub_probe = async_call_later(self.hass, delay, self._async_probe)
+
+    async def _async_probe(self, _now) -> None:
+        """Refreshes the data after the Energa website was down"""
+        self._unsub_probe = None
+        await self.async_request_refresh()
+
+    @callback
+    def async_set_polling_interval(self, polling_interval: int) -> None:
+        """Changes the update interval, moving the already scheduled refresh to the new interval"""
+        if self.update_interval == timedelta(minutes=polling_interval):
+            return
+        _LOGGER.debug('Changing the update interval to %s minutes', polling_interval)
+        self.update_interval = timedelta(minutes=polling_interval)
+        if self._unsub_refresh:
+            self._schedule_refresh()
 
     def set_stats_skipping(self, should_skip: bool) -> None:
         """Skip stats update"""
@@ -52,34 +156,93 @@ class EnergaCoordinator(DataUpdateCoordinator):
         """Returns the data gathered from Energa"""
         return self.data.get(MAIN_DATA_KEY_NAME, {})
 
-    def get_statistics(self):
-        """Returns the statistics about the sensors"""
+    def get_statistics(self) -> dict[str, dict[str, int]]:
+        """Returns the number of statistics saved during the last refresh, for every mode and zone"""
         return self.data.get(STATISTICS_DATA_KEY_NAME, {})
 
     def get_specific_statistic(self, mode: EnergaStatsModes, zone: str) -> [StatisticData]:
-        """Returns the statistics for a specific zone in a specific mode"""
-        return self.data.get(STATISTICS_DATA_KEY_NAME, {}).get(mode.name, {}).get(zone, [])
+        """Returns the statistics for a specific zone in a specific mode that are still waiting to be imported"""
+        return self.statistics_queue.peek(mode, zone)
+
+    def queue_statistics(self, mode: EnergaStatsModes, statistics: dict[str, list[StatisticData]]) -> None:
+        """
+        Hands the statistics loaded so far over to the sensors.
+        Called from the executor thread while the refresh is still running.
+        """
+        signal = STATISTICS_QUEUED_SIGNAL.format(entry_id=self.entry.entry_id)
+        for zone, zone_statistics in statistics.items():
+            if len(zone_statistics) == 0:
+                continue
+            self.statistics_queue.put(mode, zone, zone_statistics)
+            dispatcher_send(self.hass, signal, mode, zone)
+
+    def queue_adjustment(self, mode: EnergaStatsModes, zone: str, start: datetime, sum_adjustment: float) -> None:
+        """
+        Hands the change of the sums starting at the specified moment over to the sensor.
+        Called from the executor thread while the refresh is still running.
+        """
+        self.statistics_queue.put_adjustment(mode, zone, EnergaStatisticsAdjustment(start, sum_adjustment))
+        dispatcher_send(self.hass, STATISTICS_QUEUED_SIGNAL.format(entry_id=self.entry.entry_id), mode, zone)
 
     def get_meter_readings(self) -> [EnergaMeterReading]:
         """Returns a list of readings for all meters"""
         return self.get_data().meter_readings
 
     @staticmethod
-    def refresh_data(hass_data, hass: HomeAssistant, skip_stats: bool = False) -> dict:
-        """Sync task to get the data from Energa My Meter"""
+    def refresh_data(hass_data, hass: HomeAssistant, skip_stats: bool = False, entry_state: dict = None,
+                     statistics_sink: StatisticsSink | None = None,
+                     adjustments_sink: AdjustmentsSink | None = None,
+                     *, coverage: EnergaCoverageIndex | None = None, client: EnergaMyMeterClient | None = None,
+                     keep_connection: bool = False) -> dict:
+        """
+        Sync task to get the data from Energa My Meter.
+        An already connected client is used without logging in again (unless its session has expired)
+        and the connection is left open when it should be kept for the next refresh.
+        """
         _LOGGER.info('Refreshing Energa data...')
-        energa = EnergaMyMeterClient()
-        updater = EnergaDataUpdater(energa, hass_data, hass)
-        energa.open_connection(hass_data[CONF_USERNAME], hass_data[CONF_PASSWORD])
-        main_data = updater.gather_basic_data()
+        entry_state = entry_state if entry_state is not None else {}
+        chunk_size = EnergaChunkSizeTuner(entry_state)
+        estimates = EnergaDaysIndex(entry_state, ESTIMATED_DAYS_STORAGE_KEY)
+        estimates.prune(dt_util.start_of_local_day() - timedelta(days=ESTIMATED_DAYS_TRACKING_PERIOD))
+        EnergaDayHashes(entry_state).prune(dt_util.start_of_local_day() - timedelta(days=REVALIDATION_DAYS))
+        # The gaps are looked for only within the days to load, the days before them do not need to be remembered
+        EnergaDaysIndex(entry_state, VERIFIED_DAYS_STORAGE_KEY).prune(dt_util.start_of_local_day() - timedelta(
+            days=(hass_data.get(CONF_NUMBER_OF_DAYS_TO_LOAD) or PREVIOUS_DAYS_NUMBER_TO_BE_LOADED) + 1
+        ))
+        energa = client if client is not None else EnergaMyMeterClient()
+        energa.set_deadline(EnergaDeadline(REFRESH_DEADLINE_SECONDS))
+        updater = EnergaDataUpdater(energa, hass_data, hass, chunk_size.size, statistics_sink,
+                                    adjustments_sink=adjustments_sink, state=entry_state, coverage=coverage)
+        main_data = None
+        if energa.is_connected:
+            try:
+                main_data = updater.gather_basic_data()
+            except EnergaMyMeterAuthorizationError:
+                _LOGGER.debug('The session kept since the previous refresh has expired. Logging in again...')
+        if main_data is None:
+            energa.open_connection(hass_data[CONF_USERNAME], hass_data[CONF_PASSWORD])
+            main_data = updater.gather_basic_data()
         statistics = {}
 
         selected_modes = hass_data[CONF_SELECTED_MODES]
         if not skip_stats:
+            started = time.monotonic()
             for mode in selected_modes:
                 statistics[mode] = updater.gather_stats(EnergaStatsModes[mode])
-
-        energa.disconnect()
+                if updater.deadline_exceeded:
+                    break
+                # Only after the new statistics are queued, so the adjustments include them as well
+                updater.reload_days(EnergaStatsModes[mode])
+                for zone, count in updater.backfill_history(EnergaStatsModes[mode]).items():
+                    statistics[mode][zone] = statistics[mode].get(zone, 0) + count
+            if updater.errors or updater.deadline_exceeded:
+                chunk_size.record_failure()
+            else:
+                chunk_size.record_success(updater.chunk_exhausted, updater.requested_days,
+                                          time.monotonic() - started)
+
+        if not keep_connection:
+            energa.disconnect()
         return {
             MAIN_DATA_KEY_NAME: main_data,
             STATISTICS_DATA_KEY_NAME: statistics
@@ -0,0 +1,37 @@
+"""
+Persistent state of a config entry that has to survive Home Assistant restarts,
+but is not a part of the configuration (like the progress of loading the statistics).
+"""
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from ..const import DOMAIN
+
+STORAGE_VERSION = 1
+
+
+class EnergaEntryStore:
+    """Simple wrapper of the Home Assistant storage, keeping one JSON document per config entry"""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str):
+        self._store: Store[dict[str, Any]] = Store(hass, STORAGE_VERSION, f'{DOMAIN}.{entry_id}')
+        self._data: dict[str, Any] = {}
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """The stored state. It can be modified in place and persisted with async_save"""
+        return self._data
+
+    async def async_load(self) -> None:
+        """Loads the state saved during the previous run"""
+        self._data = await self._store.async_load() or {}
+
+    async def async_save(self) -> None:
+        """Persists the current state"""
+        await self._store.async_save(self._data)
+
+    async def async_remove(self) -> None:
+        """Removes the stored state when the entry is removed"""
+        await self._store.async_remove()
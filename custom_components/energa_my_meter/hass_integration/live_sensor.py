@@ -3,9 +3,9 @@
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.energa_my_meter import EnergaCoordinator
-from custom_components.energa_my_meter.energa.data import EnergaData
-from custom_components.energa_my_meter.hass_integration.base_sensor import EnergaBaseSensor
+from .base_sensor import EnergaBaseSensor
+from .energa_coordinator import EnergaCoordinator
+from ..energa.data import EnergaData
 
 
 class EnergaLiveSensor(CoordinatorEntity, EnergaBaseSensor):
@@ -0,0 +1,88 @@
+"""
+Spreading the first refreshes of the entries over the Home Assistant startup.
+Without it, every entry logs in to the Energa website at the same moment, which triggers its bot protection.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from ..const import DOMAIN, STARTUP_REFRESH_WINDOW_SECONDS
+
+_LOGGER = logging.getLogger(__name__)
+
+STARTUP_SCHEDULER_DATA_KEY = f'{DOMAIN}_startup_scheduler'
+
+
+class EnergaStartupScheduler:
+    """
+    Gives every entry its own slot within the startup window - the slots are evenly spaced for all configured entries.
+    Once all scheduled refreshes have started, the slots start over, so the next entry does not wait behind them.
+    The refreshes of the entries of the same account never run at the same time, even if they take longer than a slot.
+    """
+
+    def __init__(self, hass: HomeAssistant, window: float = STARTUP_REFRESH_WINDOW_SECONDS):
+        self.hass = hass
+        self.window = window
+        self._first_slot = 0.0
+        self._slots = 0
+        self._pending = 0
+        self._account_locks: dict[str, asyncio.Lock] = {}
+
+    @callback
+    def async_schedule(self, username: str, refresh: Callable[[], Awaitable[None]]) -> CALLBACK_TYPE:
+        """Schedules the refresh in the next free slot and returns the function cancelling it"""
+        delay = self._take_slot()
+        pending = True
+
+        @callback
+        def _async_release_slot() -> None:
+            nonlocal pending
+            if pending:
+                pending = False
+                self._release_slot()
+
+        async def _async_run(_now) -> None:
+            _async_release_slot()
+            await self.async_run(username, refresh)
+
+        cancel = async_call_later(self.hass, delay, _async_run)
+
+        @callback
+        def _async_cancel() -> None:
+            _async_release_slot()
+            cancel()
+
+        return _async_cancel
+
+    async def async_run(self, username: str, refresh: Callable[[], Awaitable[None]]) -> None:
+        """Runs the refresh after all refreshes of the account started before have finished"""
+        async with self._account_locks.setdefault(username, asyncio.Lock()):
+            await refresh()
+
+    def _take_slot(self) -> float:
+        """Takes the next free slot and returns the number of seconds left until it starts"""
+        now = self.hass.loop.time()
+        if self._pending == 0:
+            self._first_slot = now
+            self._slots = 0
+        spacing = self.window / max(len(self.hass.config_entries.async_entries(DOMAIN)), 1)
+        slot = self._first_slot + self._slots * spacing
+        self._slots += 1
+        self._pending += 1
+        _LOGGER.debug('The refresh of the entry is scheduled in %.0fs', max(slot - now, 0))
+        return max(slot - now, 0)
+
+    def _release_slot(self) -> None:
+        """Marks the slot as started (or cancelled)"""
+        self._pending -= 1
+
+
+@callback
+def async_get_startup_scheduler(hass: HomeAssistant) -> EnergaStartupScheduler:
+    """Returns the scheduler shared by all entries of the integration"""
+    if STARTUP_SCHEDULER_DATA_KEY not in hass.data:
+        hass.data[STARTUP_SCHEDULER_DATA_KEY] = EnergaStartupScheduler(hass)
+    return hass.data[STARTUP_SCHEDULER_DATA_KEY]
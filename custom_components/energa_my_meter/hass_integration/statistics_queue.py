@@ -0,0 +1,63 @@
+"""
+Hand-off of the loaded statistics from the refresh (running in the executor) to the statistics sensors.
+The sensors drain their part of the queue when they import it, so nothing is kept after the import.
+The part no sensor has taken is dropped by the next refresh.
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+
+from homeassistant.components.recorder.models import StatisticData
+
+from ..energa.stats_modes import EnergaStatsModes
+
+
+@dataclass(frozen=True)
+class EnergaStatisticsAdjustment:
+    """Change of the sum of all statistics starting at (or after) the specified moment"""
+    start: datetime
+    sum_adjustment: float
+
+
+class EnergaStatisticsQueue:
+    """
+    Thread-safe statistics waiting to be imported, separately for every mode and zone.
+    The order of imports and adjustments is kept, as the adjustment has to include everything imported before it.
+    """
+
+    def __init__(self):
+        self._pending: dict[tuple[str, str], list[list[StatisticData] | EnergaStatisticsAdjustment]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, mode: EnergaStatsModes, zone: str, statistics: list[StatisticData]) -> None:
+        """Adds the statistics at the end of the queue of the mode and zone"""
+        with self._lock:
+            items = self._pending.setdefault((mode.name, zone), [])
+            if items and isinstance(items[-1], list):
+                items[-1].extend(statistics)
+            else:
+                items.append(list(statistics))
+
+    def put_adjustment(self, mode: EnergaStatsModes, zone: str, adjustment: EnergaStatisticsAdjustment) -> None:
+        """Adds the adjustment at the end of the queue of the mode and zone"""
+        with self._lock:
+            self._pending.setdefault((mode.name, zone), []).append(adjustment)
+
+    def drain(self, mode: EnergaStatsModes, zone: str) -> list[list[StatisticData] | EnergaStatisticsAdjustment]:
+        """Removes and returns everything waiting for the mode and zone, in the order it was added"""
+        with self._lock:
+            return self._pending.pop((mode.name, zone), [])
+
+    def peek(self, mode: EnergaStatsModes, zone: str) -> list[StatisticData]:
+        """Returns the statistics waiting for the mode and zone, without removing them"""
+        with self._lock:
+            return [
+                statistic
+                for item in self._pending.get((mode.name, zone), []) if isinstance(item, list)
+                for statistic in item
+            ]
+
+    def clear(self) -> None:
+        """Drops everything that was not imported"""
+        with self._lock:
+            self._pending.clear()
@@ -0,0 +1,124 @@
+"""
+Saving the statistics inserted behind (or replacing) the statistics that are already saved in the recorder.
+Every sum includes all the hours before it, so the difference caused by the saved period is applied to all
+later statistics with a single adjustment of the recorder, instead of importing all of them again.
+"""
+import logging
+from datetime import datetime, timedelta
+from typing import Callable
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .coverage_index import EnergaCoverageIndex
+from ..const import DEBUGGING_DATE_FORMAT
+from ..energa.stats_modes import EnergaStatsModes
+
+_LOGGER = logging.getLogger(__name__)
+
+# Receives the statistics of every zone of the mode, ready to be imported
+StatisticsSink = Callable[[EnergaStatsModes, dict[str, list[StatisticData]]], None]
+# Receives the change of the sum of the zone statistics starting at the specified moment
+AdjustmentsSink = Callable[[EnergaStatsModes, str, datetime, float], None]
+
+
+class EnergaStatisticsRebaser:
+    """
+    Merges the downloaded hours of the periods with the saved ones and keeps the later sums continuous.
+    The periods may be saved in any order - the differences of the earlier periods saved before are included
+    in the sums, as their adjustments may not be applied in the recorder yet.
+    """
+
+    def __init__(self, hass: HomeAssistant, coverage: EnergaCoverageIndex, statistics_sink: StatisticsSink,
+                 adjustments_sink: AdjustmentsSink | None = None):
+        self.hass = hass
+        self.coverage = coverage
+        self._statistics_sink = statistics_sink
+        self._adjustments_sink = adjustments_sink
+        # The statistic, the end of the period and the difference of every period saved so far
+        self._differences: list[tuple[str, float, float]] = []
+
+    def rebase(self, mode: EnergaStatsModes, statistic_ids: dict[str, str],
+               periods: list[tuple[tuple[datetime, datetime], dict[str, dict[float, float]]]]) -> dict[str, float]:
+        """
+        Saves the downloaded values of every zone (by the timestamp of the hour) in every period, if they differ
+        from the saved ones, then adjusts all later statistics. Returns the total differences of every zone
+        that has anything saved after the periods - the other zones are skipped.
+        All periods are read from the recorder before anything is saved, so none of the adjustments is applied yet.
+        """
+        saved_periods = [
+            (period, loaded, self._get_saved_statistics(statistic_ids, *period)) for period, loaded in periods
+        ]
+        differences = {}
+        for period, loaded, saved_statistics in saved_periods:
+            for zone, difference in self._rebase_period(mode, statistic_ids, period, loaded, saved_statistics).items():
+                differences[zone] = differences.get(zone, 0.0) + difference
+        return differences
+
+    def _rebase_period(self, mode: EnergaStatsModes, statistic_ids: dict[str, str],
+                       period: tuple[datetime, datetime], loaded: dict[str, dict[float, float]],
+                       saved_statistics: dict[str, tuple[dict[float, dict], float | None]]) -> dict[str, float]:
+        """
+        Saves the changed values of every zone in the period and returns their differences.
+        Zones with nothing saved after the period are skipped - the regular loading will take care of them.
+        """
+        start, end = period
+        differences = {}
+        for zone, statistic_id in statistic_ids.items():
+            saved, sum_before = saved_statistics[zone]
+            if sum_before is None:
+                continue
+            values = {timestamp: row['state'] or 0 for timestamp, row in saved.items()}
+            values.update(loaded.get(zone, {}))
+            differences[zone] = 0.0
+            if all(timestamp in saved and saved[timestamp]['state'] == value for timestamp, value in values.items()):
+                continue
+
+            _LOGGER.debug('The statistics between %s and %s in zone %s differ from the saved ones. Replacing them...',
+                          start.strftime(DEBUGGING_DATE_FORMAT), end.strftime(DEBUGGING_DATE_FORMAT), zone)
+            current_sum = sum_before + self.get_difference_before(statistic_id, start)
+            statistics = []
+            for timestamp in sorted(values):
+                current_sum += values[timestamp]
+                statistics.append(StatisticData(
+                    start=dt_util.as_local(dt_util.utc_from_timestamp(timestamp)), sum=current_sum,
+                    state=values[timestamp]
+                ))
+            self._statistics_sink(mode, {zone: statistics})
+
+            difference = sum(values.values()) - sum(row['state'] or 0 for row in saved.values())
+            if difference:
+                if self._adjustments_sink:
+                    self._adjustments_sink(mode, zone, end, difference)
+                self._differences.append((statistic_id, end.timestamp(), difference))
+            differences[zone] = difference
+        return differences
+
+    def get_difference_before(self, statistic_id: str, moment: datetime) -> float:
+        """The total difference of the periods of the statistic saved so far, which end before the moment"""
+        return sum(
+            difference for difference_id, end, difference in self._differences
+            if difference_id == statistic_id and end <= moment.timestamp()
+        )
+
+    def _get_saved_statistics(self, statistic_ids: dict[str, str], start: datetime,
+                              end: datetime) -> dict[str, tuple[dict[float, dict], float | None]]:
+        """
+        Returns the saved hours of the period for every zone (by the timestamp of their start)
+        together with the sum saved before the period - or None, if nothing is saved after its start.
+        """
+        next_saved = [self.coverage.next_saved_hour(statistic_id, start) for statistic_id in statistic_ids.values()]
+        query_end = max([end] + [hour + timedelta(hours=1) for hour in next_saved if hour is not None])
+        rows = statistics_during_period(
+            self.hass, start, query_end, set(statistic_ids.values()), 'hour', None, {'state', 'sum'}
+        )
+        result = {}
+        for zone, statistic_id in statistic_ids.items():
+            zone_rows = rows.get(statistic_id, [])
+            saved = {row['start']: row for row in zone_rows if row['start'] < end.timestamp()}
+            # Every sum includes the state of its hour, so the first saved hour tells the sum before it
+            sum_before = zone_rows[0]['sum'] - (zone_rows[0]['state'] or 0) if zone_rows else None
+            result[zone] = (saved, sum_before)
+        return result
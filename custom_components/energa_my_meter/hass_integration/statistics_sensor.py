@@ -4,7 +4,6 @@ As Energa does not report live data, but updates it at most once a day, simply d
 will not create a proper statistics.
 """
 import logging
-from typing import override
 
 from homeassistant.components.recorder.models import StatisticMetaData
 from homeassistant.components.recorder.statistics import async_import_statistics
@@ -12,9 +11,12 @@ from homeassistant.components.sensor import SensorStateClass, SensorDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfEnergy
 from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.recorder import get_instance
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .energa_coordinator import EnergaCoordinator
+from .energa_coordinator import EnergaCoordinator, STATISTICS_QUEUED_SIGNAL
+from .statistics_queue import EnergaStatisticsAdjustment
 from ..common import generate_stats_base_entity_name, generate_stats_display_name
 from ..energa.stats_modes import EnergaStatsModes
 from ..hass_integration.base_sensor import EnergaBaseSensor
@@ -64,12 +66,32 @@ class EnergyStatisticsSensor(CoordinatorEntity, EnergaBaseSensor):
         """Statistics method"""
         return f'{s}_statistics'
 
-    @override
+    async def async_added_to_hass(self) -> None:
+        """Starts importing the statistics handed over by the coordinator"""
+        await super().async_added_to_hass()
+        self.async_on_remove(async_dispatcher_connect(
+            self.hass,
+            STATISTICS_QUEUED_SIGNAL.format(entry_id=self.coordinator.entry.entry_id),
+            self._handle_statistics_queued
+        ))
+        self._import_pending_statistics()
+
+    @callback
+    def _handle_statistics_queued(self, mode: EnergaStatsModes, zone: str) -> None:
+        """New statistics are waiting in the queue"""
+        if mode == self._mode and zone == self._zone:
+            self._import_pending_statistics()
+
     @callback
-    def _handle_coordinator_update(self) -> None:
-        """Handles the update returned by the coordinator"""
-        _LOGGER.debug("Updating statistics gathered by the coordinator for %s...", self.entity_id)
-        stats = self.coordinator.get_specific_statistic(self._mode, self._zone)
+    def _import_pending_statistics(self) -> None:
+        """
+        Takes the statistics out of the coordinator queue and imports them, so they are not kept in memory.
+        The adjustments are applied in the same order they were queued.
+        """
+        pending = self.coordinator.statistics_queue.drain(self._mode, self._zone)
+        if len(pending) == 0:
+            _LOGGER.debug('No updates for statistics %s.', self.entity_id)
+            return
         metadata = StatisticMetaData(
             source="recorder",
             statistic_id=self.entity_id,
@@ -78,15 +100,18 @@ class EnergyStatisticsSensor(CoordinatorEntity, EnergaBaseSensor):
             has_mean=False,
             has_sum=True,
         )
-        if len(stats) > 0:
+        for item in pending:
+            if isinstance(item, EnergaStatisticsAdjustment):
+                _LOGGER.debug('Adjusting the statistics of %s starting at %s by %s...',
+                              self.entity_id, item.start, item.sum_adjustment)
+                get_instance(self.hass).async_adjust_statistics(
+                    self.entity_id, item.start, item.sum_adjustment, self._attr_unit_of_measurement
+                )
+                continue
             _LOGGER.debug(
                 "The coordinator has %s statistics for %s. Saving them as %s => %s...",
-                len(stats), self.entity_id,
+                len(item), self.entity_id,
                 metadata,
-                stats
+                item
             )
-            async_import_statistics(self.hass, metadata, stats)
-        else:
-            _LOGGER.debug('No updates for statistics %s.', self.entity_id)
-
-        super()._handle_coordinator_update()
+            async_import_statistics(self.hass, metadata, item)
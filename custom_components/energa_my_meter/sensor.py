@@ -4,7 +4,7 @@ import logging
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import DOMAIN, CONF_SELECTED_ZONES, CONF_SELECTED_MODES
@@ -32,8 +32,10 @@ async def async_setup_entry(
 
     live_sensors = get_live_sensors(config)
     stats_sensors = get_statistics_sensors(config)
-    async_add_entities(live_sensors, update_before_add=True)
-    async_add_entities(stats_sensors, update_before_add=True)
+    # The coordinator already has the data, the statistics are loaded by the refresh scheduled during the entry setup
+    async_add_entities(live_sensors)
+    async_add_entities(stats_sensors)
+    config_entry.async_on_unload(watch_new_meter_readings(config, async_add_entities))
 
 
 async def async_setup_platform(
@@ -52,8 +54,9 @@ async def async_setup_platform(
 
     live_sensors = get_live_sensors(config)
     stats_sensors = get_statistics_sensors(config)
-    async_add_entities(live_sensors, update_before_add=True)
-    async_add_entities(stats_sensors, update_before_add=True)
+    # The coordinator already has the data, the statistics are loaded by the refresh scheduled during the entry setup
+    async_add_entities(live_sensors)
+    async_add_entities(stats_sensors)
 
 
 def get_live_sensors(config: ConfigEntry) -> list[SensorEntity]:
@@ -78,6 +81,32 @@ def get_live_sensors(config: ConfigEntry) -> list[SensorEntity]:
     return result
 
 
+@callback
+def watch_new_meter_readings(config: ConfigEntry, async_add_entities: AddEntitiesCallback) -> CALLBACK_TYPE:
+    """
+    Adds the sensors of the meter readings that show up after the setup - the entry set up during the startup without
+    any saved data gets them with its first refresh
+    """
+    coordinator = config['coordinator']
+    added_readings = {reading.meter_name for reading in coordinator.get_data().get('meter_readings') or []}
+
+    @callback
+    def _async_add_new_meter_readings() -> None:
+        new_readings = [
+            reading.meter_name for reading in coordinator.get_data().get('meter_readings') or []
+            if reading.meter_name not in added_readings
+        ]
+        if len(new_readings) == 0:
+            return
+        added_readings.update(new_readings)
+        async_add_entities([
+            EnergaMeterReadingSensor(entry=config, coordinator=coordinator, reading_name=reading_name)
+            for reading_name in new_readings
+        ])
+
+    return coordinator.async_add_listener(_async_add_new_meter_readings)
+
+
 def get_statistics_sensors(config: ConfigEntry) -> list[SensorEntity]:
     """
     Prepares the list of statistics sensors that cannot be refreshed via the coordinator
@@ -0,0 +1 @@
+"""Benchmarks of the most expensive code paths of the integration"""
@@ -0,0 +1,146 @@
+"""
+End-to-end benchmark of the statistics backfill (EnergaDataUpdater.gather_stats and backfill_history).
+Runs a simulated initial load of several years of history against the fake Energa client and the fake recorder:
+the recent days are loaded first, then the history is loaded backwards.
+
+Usage (from the repository root):
+    python -m tests.benchmarks.backfill [--years 1 5 10] [--zones 1 3]
+"""
+import argparse
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import timedelta
+from unittest.mock import patch
+from zoneinfo import ZoneInfo
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.energa_my_meter.common import generate_entity_name, generate_stats_base_entity_name
+from custom_components.energa_my_meter.const import CONF_NUMBER_OF_DAYS_TO_LOAD, CONF_SELECTED_METER_ID, \
+    CONF_SELECTED_METER_NUMBER, CONF_SELECTED_ZONES
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+from custom_components.energa_my_meter.hass_integration import data_updater, statistics_rebaser
+from custom_components.energa_my_meter.hass_integration.coverage_index import EnergaCoverageIndex
+from custom_components.energa_my_meter.hass_integration.data_updater import EnergaDataUpdater
+from ..fakes import FAKE_TIMEZONE, FAKE_ZONES, FakeEnergaClient, FakeRecorder
+
+METER_NUMBER = 12345
+
+
+@dataclass
+class BackfillResult:
+    """Measurements of a single simulated backfill"""
+    years: int
+    zones: int
+    cycles: int = 0
+    requests: int = 0
+    points: int = 0
+    wall_time: float = 0.0
+    peak_memory: int = 0
+    retained_blocks: int = 0
+
+    @property
+    def points_per_second(self) -> float:
+        """Throughput of the statistics generation"""
+        return self.points / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def blocks_per_point(self) -> float:
+        """Memory blocks kept alive by the generated statistics, per statistic point"""
+        return self.retained_blocks / self.points if self.points else 0.0
+
+
+def run_backfill(days: int, zones_count: int, trace_memory: bool = False, max_cycles: int = 1000) -> BackfillResult:
+    """Runs the backfill cycles until the fake recorder holds all the data up to today"""
+    previous_time_zone = dt_util.DEFAULT_TIME_ZONE
+    dt_util.set_default_time_zone(ZoneInfo(FAKE_TIMEZONE))
+    try:
+        return _run_backfill(days, zones_count, trace_memory, max_cycles)
+    finally:
+        dt_util.set_default_time_zone(previous_time_zone)
+
+
+def _run_backfill(days: int, zones_count: int, trace_memory: bool, max_cycles: int) -> BackfillResult:
+    """The backfill loop, executed in the Energa time zone"""
+    zones = FAKE_ZONES[:zones_count]
+    now = dt_util.now()
+    client = FakeEnergaClient(now - timedelta(days=days + 1), zones=zones, now=now)
+    recorder = FakeRecorder()
+
+    def import_statistics(mode: EnergaStatsModes, statistics: dict):
+        """Imports the statistics handed over by the updater into the fake recorder"""
+        for zone, zone_statistics in statistics.items():
+            recorder.import_statistics(
+                generate_entity_name(METER_NUMBER, generate_stats_base_entity_name(mode, zone)), zone_statistics
+            )
+
+    def adjust_statistics(mode: EnergaStatsModes, zone: str, start, sum_adjustment: float):
+        """Applies the adjustment handed over by the updater to the fake recorder"""
+        recorder.adjust_statistics(
+            generate_entity_name(METER_NUMBER, generate_stats_base_entity_name(mode, zone)), start, sum_adjustment
+        )
+
+    # Kept between the cycles, like the coordinator does
+    state = {}
+    coverage = EnergaCoverageIndex()
+    result = BackfillResult(years=days // 365, zones=zones_count)
+
+    if trace_memory:
+        tracemalloc.start()
+
+    with (
+        patch.object(data_updater, 'get_last_statistics', recorder.get_last_statistics),
+        patch.object(statistics_rebaser, 'statistics_during_period', recorder.statistics_during_period)
+    ):
+        while result.cycles < max_cycles:
+            result.cycles += 1
+            cycle_points = 0
+            updater = EnergaDataUpdater(client, {
+                CONF_SELECTED_METER_NUMBER: METER_NUMBER,
+                CONF_SELECTED_METER_ID: 1,
+                CONF_SELECTED_ZONES: zones,
+                CONF_NUMBER_OF_DAYS_TO_LOAD: days,
+            }, None, statistics_sink=import_statistics, adjustments_sink=adjust_statistics, state=state,
+                coverage=coverage)
+            for mode in EnergaStatsModes:
+                snapshot = tracemalloc.take_snapshot() if trace_memory else None
+                started = time.perf_counter()
+                saved = updater.gather_stats(mode)
+                backfilled = updater.backfill_history(mode)
+                result.wall_time += time.perf_counter() - started
+                if snapshot:
+                    diff = tracemalloc.take_snapshot().compare_to(snapshot, 'filename')
+                    result.retained_blocks += sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+                cycle_points += sum(saved.values()) + sum(backfilled.values())
+            result.points += cycle_points
+            if cycle_points == 0:
+                break
+
+    if trace_memory:
+        result.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    result.requests = client.requests
+    return result
+
+
+def main():
+    """Runs the benchmark matrix and prints the results"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--zones', type=int, nargs='+', default=[1, len(FAKE_ZONES)])
+    args = parser.parse_args()
+
+    print(f'{"years":>5} {"zones":>5} {"cycles":>6} {"requests":>8} {"points":>9} {"wall [s]":>9} '
+          f'{"points/s":>10} {"peak [MiB]":>10} {"blocks/point":>12}')
+    for years in args.years:
+        for zones in args.zones:
+            timed = run_backfill(years * 365, zones)
+            traced = run_backfill(years * 365, zones, trace_memory=True)
+            print(f'{years:>5} {zones:>5} {timed.cycles:>6} {timed.requests:>8} {timed.points:>9} '
+                  f'{timed.wall_time:>9.2f} {timed.points_per_second:>10.0f} '
+                  f'{traced.peak_memory / 1024 / 1024:>10.1f} {traced.blocks_per_point:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
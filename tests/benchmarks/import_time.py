@@ -0,0 +1,102 @@
+"""
+Benchmark of the time the integration adds to the Home Assistant startup by importing its modules.
+Every run imports the integration in a fresh interpreter with `python -X importtime`, after the Home Assistant
+modules that are loaded during the startup anyway - so only the integration and the libraries it pulls in are counted.
+
+Usage (from the repository root):
+    python -m tests.benchmarks.import_time [--runs 5] [--top 10]
+"""
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+INTEGRATION_PACKAGE = 'custom_components.energa_my_meter'
+# The modules Home Assistant loads when setting up the integration (the package, its platforms and the config flow)
+INTEGRATION_MODULES = [INTEGRATION_PACKAGE, f'{INTEGRATION_PACKAGE}.sensor', f'{INTEGRATION_PACKAGE}.config_flow']
+# Loaded by Home Assistant before the integration (and by other integrations), so they are not counted
+BASELINE_MODULES = [
+    'homeassistant.core',
+    'homeassistant.config_entries',
+    'homeassistant.helpers.config_validation',
+    'homeassistant.helpers.selector',
+    'homeassistant.helpers.update_coordinator',
+    'homeassistant.components.sensor',
+    'homeassistant.components.recorder.statistics',
+]
+# Libraries needed only to talk to the Energa website, which should be imported with the first refresh
+HEAVY_MODULES = ['mechanize', 'lxml']
+# Printed between the baseline and the integration imports
+_MARKER = 'import time: baseline loaded'
+REPOSITORY_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class ImportTimeResult:
+    """The import times (in microseconds) of the modules loaded by importing the integration"""
+    cumulative: int = 0
+    own: int = 0
+    modules: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def heavy_modules(self) -> list[str]:
+        """The heavy libraries loaded together with the integration"""
+        return sorted({name.split('.')[0] for name in self.modules} & set(HEAVY_MODULES))
+
+    def top(self, count: int) -> list[tuple[str, int]]:
+        """The dependencies taking the most time to import (excluding the integration modules)"""
+        dependencies = [(name, time) for name, time in self.modules.items() if not name.startswith(INTEGRATION_PACKAGE)]
+        return sorted(dependencies, key=lambda item: item[1], reverse=True)[:count]
+
+
+def measure_import_time() -> ImportTimeResult:
+    """Imports the integration in a new interpreter and sums the import times it reports"""
+    code = '; '.join(
+        [f'import {module}' for module in BASELINE_MODULES]
+        + ['import sys', f'print({_MARKER!r}, file=sys.stderr)']
+        + [f'import {module}' for module in INTEGRATION_MODULES]
+    )
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=REPOSITORY_ROOT, capture_output=True, text=True, check=True
+    )
+    output = process.stderr.splitlines()
+    result = ImportTimeResult()
+    # Every module is reported after its dependencies, the ones imported directly are not indented
+    for line in output[output.index(_MARKER) + 1:]:
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = _parse_line(line)
+        result.modules[name.strip()] = own
+        if name.strip().startswith(INTEGRATION_PACKAGE):
+            result.own += own
+        if not name.startswith(' '):
+            result.cumulative += cumulative
+    return result
+
+
+def _parse_line(line: str) -> tuple[int, int, str]:
+    """Splits the line of `-X importtime` output into the self time, cumulative time and the (indented) module"""
+    own, cumulative, name = line.removeprefix('import time:').split('|')
+    return int(own), int(cumulative), name[1:]
+
+
+def main():
+    """Runs the benchmark several times and prints the fastest run"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    result = min((measure_import_time() for _ in range(args.runs)), key=lambda run: run.cumulative)
+    print(f'integration total: {result.cumulative / 1000:>8.1f} ms')
+    print(f'integration own:   {result.own / 1000:>8.1f} ms')
+    print(f'heavy modules:     {", ".join(result.heavy_modules) or "none"}')
+    print('slowest dependencies:')
+    for name, time in result.top(args.top):
+        print(f'  {time / 1000:>8.1f} ms  {name}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,20 @@
+"""Smoke tests keeping the backfill benchmark harness working"""
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+from .backfill import run_backfill
+
+
+def test_backfill_harness_loads_the_whole_history():
+    """A short simulated backfill should load every hour of every selected zone in several cycles"""
+    result = run_backfill(days=75, zones_count=2)
+
+    assert result.cycles > 1
+    assert result.points >= 75 * 24 * 2 * len(EnergaStatsModes)
+    assert result.points_per_second > 0
+
+
+def test_backfill_harness_measures_memory():
+    """Tracing the memory should report the peak usage of the backfill"""
+    result = run_backfill(days=5, zones_count=1, trace_memory=True)
+
+    assert result.peak_memory > 0
+    assert result.blocks_per_point > 0
@@ -0,0 +1,11 @@
+"""Smoke tests keeping the import time benchmark working"""
+from .import_time import measure_import_time, INTEGRATION_PACKAGE
+
+
+def test_integration_import_does_not_load_the_website_libraries():
+    """Importing the integration should be measured and should not load the libraries used only for the requests"""
+    result = measure_import_time()
+
+    assert result.cumulative >= result.own > 0
+    assert INTEGRATION_PACKAGE in result.modules
+    assert not result.heavy_modules
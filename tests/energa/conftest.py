@@ -1,10 +1,17 @@
 """pytest fixtures."""
 
+import json
 from pathlib import Path
 
 import pytest
 from lxml import etree
 
+from custom_components.energa_my_meter.energa.circuit_breaker import _CIRCUIT_BREAKERS
+from custom_components.energa_my_meter.energa.rate_limiter import _RATE_LIMITERS
+from custom_components.energa_my_meter.energa.request_budget import _REQUEST_BUDGETS
+from custom_components.energa_my_meter.energa.timeouts import get_endpoint_timeouts
+from ..fakes import FakeClock
+
 TEST_DATA_DIR = Path(__file__).resolve().parent / 'data'
 
 
@@ -42,3 +49,30 @@ def account_data_html():
 def error_html():
     """Fixture providing the HTML with the account data example"""
     return etree.parse(TEST_DATA_DIR / 'error.html', etree.HTMLParser())
+
+
+@pytest.fixture
+def stats_consumed_one_zone_json():
+    """Fixture providing the statistics of a single zone returned by the Energa chart endpoint"""
+    with open(TEST_DATA_DIR / 'stats_consumed_one_zone.json', encoding='utf-8') as file:
+        return json.load(file)
+
+
+@pytest.fixture(name='clock')
+def clock_fixture() -> FakeClock:
+    """Fixture providing the manually controlled time for the pacing, circuit breakers and budget of the requests"""
+    return FakeClock()
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limiters():
+    """Every test starts with fresh pacing, budgets, circuit breakers and timeouts, so no test affects another"""
+    _RATE_LIMITERS.clear()
+    _REQUEST_BUDGETS.clear()
+    _CIRCUIT_BREAKERS.clear()
+    get_endpoint_timeouts().clear()
+    yield
+    _RATE_LIMITERS.clear()
+    _REQUEST_BUDGETS.clear()
+    _CIRCUIT_BREAKERS.clear()
+    get_endpoint_timeouts().clear()
@@ -0,0 +1,126 @@
+"""Tests of retrying the failed requests and failing fast while the Energa website is down"""
+from http.client import IncompleteRead
+from unittest.mock import patch
+from urllib.error import URLError
+
+import pytest
+from mechanize import Browser
+
+from custom_components.energa_my_meter.energa.circuit_breaker import EnergaCircuitBreaker, EnergaCircuitState
+from custom_components.energa_my_meter.energa.connector import EnergaWebsiteConnector
+from custom_components.energa_my_meter.energa.const import ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD, \
+    ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT, ENERGA_REQUESTS_ATTEMPTS
+from custom_components.energa_my_meter.energa.errors import EnergaWebsiteUnavailableError, EnergaWebsiteLoadingError, \
+    EnergaDeadlineExceededError
+from custom_components.energa_my_meter.energa.timeouts import EnergaDeadline
+from ..fakes import FakeClock
+
+
+def open_breaker(breaker: EnergaCircuitBreaker):
+    """Records enough failures to open the breaker"""
+    for _ in range(ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD):
+        breaker.before_request()
+        breaker.record_failure()
+
+
+def test_breaker_should_open_after_consecutive_failures(clock: FakeClock):
+    """Too many failures in a row should block the requests until the reset timeout passes"""
+    breaker = EnergaCircuitBreaker(clock=clock)
+    open_breaker(breaker)
+
+    assert breaker.state == EnergaCircuitState.OPEN
+    assert breaker.seconds_until_probe() == ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+    with pytest.raises(EnergaWebsiteUnavailableError):
+        breaker.before_request()
+
+
+def test_breaker_should_allow_a_single_probe_after_the_reset_timeout(clock: FakeClock):
+    """After the timeout only one probe is sent; its result closes the breaker or opens it for longer"""
+    breaker = EnergaCircuitBreaker(clock=clock)
+    open_breaker(breaker)
+    clock.now += ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+
+    breaker.before_request()
+    assert breaker.state == EnergaCircuitState.HALF_OPEN
+    with pytest.raises(EnergaWebsiteUnavailableError):
+        breaker.before_request()
+
+    breaker.record_failure()
+    assert breaker.seconds_until_probe() == ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT * 2
+
+    clock.now += ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT * 2
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == EnergaCircuitState.CLOSED
+    assert breaker.seconds_until_probe() is None
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+@patch(target='custom_components.energa_my_meter.energa.connector.random.uniform', return_value=0)
+def test_transient_errors_should_be_retried(_uniform_mock, browser_mock):
+    """A single connection error should not fail the whole request"""
+    browser_mock.open.side_effect = [URLError('timed out'), None]
+    connector = EnergaWebsiteConnector()
+    connector.browser = browser_mock
+
+    assert connector._send('https://example.com') is None  # pylint: disable=protected-access
+    assert browser_mock.open.call_count == 2
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+@patch(target='custom_components.energa_my_meter.energa.connector.random.uniform', return_value=0)
+@patch(target='custom_components.energa_my_meter.energa.rate_limiter.EnergaRateLimiter.acquire')
+def test_website_down_should_fail_fast(_acquire_mock, _uniform_mock, browser_mock):
+    """After the breaker opens, no more requests should be sent to the website"""
+    browser_mock.open.side_effect = URLError('connection refused')
+    connector = EnergaWebsiteConnector()
+    connector.browser = browser_mock
+
+    for _ in range(ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD):
+        try:
+            connector.open_account_page()
+        except EnergaWebsiteLoadingError:
+            pass
+    sent_requests = browser_mock.open.call_count
+    assert sent_requests <= ENERGA_CIRCUIT_BREAKER_FAILURES_THRESHOLD * ENERGA_REQUESTS_ATTEMPTS
+
+    with pytest.raises(EnergaWebsiteUnavailableError):
+        connector.open_account_page()
+    assert browser_mock.open.call_count == sent_requests
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+def test_probe_not_sent_because_of_the_deadline_should_not_block_the_breaker(browser_mock, clock: FakeClock):
+    """When the deadline stops the probe before it is sent, the next request becomes the probe"""
+    breaker = EnergaCircuitBreaker(clock=clock)
+    open_breaker(breaker)
+    clock.now += ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+    connector = EnergaWebsiteConnector(circuit_breaker=breaker)
+    connector.browser = browser_mock
+    connector.deadline = EnergaDeadline(0)
+
+    with pytest.raises(EnergaDeadlineExceededError):
+        connector._send('https://example.com')  # pylint: disable=protected-access
+
+    assert breaker.state == EnergaCircuitState.OPEN
+    assert breaker.seconds_until_probe() == 0
+    assert browser_mock.open.call_count == 0
+    connector.deadline = None
+    connector._send('https://example.com')  # pylint: disable=protected-access
+    assert breaker.state == EnergaCircuitState.CLOSED
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+def test_unexpected_probe_error_should_open_the_breaker_again(browser_mock, clock: FakeClock):
+    """Errors which are not network errors (like an incomplete response) are still failures of the probe"""
+    breaker = EnergaCircuitBreaker(clock=clock)
+    open_breaker(breaker)
+    clock.now += ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT
+    browser_mock.open.side_effect = IncompleteRead(b'')
+    connector = EnergaWebsiteConnector(circuit_breaker=breaker)
+    connector.browser = browser_mock
+
+    with pytest.raises(IncompleteRead):
+        connector._send('https://example.com')  # pylint: disable=protected-access
+
+    assert breaker.seconds_until_probe() == ENERGA_CIRCUIT_BREAKER_RESET_TIMEOUT * 2
@@ -102,3 +102,21 @@ def test_authenticate_when_energa_correctly_logs_in_the_user_should_not_raise_an
     connector = EnergaWebsiteConnector()
     response = connector.authenticate(username, password, browser_mock)
     assert response is not None
+
+
+def test_forked_connector_should_share_the_session():
+    """The forked connector should have its own browser, but use the cookies of the logged-in one"""
+    connector = EnergaWebsiteConnector()
+    connector.browser = EnergaWebsiteConnector._prepare_browser()  # pylint: disable=protected-access
+
+    forked = connector.fork()
+
+    assert forked.browser is not connector.browser
+    assert forked.browser.cookiejar is connector.browser.cookiejar
+
+
+def test_disconnecting_before_logging_in_should_not_raise_any_errors():
+    """The refresh failing before the login disconnects the connector without any browser"""
+    connector = EnergaWebsiteConnector()
+
+    connector.disconnect()
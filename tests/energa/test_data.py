@@ -1,5 +1,8 @@
 """Tests related to the data model"""
+import json
+
 from custom_components.energa_my_meter.energa.client import EnergaData
+from custom_components.energa_my_meter.energa.data import EnergaMeterReading, EnergaStatisticsData
 
 
 def test_converting_energa_data_from_dict():
@@ -24,3 +27,57 @@ def test_converting_energa_data_from_dict():
     assert data['ppe_number'] == result.ppe_number
     assert data['tariff'] == result.tariff
     assert data['meter_number'] == result.meter_number
+
+
+def test_statistics_timestamps_follow_the_points(stats_consumed_one_zone_json):
+    """The timestamps of the historical points are available without converting them into dates"""
+    result = EnergaStatisticsData(stats_consumed_one_zone_json['response'])
+
+    assert result.timestamps == [point.get_normalized_timestamp() for point in result.historical_points]
+    assert result.timestamps == sorted(result.timestamps)
+
+
+def test_statistics_dates_are_converted_once(stats_consumed_one_zone_json):
+    """The dates of the points are in the time zone of the statistics and are converted only when needed"""
+    result = EnergaStatisticsData(stats_consumed_one_zone_json['response'])
+
+    last_dates = result.get_dates(len(result.historical_points) - 2)
+    assert len(last_dates) == 2
+    dates = result.get_dates()
+    assert dates[-2] is last_dates[0]
+    assert dates == [point.get_date(tz=result.time_zone) for point in result.historical_points]
+    assert all(date.tzinfo == result.time_zone for date in dates)
+
+
+def test_statistics_values_are_decoded_per_zone(stats_consumed_one_zone_json):
+    """Every zone has its own column of values, the missing values (and zones) are zeros"""
+    result = EnergaStatisticsData(stats_consumed_one_zone_json['response'])
+    zone = result.zones[0]
+
+    assert list(result.get_values(zone)) == [point.get_value_for_zone(zone) for point in result.historical_points]
+    assert result.get_values(zone) is result.get_values(zone)
+    assert set(result.get_values('Unknown zone:')) == {0}
+    assert result.estimated == [point.is_estimated for point in result.historical_points]
+
+
+def test_statistics_values_of_an_unknown_zone_are_zeros(stats_consumed_one_zone_json):
+    """The values of a zone missing in the response are not taken from the values without a zone"""
+    response = stats_consumed_one_zone_json['response']
+    for point in response['mainChart']:
+        point['zones'] = point['zones'] + [5]
+    result = EnergaStatisticsData(response)
+
+    assert list(result.get_values('Unknown zone:')) == [0] * len(result.timestamps)
+
+def test_energa_data_survives_saving():
+    """The data saved as a dictionary should be restored with the same values and readings"""
+    data = EnergaData({
+        'seller': 'Some seller',
+        'meter_name': 'Meter',
+        'ppe_number': 124,
+        'meter_readings': [EnergaMeterReading('A+', '2024-01-01 10:00', 123.5)],
+    })
+
+    restored = EnergaData.from_dict(json.loads(json.dumps(data.as_dict())))
+
+    assert restored == data
@@ -0,0 +1,85 @@
+"""Tests of the command-line export of the statistics"""
+import csv
+import json
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from zoneinfo import ZoneInfo
+
+from custom_components.energa_my_meter.energa.__main__ import main
+from custom_components.energa_my_meter.energa.data import EnergaStatisticsData
+from custom_components.energa_my_meter.energa.errors import EnergaWebsiteLoadingError
+from custom_components.energa_my_meter.energa.exporter import CsvRowsWriter, EnergaExporter, EnergaExportState, \
+    EXPORT_COLUMNS
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+
+INTEGRATION_DIR = Path(__file__).resolve().parents[2] / 'custom_components' / 'energa_my_meter'
+
+
+def _export(client: MagicMock, output: Path, end: date) -> int:
+    """Exports the consumed energy of the meter 1234 from the 1st of October to the specified day"""
+    writer = CsvRowsWriter(output)
+    try:
+        exporter = EnergaExporter(client, writer, EnergaExportState(output.with_suffix('.json')), workers=2)
+        return exporter.export([1234], [EnergaStatsModes.ENERGY_CONSUMED], None, (date(2024, 10, 1), end),
+                               ZoneInfo('Europe/Warsaw'))
+    finally:
+        writer.close()
+
+
+def test_export_should_write_every_hour_and_resume_from_the_last_day(tmp_path, stats_consumed_one_zone_json):
+    """Every loaded hour is written once, and the next export loads only the days after the exported ones"""
+    client = MagicMock()
+    forked = client.fork.return_value
+    forked.get_statistics.side_effect = lambda *_args: EnergaStatisticsData(stats_consumed_one_zone_json['response'])
+    output = tmp_path / 'export.csv'
+
+    assert _export(client, output, date(2024, 10, 3)) == 3 * 24
+    assert _export(client, output, date(2024, 10, 4)) == 24
+
+    assert forked.get_statistics.call_count == 4
+    assert forked.disconnect.call_count == client.fork.call_count
+    with open(output, encoding='utf-8') as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == EXPORT_COLUMNS
+    assert len(rows) == 1 + 4 * 24
+    assert rows[1][:3] == ['1234', 'ENERGY_CONSUMED', 'Strefa całodobowa:']
+    assert json.loads(output.with_suffix('.json').read_text(encoding='utf-8')) == {'1234/ENERGY_CONSUMED': '2024-10-04'}
+
+
+def test_failed_export_should_disconnect_the_client(tmp_path, monkeypatch):
+    """The client is disconnected and the error is reported even when the export fails"""
+    monkeypatch.setenv('ENERGA_PASSWORD', 'password')
+    with patch('custom_components.energa_my_meter.energa.__main__.EnergaMyMeterClient') as client_mock:
+        client_mock.return_value.open_connection.side_effect = EnergaWebsiteLoadingError
+        exit_code = main(['--username', 'user', '--meter', '1234', '--start', '2024-10-01',
+                          '--output', str(tmp_path / 'export.csv')])
+
+    assert exit_code == 1
+    assert client_mock.return_value.disconnect.call_count == 1
+
+
+def test_missing_parquet_support_should_be_reported_before_logging_in(tmp_path, monkeypatch):
+    """Without pyarrow the export ends with an error message instead of a traceback"""
+    monkeypatch.setenv('ENERGA_PASSWORD', 'password')
+    with (
+        patch('custom_components.energa_my_meter.energa.__main__.ParquetRowsWriter',
+              side_effect=RuntimeError('Exporting to Parquet requires the pyarrow package')),
+        patch('custom_components.energa_my_meter.energa.__main__.EnergaMyMeterClient') as client_mock,
+    ):
+        exit_code = main(['--username', 'user', '--meter', '1234', '--start', '2024-10-01',
+                          '--output', str(tmp_path / 'export.parquet')])
+
+    assert exit_code == 1
+    assert client_mock.call_count == 0
+
+
+def test_exporter_should_not_need_home_assistant():
+    """The energa package should work as a standalone command-line tool"""
+    code = 'import sys, energa.__main__; sys.exit("homeassistant" in sys.modules)'
+    assert subprocess.run([sys.executable, '-c', code], cwd=INTEGRATION_DIR, check=False).returncode == 0
+    help_run = subprocess.run([sys.executable, '-m', 'energa', '--help'], cwd=INTEGRATION_DIR,
+                              capture_output=True, check=False)
+    assert help_run.returncode == 0
@@ -0,0 +1,77 @@
+"""Tests of the pacing of the requests sent to the Energa website"""
+from unittest.mock import patch
+
+import pytest
+from mechanize import Browser
+
+from custom_components.energa_my_meter.energa.connector import EnergaWebsiteConnector
+from custom_components.energa_my_meter.energa.const import ENERGA_REQUESTS_INITIAL_RATE, \
+    ENERGA_REQUESTS_MINIMUM_RATE, ENERGA_REQUESTS_RATE_INCREASE
+from custom_components.energa_my_meter.energa.errors import EnergaMyMeterWebsiteError, EnergaDeadlineExceededError
+from custom_components.energa_my_meter.energa.rate_limiter import EnergaRateLimiter, get_rate_limiter
+from ..fakes import FakeClock
+
+
+def test_requests_within_the_burst_should_not_wait(clock: FakeClock):
+    """The first requests should be sent immediately"""
+    limiter = EnergaRateLimiter(rate=1.0, burst=3, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        limiter.acquire()
+    assert not clock.sleeps
+
+
+def test_requests_above_the_burst_should_be_paced(clock: FakeClock):
+    """When the bucket is empty, the requests should be spread according to the rate"""
+    limiter = EnergaRateLimiter(rate=2.0, burst=1, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_wait_longer_than_allowed_should_fail_without_taking_the_token(clock: FakeClock):
+    """Waiting past the deadline makes no sense - the request is given up and the next one is not delayed by it"""
+    limiter = EnergaRateLimiter(rate=1.0, burst=1, clock=clock, sleep=clock.sleep)
+    limiter.acquire()
+
+    with pytest.raises(EnergaDeadlineExceededError):
+        limiter.acquire(max_wait=0.5)
+    limiter.acquire(max_wait=1)
+    assert clock.sleeps == [1]
+
+
+def test_throttling_should_slow_down_and_clean_responses_should_speed_up(clock: FakeClock):
+    """The rate is halved after the website defends itself and grows back while it answers correctly"""
+    limiter = EnergaRateLimiter(rate=1.0, burst=3, clock=clock, sleep=clock.sleep)
+    limiter.report_throttled()
+    assert limiter.rate == 0.5
+
+    limiter.acquire()
+    assert clock.sleeps == [2.0]
+
+    limiter.report_success()
+    assert limiter.rate == 0.5 + ENERGA_REQUESTS_RATE_INCREASE
+
+    for _ in range(100):
+        limiter.report_throttled()
+    assert limiter.rate == ENERGA_REQUESTS_MINIMUM_RATE
+
+
+def test_rate_limiter_should_be_shared_by_the_account():
+    """All connections of the same account to the same host should share the pacing"""
+    assert get_rate_limiter('host', 'user') is get_rate_limiter('host', 'user')
+    assert get_rate_limiter('host', 'user') is not get_rate_limiter('host', 'another user')
+    assert get_rate_limiter('host', 'user') is not get_rate_limiter('another host', 'user')
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+@patch(
+    target='custom_components.energa_my_meter.energa.scrapper.EnergaWebsiteScrapper.is_error_shown',
+    return_value=True
+)
+def test_website_error_should_slow_down_the_account(_is_error_shown_mock, browser_mock):
+    """Another connection of the account should be slowed down after the website showed an error"""
+    browser_mock.open.return_value.read.return_value = '<html><body><p>Some response</p></body></html>'
+    connector = EnergaWebsiteConnector()
+    with pytest.raises(EnergaMyMeterWebsiteError):
+        connector.authenticate('username', 'password', browser_mock)
+    assert get_rate_limiter('mojlicznik.energa-operator.pl', 'username').rate < ENERGA_REQUESTS_INITIAL_RATE
@@ -0,0 +1,73 @@
+"""Tests of the requests budget shared by all accounts"""
+import threading
+import time
+
+import pytest
+
+from custom_components.energa_my_meter.energa.errors import EnergaDeadlineExceededError
+from custom_components.energa_my_meter.energa.request_budget import EnergaRequestBudget, get_request_budget
+from ..fakes import FakeClock
+
+
+def _wait_for_waiting(budget: EnergaRequestBudget, count: int):
+    """Waits until the specified number of requests is queued for the budget"""
+    while budget.waiting < count:
+        time.sleep(0.001)
+
+
+def test_requests_within_the_burst_should_not_wait(clock: FakeClock):
+    """The first requests should be sent immediately"""
+    budget = EnergaRequestBudget(requests_per_minute=1, burst=3, clock=clock, wait=clock.wait)
+    for _ in range(3):
+        budget.acquire('user')
+    assert not clock.sleeps
+
+
+def test_requests_above_the_burst_should_be_paced(clock: FakeClock):
+    """When the budget is exhausted, the requests should be spread according to the rate"""
+    budget = EnergaRequestBudget(requests_per_minute=60, burst=1, clock=clock, wait=clock.wait)
+    for _ in range(3):
+        budget.acquire('user')
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_accounts_should_take_turns_when_the_budget_is_exhausted(clock: FakeClock):
+    """An account with many queued requests should not delay the requests of other accounts"""
+    # The time moves only after all requests are queued - until then the waiting threads just check it again
+    budget = EnergaRequestBudget(requests_per_minute=600, burst=1, clock=clock,
+                                 wait=lambda condition, _timeout: condition.wait(0.001))
+    budget.acquire('busy')
+    granted = []
+
+    def _request(account: str):
+        budget.acquire(account)
+        granted.append(account)
+
+    threads = []
+    for idx, account in enumerate(['busy', 'busy', 'busy', 'other']):
+        threads.append(threading.Thread(target=_request, args=(account,)))
+        threads[-1].start()
+        _wait_for_waiting(budget, idx + 1)
+    for thread in threads:
+        while thread.is_alive():
+            clock.now += 0.1
+            thread.join(0.001)
+
+    assert granted == ['busy', 'other', 'busy', 'busy']
+
+
+def test_request_not_fitting_before_the_deadline_should_give_up_its_turn(clock: FakeClock):
+    """The request that would wait too long fails right away and the other accounts are not blocked by it"""
+    budget = EnergaRequestBudget(requests_per_minute=1, burst=1, clock=clock, wait=clock.wait)
+    budget.acquire('user')
+
+    with pytest.raises(EnergaDeadlineExceededError):
+        budget.acquire('user', max_wait=1)
+    assert not clock.sleeps
+    assert budget.waiting == 0
+
+
+def test_request_budget_should_be_shared_by_the_host():
+    """All connections to the same host should share the budget"""
+    assert get_request_budget('host') is get_request_budget('host')
+    assert get_request_budget('host') is not get_request_budget('another host')
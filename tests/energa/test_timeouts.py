@@ -0,0 +1,57 @@
+"""Tests of the per-endpoint timeouts and of the refresh deadline"""
+from unittest.mock import patch
+
+import pytest
+from mechanize import Browser
+
+from custom_components.energa_my_meter.energa.connector import EnergaWebsiteConnector
+from custom_components.energa_my_meter.energa.const import ENERGA_REQUESTS_TIMEOUT, \
+    ENERGA_REQUESTS_LATENCY_MINIMUM_SAMPLES, ENERGA_REQUESTS_MINIMUM_READ_TIMEOUT, ENERGA_REQUESTS_MAXIMUM_READ_TIMEOUT
+from custom_components.energa_my_meter.energa.errors import EnergaDeadlineExceededError
+from custom_components.energa_my_meter.energa.timeouts import EnergaEndpointTimeouts, EnergaDeadline
+
+
+def test_timeout_should_follow_the_observed_latency():
+    """Every endpoint gets its own timeout, kept within the limits"""
+    timeouts = EnergaEndpointTimeouts()
+    assert timeouts.get_timeout('/dp/resources/chart').read == ENERGA_REQUESTS_TIMEOUT
+
+    for _ in range(ENERGA_REQUESTS_LATENCY_MINIMUM_SAMPLES):
+        timeouts.record('/dp/resources/chart', 0.1)
+        timeouts.record('/dp/UserData.do', 4)
+
+    assert timeouts.get_timeout('/dp/resources/chart').read == ENERGA_REQUESTS_MINIMUM_READ_TIMEOUT
+    assert timeouts.get_timeout('/dp/UserData.do').read == 12
+    assert timeouts.get_timeout('/dp/UserLogin.do').read == ENERGA_REQUESTS_TIMEOUT
+
+    timeouts.record('/dp/UserData.do', 60)
+    assert timeouts.get_timeout('/dp/UserData.do').read == ENERGA_REQUESTS_MAXIMUM_READ_TIMEOUT
+
+
+def test_deadline_should_expire():
+    """The deadline reports the remaining time using the provided clock"""
+    now = [0.0]
+    deadline = EnergaDeadline(10, clock=lambda: now[0])
+    assert deadline.remaining() == 10
+    assert not deadline.expired
+
+    now[0] = 10
+    assert deadline.expired
+
+
+@patch(target='mechanize.Browser', autospec=Browser)
+@patch(target='custom_components.energa_my_meter.energa.rate_limiter.EnergaRateLimiter.acquire')
+def test_requests_should_respect_the_deadline(_acquire_mock, browser_mock):
+    """The timeout never exceeds the deadline, and nothing is sent after the deadline passes"""
+    now = [0.0]
+    connector = EnergaWebsiteConnector()
+    connector.browser = browser_mock
+    connector.deadline = EnergaDeadline(4, clock=lambda: now[0])
+
+    connector._send('https://example.com/dp/resources/chart')  # pylint: disable=protected-access
+    assert browser_mock.open.call_args.kwargs['timeout'] == 4
+
+    now[0] = 5
+    with pytest.raises(EnergaDeadlineExceededError):
+        connector._send('https://example.com/dp/resources/chart')  # pylint: disable=protected-access
+    assert browser_mock.open.call_count == 1
@@ -0,0 +1,143 @@
+"""
+In-memory stand-ins for the Energa website, the Home Assistant recorder and the time.
+They allow running the statistics logic without the network and the database, and the pacing without waiting.
+"""
+import threading
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.energa_my_meter.energa.data import EnergaStatisticsData
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+
+FAKE_TIMEZONE = 'Europe/Warsaw'
+FAKE_ZONES = ['Strefa 1 (dzienna):', 'Strefa 2 (nocna):', 'Strefa 3 (szczyt):']
+
+
+class FakeEnergaClient:
+    """
+    Synthetic replacement of EnergaMyMeterClient.
+    Responses are generated up-front, so only the parsing is measured - like with the real website.
+    """
+
+    def __init__(self, first_day: datetime, zones: [str] = None, now: datetime = None):
+        self._tz = ZoneInfo(FAKE_TIMEZONE)
+        self._zones = zones or FAKE_ZONES
+        self._now_ts = int((now or datetime.now(tz=self._tz)).timestamp())
+        self._responses: dict[tuple[str, int], dict] = {}
+        self.requests = 0
+
+        day = first_day.astimezone(self._tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        while int(day.timestamp()) <= self._now_ts:
+            for mode in EnergaStatsModes:
+                self._responses[(mode.name, int(day.timestamp()))] = self._generate_response(day, mode)
+            day = (day + timedelta(days=1, hours=2)).replace(hour=0)
+
+    def open_connection(self, username: str, password: str):
+        """Nothing to open"""
+
+    def disconnect(self):
+        """Nothing to close"""
+
+    def get_statistics(self, _meter_id: int, starting_point: datetime, mode: EnergaStatsModes,
+                       _tariff_name: str | None = None) -> EnergaStatisticsData:
+        """Returns the pre-generated response for the requested day"""
+        self.requests += 1
+        day = starting_point.astimezone(self._tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        response = self._responses.get((mode.name, int(day.timestamp())))
+        if response is None:
+            response = self._generate_response(day, mode, empty=True)
+        return EnergaStatisticsData(response)
+
+    def _generate_response(self, day: datetime, mode: EnergaStatsModes, empty: bool = False) -> dict:
+        """Builds the response in the same shape the Energa chart endpoint uses"""
+        start_ts = int(day.timestamp())
+        end_ts = int((day + timedelta(days=1, hours=2)).replace(hour=0).timestamp())
+        main_chart = []
+        if not empty:
+            for idx, timestamp in enumerate(range(start_ts, min(end_ts, self._now_ts), 3600)):
+                values = [None] * (len(self._zones) + 1)
+                values[idx % len(self._zones)] = round(0.1 + (timestamp % 997) / 1000, 3)
+                main_chart.append({
+                    'tm': str(timestamp * 1000), 'tarAvg': None, 'zones': values,
+                    'est': False, 'cplt': True,
+                })
+        return {
+            'tariffName': 'G13', 'tz': FAKE_TIMEZONE, 'unit': 'kWh', 'type': 'DAY', 'mo': mode.value,
+            'mainChartDate': str(start_ts * 1000), 'mainChartDateTo': str(end_ts * 1000),
+            'zones': [{'index': idx, 'label': zone} for idx, zone in enumerate(self._zones)],
+            'mainChart': main_chart,
+        }
+
+
+class FakeRecorder:
+    """Keeps imported statistics in memory, mimicking the recorder statistics functions used by the integration"""
+
+    def __init__(self):
+        self.statistics: dict[str, list] = {}
+
+    def get_last_statistics(self, _hass, number_of_stats: int, statistic_id: str, _convert_units: bool,
+                            _types: set) -> dict:
+        """The same contract as homeassistant.components.recorder.statistics.get_last_statistics"""
+        rows = self.statistics.get(statistic_id, [])
+        if not rows:
+            return {}
+        result = []
+        for row in rows[-number_of_stats:][::-1]:
+            start = row['start'].timestamp()
+            result.append({'start': start, 'end': start + 3600, 'sum': row['sum'], 'state': row['state']})
+        return {statistic_id: result}
+
+    def import_statistics(self, statistic_id: str, statistics: list):
+        """Inserts or replaces the statistics rows, keeping them sorted by their start"""
+        rows = {row['start'].timestamp(): row for row in self.statistics.get(statistic_id, [])}
+        for statistic in statistics:
+            rows[statistic['start'].timestamp()] = statistic
+        self.statistics[statistic_id] = [rows[key] for key in sorted(rows)]
+
+    def statistics_during_period(self, _hass, start_time: datetime, end_time: datetime | None, statistic_ids: set,
+                                 _period: str, _units, _types: set) -> dict:
+        """The same contract as homeassistant.components.recorder.statistics.statistics_during_period (hours only)"""
+        result = {}
+        for statistic_id in statistic_ids:
+            rows = [
+                {'start': row['start'].timestamp(), 'sum': row['sum'], 'state': row['state']}
+                for row in self.statistics.get(statistic_id, [])
+                if start_time <= row['start'] and (end_time is None or row['start'] < end_time)
+            ]
+            if rows:
+                result[statistic_id] = rows
+        return result
+
+    def adjust_statistics(self, statistic_id: str, start_time: datetime, sum_adjustment: float):
+        """Changes the sums of all rows starting at (or after) the specified moment, like the recorder does"""
+        self.statistics[statistic_id] = [
+            {**row, 'sum': row['sum'] + sum_adjustment} if row['start'] >= start_time else row
+            for row in self.statistics.get(statistic_id, [])
+        ]
+
+    def count(self) -> int:
+        """The number of all stored rows"""
+        return sum(len(rows) for rows in self.statistics.values())
+
+
+class FakeClock:
+    """Manually controlled time, so the tests do not have to wait"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        """Moves the time forward instead of waiting"""
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def wait(self, condition: threading.Condition, timeout: float | None):
+        """Moves the time forward instead of waiting on the condition - only the waits without a timeout are real"""
+        if timeout is None:
+            condition.wait()
+        else:
+            self.sleep(timeout)
@@ -1,6 +1,7 @@
 """Helper functions related to Home Assistant tests"""
 
-from unittest.mock import MagicMock
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
 
 from homeassistant.core import HomeAssistant
 from pytest_homeassistant_custom_component.common import MockConfigEntry
@@ -41,6 +42,30 @@ async def create_config_entry(
     return entry
 
 
+async def create_statistics_config_entry(hass: HomeAssistant, entry_id: str, zone: str) -> MockConfigEntry:
+    """Create a config entry with a single statistics sensor (consumed energy in the zone) for the meter 12345"""
+    return await create_config_entry(hass, entry_id, None, {
+        'username': 'some user',
+        'password': 'some password',
+        'selected_meter': '12345',
+        'selected_meter_internal_id': '1234',
+        'selected_ppe': 'somenumber',
+        'selected_zones': [zone],
+        'selected_modes': ['ENERGY_CONSUMED'],
+    })
+
+
+@contextmanager
+def patch_coordinator_refresh():
+    """Prevents the coordinator from loading anything from Energa"""
+    coordinator = 'custom_components.energa_my_meter.hass_integration.energa_coordinator.EnergaCoordinator'
+    with (
+        patch(target=f'{coordinator}.get_data', return_value={'meter_readings': []}),
+        patch(f'{coordinator}.async_refresh')
+    ):
+        yield
+
+
 def create_client():
     """A simple wrapper for creating Energa mock"""
     client = MagicMock()
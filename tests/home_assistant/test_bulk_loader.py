@@ -0,0 +1,114 @@
+"""Tests of loading the exported history straight into the recorder database"""
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from homeassistant.components.recorder.db_schema import Base, SCHEMA_VERSION
+from sqlalchemy import create_engine
+
+from custom_components.energa_my_meter.energa.exporter import CsvRowsWriter
+from custom_components.energa_my_meter.hass_integration.bulk_loader import main
+
+STATISTIC_ID = 'sensor.energa_my_meter_12345_consumed_strefa_1'
+START = datetime.fromisoformat('2024-10-01T00:00:00+02:00')
+
+
+def _create_database(path: Path, schema_version: int = SCHEMA_VERSION) -> sqlite3.Connection:
+    """Creates the recorder database with the current schema, marked with the specified schema version"""
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("INSERT INTO schema_changes (schema_version, changed) VALUES (?, datetime('now'))",
+                           (schema_version,))
+    return connection
+
+
+def _write_export(path: Path, values: list[float]) -> None:
+    """Writes the export of the consumed energy of the meter 1234, hour by hour from the start"""
+    writer = CsvRowsWriter(path)
+    writer.write([
+        [1234, 'ENERGY_CONSUMED', 'Strefa 1:', (START + timedelta(hours=hour)).isoformat(), 0, value, False]
+        for hour, value in enumerate(values)
+    ] + [[9999, 'ENERGY_CONSUMED', 'Strefa 1:', START.isoformat(), 0, 5, False]])
+    writer.close()
+
+
+def _get_statistics(connection: sqlite3.Connection) -> list[tuple]:
+    """The starts, states and sums of the loaded statistic"""
+    return connection.execute(
+        'SELECT start_ts, state, sum FROM statistics JOIN statistics_meta ON statistics_meta.id = metadata_id '
+        'WHERE statistic_id = ? ORDER BY start_ts', (STATISTIC_ID,)
+    ).fetchall()
+
+
+async def test_history_should_be_loaded_with_the_sums(tmp_path: Path):
+    """The hours of the mapped meters are saved with the metadata of the statistics sensor"""
+    connection = _create_database(tmp_path / 'home-assistant_v2.db')
+    _write_export(tmp_path / 'energa.csv', [1, 2, 0.5])
+
+    assert main(['--database', str(tmp_path / 'home-assistant_v2.db'), '--meter', '1234=12345',
+                 str(tmp_path / 'energa.csv')]) == 0
+
+    assert _get_statistics(connection) == [
+        (START.timestamp(), 1, 1), (START.timestamp() + 3600, 2, 3), (START.timestamp() + 7200, 0.5, 3.5)
+    ]
+    assert connection.execute('SELECT source, unit_of_measurement, has_sum, name FROM statistics_meta').fetchall() == [
+        ('recorder', 'kWh', 1, 'Energy consumed - Strefa 1')
+    ]
+
+
+async def test_history_should_be_loaded_before_the_saved_hours(tmp_path: Path):
+    """Only the hours before the first saved hour are loaded and the saved sums are moved by their total"""
+    connection = _create_database(tmp_path / 'home-assistant_v2.db')
+    with connection:
+        metadata_id = connection.execute(
+            "INSERT INTO statistics_meta (statistic_id, source, unit_of_measurement, has_mean, has_sum, name) "
+            "VALUES (?, 'recorder', 'kWh', 0, 1, 'Energy consumed - Strefa 1')", (STATISTIC_ID,)
+        ).lastrowid
+        connection.execute('INSERT INTO statistics (metadata_id, start_ts, state, sum) VALUES (?, ?, 4, 4)',
+                           (metadata_id, START.timestamp() + 7200))
+    _write_export(tmp_path / 'energa.csv', [1, 2, 0.5])
+
+    assert main(['--database', str(tmp_path / 'home-assistant_v2.db'), '--meter', '1234=12345',
+                 str(tmp_path / 'energa.csv')]) == 0
+
+    assert _get_statistics(connection) == [
+        (START.timestamp(), 1, 1), (START.timestamp() + 3600, 2, 3), (START.timestamp() + 7200, 4, 7)
+    ]
+
+
+async def test_history_start_should_be_saved_in_the_entry_state(tmp_path: Path):
+    """The entry of the meter does not load the days loaded by the loader, the entries of other meters are intact"""
+    _create_database(tmp_path / 'home-assistant_v2.db')
+    _write_export(tmp_path / 'energa.csv', [1, 2, 0.5])
+    storage = tmp_path / '.storage'
+    storage.mkdir()
+    (storage / 'core.config_entries').write_text(json.dumps({'data': {'entries': [
+        {'entry_id': 'meterentry', 'domain': 'energa_my_meter', 'title': 'Meter', 'data': {'selected_meter': '12345'}},
+        {'entry_id': 'otherentry', 'domain': 'energa_my_meter', 'title': 'Other', 'data': {'selected_meter': '999'}},
+    ]}}), encoding='utf-8')
+    (storage / 'energa_my_meter.meterentry').write_text(json.dumps({
+        'version': 1, 'minor_version': 1, 'key': 'energa_my_meter.meterentry',
+        'data': {'history_start': {'ENERGY_CONSUMED': int(START.timestamp()) + 86400}, 'main_data': {}}
+    }), encoding='utf-8')
+
+    assert main(['--database', str(tmp_path / 'home-assistant_v2.db'), '--storage', str(storage),
+                 '--meter', '1234=12345', str(tmp_path / 'energa.csv')]) == 0
+
+    state = json.loads((storage / 'energa_my_meter.meterentry').read_text(encoding='utf-8'))
+    assert state['data'] == {'history_start': {'ENERGY_CONSUMED': int(START.timestamp())}, 'main_data': {}}
+    assert not (storage / 'energa_my_meter.otherentry').exists()
+
+
+async def test_database_with_another_schema_should_be_rejected(tmp_path: Path):
+    """Nothing is written into the database that is not migrated yet, or migrated by a newer Home Assistant"""
+    _write_export(tmp_path / 'energa.csv', [1])
+    for schema_version in [SCHEMA_VERSION - 1, SCHEMA_VERSION + 1]:
+        database = tmp_path / f'{schema_version}.db'
+        connection = _create_database(database, schema_version)
+
+        assert main(['--database', str(database), '--meter', '1234=12345', str(tmp_path / 'energa.csv')]) == 1
+        assert _get_statistics(connection) == []
@@ -0,0 +1,35 @@
+"""Tests of the self-tuning number of days loaded in a single statistics cycle"""
+from custom_components.energa_my_meter.const import INITIAL_DAYS_TO_BE_LOADED_AT_ONCE, \
+    MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE, MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE
+from custom_components.energa_my_meter.hass_integration.chunk_size import EnergaChunkSizeTuner, \
+    CHUNK_SIZE_STORAGE_KEY
+
+
+def test_chunk_size_should_grow_after_fast_cycles():
+    """A fully used chunk loaded quickly should double the next chunk and be saved in the entry state"""
+    state = {}
+    tuner = EnergaChunkSizeTuner(state)
+    assert tuner.size == INITIAL_DAYS_TO_BE_LOADED_AT_ONCE
+
+    tuner.record_success(chunk_exhausted=True, requested_days=120, duration=60)
+
+    assert tuner.size == INITIAL_DAYS_TO_BE_LOADED_AT_ONCE * 2
+    assert state[CHUNK_SIZE_STORAGE_KEY] == INITIAL_DAYS_TO_BE_LOADED_AT_ONCE * 2
+
+
+def test_chunk_size_should_not_grow_after_slow_or_partial_cycles():
+    """Slow cycles and cycles that did not need the whole chunk should keep the size"""
+    tuner = EnergaChunkSizeTuner({})
+    tuner.record_success(chunk_exhausted=True, requested_days=120, duration=3600)
+    tuner.record_success(chunk_exhausted=False, requested_days=2, duration=1)
+    assert tuner.size == INITIAL_DAYS_TO_BE_LOADED_AT_ONCE
+
+
+def test_chunk_size_should_shrink_after_failures_within_limits():
+    """Errors should halve the chunk, but never below the minimum or above the maximum"""
+    tuner = EnergaChunkSizeTuner({CHUNK_SIZE_STORAGE_KEY: MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE * 10})
+    assert tuner.size == MAXIMUM_DAYS_TO_BE_LOADED_AT_ONCE
+
+    for _ in range(20):
+        tuner.record_failure()
+    assert tuner.size == MINIMUM_DAYS_TO_BE_LOADED_AT_ONCE
@@ -1,9 +1,11 @@
 """Tests for the config flow."""
 import json
+from datetime import timedelta
 from unittest.mock import patch, MagicMock
 
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
 
 from custom_components.energa_my_meter import CONF_SELECTED_METER_ID, CONF_SELECTED_METER_NUMBER, \
     EnergaMyMeterAuthorizationError
@@ -74,8 +76,13 @@ class TestUIFlow:
         target="custom_components.energa_my_meter.energa.client.EnergaMyMeterClient.get_first_statistics_date",
         return_value=None
     )
+    @patch(
+        target="custom_components.energa_my_meter.energa.client.EnergaMyMeterClient.fork",
+        autospec=True, side_effect=lambda client: client
+    )
     async def test_when_user_input_is_valid(
             self,
+            _fork_mock: MagicMock,
             _get_first_stat_mock: MagicMock,
             _get_supported_zones: MagicMock,
             _get_meters_mock: MagicMock,
@@ -155,3 +162,139 @@ class TestUIFlow:
         })
 
         assert user_result.get('errors') == {'base': 'unauthorized'}
+
+    @patch("custom_components.energa_my_meter.common.async_config_entry_by_username", return_value=False)
+    @patch("homeassistant.config_entries.ConfigFlow.async_set_unique_id")
+    @patch("custom_components.energa_my_meter.config_flow.EnergaMyMeterClient")
+    async def test_when_steps_are_repeated_the_session_is_reused(
+            self,
+            client_mock: MagicMock,
+            _unique_id_mock: MagicMock,
+            _config_entry_by_username_mock: MagicMock,
+            hass_with_jobs_mock: HomeAssistant,
+    ) -> None:
+        """All steps should share one login and load the meters and zones only once, closing the session at the end"""
+        energa = client_mock.return_value
+        energa.get_meters.return_value = [{'meter_id': '1234', 'meter_name': 'Some name', 'ppe': '123',
+                                           'meter_number': '111'}]
+        energa.get_supported_zones.return_value = ['zone1']
+        forked = energa.fork.return_value
+        forked.get_first_statistics_date.return_value = None
+        config_flow = EnergaConfigFlow()
+        config_flow.hass = hass_with_jobs_mock
+
+        await config_flow.async_step_user({CONF_USERNAME: 'someusername', CONF_PASSWORD: 'somepassword'})
+        await config_flow.async_step_meter()
+        selected_meter = json.dumps(energa.get_meters.return_value[0])
+        await config_flow.async_step_meter({CONF_SELECTED_METER_NUMBER: selected_meter})
+        await config_flow.async_step_statistics()
+        result = await config_flow.async_step_statistics({
+            CONF_NUMBER_OF_DAYS_TO_LOAD: 10, CONF_SELECTED_ZONES: ['zone1'], CONF_SELECTED_MODES: ['ENERGY_CONSUMED']
+        })
+
+        assert result["type"] == "create_entry"
+        energa.open_connection.assert_called_once_with('someusername', 'somepassword')
+        energa.get_meters.assert_called_once()
+        energa.get_supported_zones.assert_called_once()
+        forked.get_first_statistics_date.assert_called_once()
+        forked.disconnect.assert_called_once()
+        energa.disconnect.assert_called_once()
+
+    @patch("custom_components.energa_my_meter.config_flow.CONFIG_FLOW_FIRST_STATISTICS_DATE_TIMEOUT", 0)
+    @patch("homeassistant.config_entries.ConfigFlow.async_set_unique_id")
+    @patch("custom_components.energa_my_meter.config_flow.EnergaMyMeterClient")
+    async def test_when_first_date_is_found_late_the_days_limit_is_applied_on_submit(
+            self,
+            client_mock: MagicMock,
+            _unique_id_mock: MagicMock,
+            hass_with_jobs_mock: HomeAssistant,
+    ) -> None:
+        """The form should not wait for the first statistics date, but the number of days should still respect it"""
+        energa = client_mock.return_value
+        energa.get_supported_zones.return_value = ['zone1']
+        energa.get_first_statistics_date.return_value = dt_util.now() - timedelta(days=10, hours=1)
+        energa.fork.return_value = energa
+        config_flow = EnergaConfigFlow()
+        config_flow.hass = hass_with_jobs_mock
+        config_flow._data = {  # pylint: disable=protected-access
+            CONF_USERNAME: 'someusername', CONF_PASSWORD: 'somepassword', CONF_SELECTED_METER_ID: '1234',
+            CONF_SELECTED_METER_NUMBER: '111',
+        }
+
+        form = await config_flow.async_step_statistics()
+        assert form["description_placeholders"]["firstStatistic"] == ''
+        assert form["description_placeholders"]["fistStatisticDaysDifference"] is None
+
+        result = await config_flow.async_step_statistics({
+            CONF_NUMBER_OF_DAYS_TO_LOAD: 100, CONF_SELECTED_ZONES: ['zone1'], CONF_SELECTED_MODES: ['ENERGY_CONSUMED']
+        })
+        assert result["data"][CONF_NUMBER_OF_DAYS_TO_LOAD] == 10
+
+    @patch("custom_components.energa_my_meter.config_flow.EnergaMyMeterClient")
+    async def test_when_flow_is_removed_the_first_date_search_is_cancelled(
+            self,
+            _client_mock: MagicMock,
+            hass: HomeAssistant,
+    ) -> None:
+        """The first statistics dates still looked for should not outlive the flow nor the login"""
+        config_flow = EnergaConfigFlow()
+        config_flow.hass = hass
+        discovery = hass.loop.create_future()
+        config_flow._first_dates = {'1234': discovery}  # pylint: disable=protected-access
+
+        await config_flow.async_step_user({CONF_USERNAME: 'someusername', CONF_PASSWORD: 'somepassword'})
+        assert discovery.cancelled()
+
+        discovery = hass.loop.create_future()
+        config_flow._first_dates = {'1234': discovery}  # pylint: disable=protected-access
+        config_flow.async_remove()
+        assert discovery.cancelled()
+
+    @patch("custom_components.energa_my_meter.config_flow.EnergaMyMeterClient")
+    async def test_when_first_date_search_is_cancelled_before_it_starts_the_session_is_not_forked(
+            self,
+            client_mock: MagicMock,
+            hass: HomeAssistant,
+    ) -> None:
+        """The search forks the session only once it runs, so cancelling the queued search leaves no fork open"""
+        energa = client_mock.return_value
+        config_flow = EnergaConfigFlow()
+        config_flow.hass = hass
+        config_flow._energa = energa  # pylint: disable=protected-access
+
+        def _submit(target, *_args):
+            # Only the zones are loaded, the search for the first date stays queued
+            job = hass.loop.create_future()
+            if target == energa.get_supported_zones:
+                job.set_result(['zone1'])
+            return job
+
+        with patch.object(hass, 'async_add_executor_job', side_effect=_submit):
+            assert await config_flow._async_get_zones('1234') == ['zone1']  # pylint: disable=protected-access
+            config_flow.async_remove()
+
+        assert energa.fork.call_count == 0
+
+    @patch("homeassistant.config_entries.ConfigFlow.async_set_unique_id")
+    @patch("custom_components.energa_my_meter.config_flow.EnergaMyMeterClient")
+    async def test_when_first_date_is_still_looked_for_on_submit_it_is_waited_for(
+            self,
+            _client_mock: MagicMock,
+            _unique_id_mock: MagicMock,
+            hass: HomeAssistant,
+    ) -> None:
+        """The submitted number of days should be limited even when the first statistics date is found after it"""
+        config_flow = EnergaConfigFlow()
+        config_flow.hass = hass
+        config_flow._data = {  # pylint: disable=protected-access
+            CONF_USERNAME: 'someusername', CONF_PASSWORD: 'somepassword', CONF_SELECTED_METER_ID: '1234',
+            CONF_SELECTED_METER_NUMBER: '111',
+        }
+        discovery = hass.loop.create_future()
+        config_flow._first_dates = {'1234': discovery}  # pylint: disable=protected-access
+        hass.loop.call_later(0.01, discovery.set_result, dt_util.now() - timedelta(days=10, hours=1))
+
+        result = await config_flow.async_step_statistics({
+            CONF_NUMBER_OF_DAYS_TO_LOAD: 100, CONF_SELECTED_ZONES: ['zone1'], CONF_SELECTED_MODES: ['ENERGY_CONSUMED']
+        })
+        assert result["data"][CONF_NUMBER_OF_DAYS_TO_LOAD] == 10
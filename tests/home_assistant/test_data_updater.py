@@ -0,0 +1,352 @@
+"""Tests of loading the statistics from Energa"""
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.recorder import get_instance
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from custom_components.energa_my_meter.common import generate_entity_name
+from custom_components.energa_my_meter.const import CONF_NUMBER_OF_DAYS_TO_LOAD, CONF_SELECTED_METER_ID, \
+    CONF_SELECTED_METER_NUMBER, CONF_SELECTED_ZONES, STATISTICS_COMMIT_DAYS, DOMAIN, DAYS_RELOAD_LIMIT, \
+    REVALIDATION_DAYS
+from custom_components.energa_my_meter.energa.data import EnergaData, EnergaStatisticsData
+from custom_components.energa_my_meter.energa.errors import EnergaWebsiteLoadingError
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+from custom_components.energa_my_meter.hass_integration.data_updater import EnergaDataUpdater
+from custom_components.energa_my_meter.hass_integration.day_hashes import EnergaDayHashes
+from custom_components.energa_my_meter.hass_integration.energa_coordinator import EnergaCoordinator
+from custom_components.energa_my_meter.hass_integration.days_index import EnergaDaysIndex, \
+    ESTIMATED_DAYS_STORAGE_KEY, VERIFIED_DAYS_STORAGE_KEY
+from .helpers import create_config_entry, create_statistics_config_entry, patch_coordinator_refresh, create_client
+from ..fakes import FAKE_TIMEZONE, FAKE_ZONES, FakeEnergaClient
+
+INTEGRATION_PACKAGE = 'custom_components.energa_my_meter.hass_integration'
+ZONE = 'Strefa 1:'
+STATISTIC_ID = generate_entity_name('12345', 'consumed_strefa_1')
+
+
+@pytest.fixture(name='coordinator')
+async def coordinator_fixture(hass: HomeAssistant) -> EnergaCoordinator:
+    """The coordinator of the entry with the statistics of the consumed energy in a single zone"""
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', ZONE)
+        yield hass.data[DOMAIN]['someentryid']['coordinator']
+
+
+async def save_hours(hass: HomeAssistant, coordinator: EnergaCoordinator, hours: list[datetime]) -> None:
+    """Saves the statistics of the hours, each with the value of 1"""
+    coordinator.queue_statistics(EnergaStatsModes.ENERGY_CONSUMED, {ZONE: [
+        StatisticData(start=start, state=1, sum=idx + 1) for idx, start in enumerate(hours)
+    ]})
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+
+def create_response(hass: HomeAssistant, day: datetime, values: dict[datetime, float]) -> dict:
+    """The response of Energa with the values of the hours of the day"""
+    return {
+        'tariffName': 'G11', 'tz': hass.config.time_zone, 'unit': 'kWh',
+        'mainChartDate': str(int(day.timestamp()) * 1000), 'mainChartDateTo': None,
+        'zones': [{'label': ZONE}],
+        'mainChart': [
+            {'tm': str(int(start.timestamp()) * 1000), 'zones': [value], 'est': False}
+            for start, value in values.items()
+        ],
+    }
+
+
+def create_updater(hass: HomeAssistant, coordinator: EnergaCoordinator, client, state: dict,
+                   statistics_sink=None) -> EnergaDataUpdater:
+    """The updater of the entry, saving the statistics through the coordinator"""
+    return EnergaDataUpdater(client, {
+        CONF_SELECTED_METER_NUMBER: '12345',
+        CONF_SELECTED_METER_ID: '1234',
+        CONF_SELECTED_ZONES: [ZONE],
+    }, hass, statistics_sink=statistics_sink or coordinator.queue_statistics,
+        adjustments_sink=coordinator.queue_adjustment, state=state)
+
+
+async def reload_days(hass: HomeAssistant, updater: EnergaDataUpdater) -> None:
+    """Reloads the days of the consumed energy and waits until the statistics are saved"""
+    await hass.async_add_executor_job(updater.reload_days, EnergaStatsModes.ENERGY_CONSUMED)
+    await hass.async_block_till_done()
+    await async_wait_recording_done(hass)
+
+
+async def get_saved_statistics(hass: HomeAssistant, since: datetime) -> list[dict]:
+    """The saved statistics of the zone starting at the specified moment"""
+    return (await get_instance(hass).async_add_executor_job(
+        statistics_during_period, hass, since, None, {STATISTIC_ID}, 'hour', None, {'state', 'sum'}
+    ))[STATISTIC_ID]
+
+
+async def test_refresh_should_load_the_statistics_through_the_recorder_executor(hass: HomeAssistant):
+    """The real refresh of the coordinator loads and saves the statistics with the client"""
+    client = create_client()
+    client.is_connected = False
+    client.get_account_main_data.return_value = EnergaData({'meter_name': 'Meter', 'ppe_number': 'somenumber',
+                                                            'meter_readings': []})
+    client.get_statistics.side_effect = lambda _meter_id, day, _mode: EnergaStatisticsData(
+        create_response(hass, day, {day + timedelta(hours=hour): 1 for hour in range(24)})
+    )
+    with patch(f'{INTEGRATION_PACKAGE}.energa_coordinator.EnergaMyMeterClient', return_value=client):
+        await create_config_entry(hass, 'someentryid', None, {
+            'username': 'some user', 'password': 'some password', 'selected_meter': '12345',
+            'selected_meter_internal_id': '1234', 'selected_zones': [ZONE], 'selected_modes': ['ENERGY_CONSUMED'],
+            CONF_NUMBER_OF_DAYS_TO_LOAD: 2,
+        })
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+        await coordinator.async_refresh()
+        await hass.async_block_till_done(wait_background_tasks=True)
+        await async_wait_recording_done(hass)
+
+    assert coordinator.last_update_success
+    assert client.get_statistics.call_count > 0
+    assert len(await get_saved_statistics(hass, dt_util.start_of_local_day() - timedelta(days=1))) >= 24
+
+class FailingEnergaClient(FakeEnergaClient):
+    """Fake client that stops responding after the specified number of requests"""
+
+    def __init__(self, *args, failing_request: int, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._failing_request = failing_request
+
+    def get_statistics(self, *args, **kwargs):
+        if self.requests + 1 >= self._failing_request:
+            raise EnergaWebsiteLoadingError
+        return super().get_statistics(*args, **kwargs)
+
+
+@patch(target=f'{INTEGRATION_PACKAGE}.data_updater.get_last_statistics', return_value={})
+def test_statistics_should_be_saved_before_the_cycle_fails(_last_statistics_mock):
+    """The days loaded before an error are handed over in batches, with the running sum carried between them"""
+    zones = FAKE_ZONES[:1]
+    client = FailingEnergaClient(dt_util.now() - timedelta(days=31), zones=zones, failing_request=11)
+    batches = []
+    updater = EnergaDataUpdater(client, {
+        CONF_SELECTED_METER_NUMBER: 12345,
+        CONF_SELECTED_METER_ID: 1,
+        CONF_SELECTED_ZONES: zones,
+        CONF_NUMBER_OF_DAYS_TO_LOAD: 30,
+    }, None, statistics_sink=lambda mode, statistics: batches.append((mode, statistics)))
+
+    saved = updater.gather_stats(EnergaStatsModes.ENERGY_CONSUMED)
+
+    assert len(updater.errors) == 1
+    assert len(batches) == 2
+    first_batch, second_batch = (statistics[zones[0]] for _, statistics in batches)
+    assert len(first_batch) >= STATISTICS_COMMIT_DAYS * 24 - 1
+    assert saved[zones[0]] == len(first_batch) + len(second_batch)
+
+    all_statistics = first_batch + second_batch
+    assert all_statistics[-1]['sum'] == pytest.approx(sum(statistic['state'] for statistic in all_statistics))
+    assert second_batch[0]['start'] > first_batch[-1]['start']
+
+
+async def test_estimated_days_should_be_replaced_with_the_real_data(hass: HomeAssistant,
+                                                                   coordinator: EnergaCoordinator):
+    """The changed hours of the estimated day are imported again and the later statistics are adjusted"""
+    day = dt_util.start_of_local_day() - timedelta(days=2)
+    saved_hours = [day + timedelta(hours=hour) for hour in range(3)] + [day + timedelta(days=1)]
+    await save_hours(hass, coordinator, saved_hours)
+    client = create_client()
+    client.get_statistics.return_value = EnergaStatisticsData(
+        create_response(hass, day, dict(zip(saved_hours[:3], [2.5, 1, 1])))
+    )
+    state = {}
+    estimates = EnergaDaysIndex(state, ESTIMATED_DAYS_STORAGE_KEY)
+    estimates.add(EnergaStatsModes.ENERGY_CONSUMED, day)
+
+    await reload_days(hass, create_updater(hass, coordinator, client, state))
+
+    saved = await get_saved_statistics(hass, day)
+    assert [row['sum'] for row in saved] == [2.5, 3.5, 4.5, 5.5]
+    assert saved[0]['state'] == 2.5
+    assert estimates.days(EnergaStatsModes.ENERGY_CONSUMED) == []
+
+
+async def test_missing_days_should_be_filled_in(hass: HomeAssistant, coordinator: EnergaCoordinator):
+    """The day missing between the saved days is loaded again and the statistics after it are adjusted"""
+    first_day = dt_util.start_of_local_day() - timedelta(days=4)
+    missing_day = first_day + timedelta(days=1)
+    await save_hours(hass, coordinator,
+                     [first_day + timedelta(hours=hour) for hour in range(24)] + [missing_day + timedelta(days=1)])
+    client = create_client()
+    client.get_statistics.return_value = EnergaStatisticsData(
+        create_response(hass, missing_day, {missing_day + timedelta(hours=hour): 0.5 for hour in range(24)})
+    )
+    state = {}
+    # The last days were already checked today - only the missing day is loaded
+    today = int(dt_util.start_of_local_day().timestamp())
+    EnergaDayHashes(state).mark_revalidated(EnergaStatsModes.ENERGY_CONSUMED, today)
+    updater = create_updater(hass, coordinator, client, state)
+
+    await reload_days(hass, updater)
+
+    assert client.get_statistics.call_count == 1
+    assert client.get_statistics.call_args.args[1] == missing_day
+    sums = [row['sum'] for row in await get_saved_statistics(hass, missing_day)]
+    assert sums[0] == pytest.approx(24.5)
+    assert sums[-1] == pytest.approx(24 + 12 + 1)
+    assert len(sums) == 25
+    assert EnergaDaysIndex(state, VERIFIED_DAYS_STORAGE_KEY).days(EnergaStatsModes.ENERGY_CONSUMED) == [
+        int(missing_day.timestamp())
+    ]
+
+    # The day is already verified - it is not loaded again
+    await reload_days(hass, updater)
+    assert client.get_statistics.call_count == 1
+
+
+async def test_corrected_days_should_be_saved_again(hass: HomeAssistant, coordinator: EnergaCoordinator):
+    """The last days are loaded again once a day and only the ones that have changed are saved again"""
+    day = dt_util.start_of_local_day() - timedelta(days=1)
+    saved_hours = [day + timedelta(hours=hour) for hour in range(3)] + [day + timedelta(days=1)]
+    await save_hours(hass, coordinator, saved_hours)
+    response = create_response(hass, day, {start: 1 for start in saved_hours[:3]})
+    state = {}
+    hashes = EnergaDayHashes(state)
+    hashes.set(EnergaStatsModes.ENERGY_CONSUMED, int(day.timestamp()), EnergaStatisticsData(response).content_hash)
+    response['mainChart'][1]['zones'] = [3]
+    client = create_client()
+    client.get_statistics.return_value = EnergaStatisticsData(response)
+    imports = []
+    updater = create_updater(hass, coordinator, client, state, statistics_sink=lambda mode, statistics: (
+        imports.append(statistics), coordinator.queue_statistics(mode, statistics)
+    ))
+
+    await reload_days(hass, updater)
+
+    assert [row['sum'] for row in await get_saved_statistics(hass, day)] == [1, 4, 5, 6]
+    assert len(imports) == 1
+
+    # Nothing has changed since - the day is not saved again, and the next check happens tomorrow
+    hashes.mark_revalidated(EnergaStatsModes.ENERGY_CONSUMED, 0)
+    await reload_days(hass, updater)
+    assert len(imports) == 1
+    requests = client.get_statistics.call_count
+    await reload_days(hass, updater)
+    assert client.get_statistics.call_count == requests
+
+
+async def test_zones_missing_in_the_reloaded_days_should_be_kept(hass: HomeAssistant, coordinator: EnergaCoordinator):
+    """The saved hours of a zone the response does not have (e.g. after the tariff change) are not zeroed"""
+    day = dt_util.start_of_local_day() - timedelta(days=1)
+    saved_hours = [day + timedelta(hours=hour) for hour in range(3)] + [day + timedelta(days=1)]
+    await save_hours(hass, coordinator, saved_hours)
+    response = create_response(hass, day, {start: 2 for start in saved_hours[:3]})
+    response['zones'] = [{'label': 'Strefa 2:'}]
+    client = create_client()
+    client.get_statistics.return_value = EnergaStatisticsData(response)
+
+    await reload_days(hass, create_updater(hass, coordinator, client, {}))
+
+    assert client.get_statistics.call_count > 0
+    assert [row['sum'] for row in await get_saved_statistics(hass, day)] == [1, 2, 3, 4]
+
+
+async def test_last_days_should_be_revalidated_before_the_older_days(hass: HomeAssistant,
+                                                                   coordinator: EnergaCoordinator):
+    """The last days are loaded again even when there are more estimated days than the reload limit"""
+    today = dt_util.start_of_local_day()
+    client = create_client()
+    client.get_statistics.side_effect = lambda _meter_id, day, _mode: EnergaStatisticsData(
+        create_response(hass, day, {day: 1})
+    )
+    state = {}
+    estimates = EnergaDaysIndex(state, ESTIMATED_DAYS_STORAGE_KEY)
+    for days_ago in range(REVALIDATION_DAYS + 1, REVALIDATION_DAYS + DAYS_RELOAD_LIMIT + 1):
+        estimates.add(EnergaStatsModes.ENERGY_CONSUMED, today - timedelta(days=days_ago))
+
+    await reload_days(hass, create_updater(hass, coordinator, client, state))
+
+    requested_days = [call.args[1] for call in client.get_statistics.call_args_list]
+    assert len(requested_days) == DAYS_RELOAD_LIMIT
+    assert {today - timedelta(days=days_ago) for days_ago in range(1, REVALIDATION_DAYS + 1)} <= set(requested_days)
+    assert EnergaDayHashes(state).is_revalidated(EnergaStatsModes.ENERGY_CONSUMED, int(today.timestamp()))
+    assert len(estimates.days(EnergaStatsModes.ENERGY_CONSUMED)) == REVALIDATION_DAYS
+
+
+async def test_history_should_be_loaded_newest_first(hass: HomeAssistant):
+    """The recent days are saved first, the older days are inserted behind them with the sums kept continuous"""
+    await hass.config.async_set_time_zone(FAKE_TIMEZONE)
+    zone = 'Strefa 1:'
+    statistic_id = generate_entity_name('12345', 'consumed_strefa_1')
+    client = FakeEnergaClient(dt_util.now() - timedelta(days=10), zones=[zone])
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', zone)
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+        state = {}
+        backfilled = []
+        for _ in range(4):
+            updater = EnergaDataUpdater(client, {
+                CONF_SELECTED_METER_NUMBER: '12345',
+                CONF_SELECTED_METER_ID: '1234',
+                CONF_SELECTED_ZONES: [zone],
+                CONF_NUMBER_OF_DAYS_TO_LOAD: 7,
+            }, hass, 3, coordinator.queue_statistics, adjustments_sink=coordinator.queue_adjustment,
+                state=state, coverage=coordinator.coverage)
+            await hass.async_add_executor_job(updater.gather_stats, EnergaStatsModes.ENERGY_CONSUMED)
+            await hass.async_block_till_done()
+            await async_wait_recording_done(hass)
+            saved = await hass.async_add_executor_job(updater.backfill_history, EnergaStatsModes.ENERGY_CONSUMED)
+            backfilled.append(saved.get(zone, 0) > 0)
+            await hass.async_block_till_done()
+            await async_wait_recording_done(hass)
+
+        # Nothing in the first cycle (the recent days are not saved yet), then 3 + 2 days, then nothing left
+        assert backfilled == [False, True, True, False]
+        oldest_day = dt_util.start_of_local_day() - timedelta(days=7)
+        imported = (await get_instance(hass).async_add_executor_job(
+            statistics_during_period, hass, oldest_day - timedelta(days=1), None, {statistic_id}, 'hour', None,
+            {'state', 'sum'}
+        ))[statistic_id]
+        assert dt_util.utc_from_timestamp(imported[0]['start']) == oldest_day
+        assert imported[-1]['sum'] == pytest.approx(sum(row['state'] for row in imported))
+        assert all(
+            row['sum'] == pytest.approx(previous['sum'] + row['state']) for previous, row in zip(imported, imported[1:])
+        )
+
+
+def test_saved_points_should_be_skipped():
+    """Only the points after the last saved statistic are parsed"""
+    zone = FAKE_ZONES[0]
+    day = dt_util.start_of_local_day() - timedelta(days=2)
+    client = FakeEnergaClient(day, zones=[zone])
+    updater = EnergaDataUpdater(client, {CONF_SELECTED_ZONES: [zone]}, None)
+    historical_data = client.get_statistics(1, day, EnergaStatsModes.ENERGY_CONSUMED)
+
+    last_saved = historical_data.get_dates(9)[0]
+    _, first_new_point = next(updater._parse_days(  # pylint: disable=protected-access
+        EnergaStatsModes.ENERGY_CONSUMED, [historical_data], last_saved
+    ))
+    assert first_new_point == 10
+    _, first_new_point = next(updater._parse_days(  # pylint: disable=protected-access
+        EnergaStatsModes.ENERGY_CONSUMED, [historical_data], last_saved + timedelta(days=1)
+    ))
+    assert first_new_point == len(historical_data.timestamps)
+
+
+@patch(target=f'{INTEGRATION_PACKAGE}.data_updater.get_last_statistics', return_value={})
+def test_only_selected_zones_should_be_saved(_last_statistics_mock):
+    """The zones of the tariff that were not selected are ignored"""
+    zone = FAKE_ZONES[1]
+    client = FakeEnergaClient(dt_util.now() - timedelta(days=3))
+    batches = []
+    updater = EnergaDataUpdater(client, {
+        CONF_SELECTED_METER_NUMBER: 12345,
+        CONF_SELECTED_METER_ID: 1,
+        CONF_SELECTED_ZONES: [zone],
+        CONF_NUMBER_OF_DAYS_TO_LOAD: 2,
+    }, None, statistics_sink=lambda mode, statistics: batches.append(statistics))
+
+    saved = updater.gather_stats(EnergaStatsModes.ENERGY_CONSUMED)
+
+    assert list(saved) == [zone]
+    assert saved[zone] > 0
+    assert all(list(statistics) == [zone] for statistics in batches)
@@ -0,0 +1,123 @@
+"""Tests of setting up and updating the config entries"""
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, call, patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import EVENT_HOMEASSISTANT_STARTED
+from homeassistant.core import CoreState, HomeAssistant
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.energa_my_meter.const import DOMAIN
+from custom_components.energa_my_meter.energa.client import EnergaMyMeterClient
+from custom_components.energa_my_meter.energa.connector import EnergaWebsiteConnector
+from custom_components.energa_my_meter.energa.data import EnergaData
+from custom_components.energa_my_meter.energa.errors import EnergaWebsiteLoadingError
+from .helpers import create_client, create_config_entry, create_statistics_config_entry, patch_coordinator_refresh
+
+COORDINATOR_MODULE = 'custom_components.energa_my_meter.hass_integration.energa_coordinator'
+COORDINATOR = f'{COORDINATOR_MODULE}.EnergaCoordinator'
+
+
+async def test_setup_should_refresh_once_and_load_the_statistics_right_after(hass: HomeAssistant):
+    """The sensors are added without refreshing, the statistics are loaded by a single refresh after the setup"""
+    refreshes = MagicMock()
+    refreshes.attach_mock(AsyncMock(), 'refresh')
+    refreshes.attach_mock(AsyncMock(), 'request_refresh')
+    with (
+        patch(f'{COORDINATOR}.get_data', return_value={'meter_readings': []}),
+        patch(f'{COORDINATOR}.async_refresh', refreshes.refresh),
+        patch(f'{COORDINATOR}.set_stats_skipping', refreshes.set_stats_skipping),
+        patch(f'{COORDINATOR}.async_request_refresh', refreshes.request_refresh),
+    ):
+        await create_statistics_config_entry(hass, 'someentryid', 'Strefa 1:')
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert refreshes.mock_calls == [
+        call.set_stats_skipping(True), call.refresh(), call.set_stats_skipping(False), call.refresh()
+    ]
+
+
+async def test_statistics_should_be_loaded_with_the_setup_session_after_the_start(hass: HomeAssistant):
+    """The entry retried after the startup loads the statistics right after its setup, without logging in again"""
+    client = create_client()
+    client.is_connected = False
+    client.open_connection.side_effect = lambda *_args: setattr(client, 'is_connected', True)
+    client.get_account_main_data.return_value = EnergaData({'meter_name': 'Meter', 'ppe_number': 'somenumber',
+                                                            'meter_readings': []})
+    hass.set_state(CoreState.not_running)
+    with patch(f'{COORDINATOR_MODULE}.EnergaMyMeterClient', return_value=client):
+        # Without the PPE number and any saved data the entry waits until Home Assistant has started
+        entry = MockConfigEntry(entry_id='someentryid', domain=DOMAIN, data={
+            'username': 'some user', 'password': 'some password', 'selected_meter': '12345',
+            'selected_meter_internal_id': '1234', 'selected_zones': [], 'selected_modes': [],
+        })
+        entry.add_to_hass(hass)
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        assert entry.state is ConfigEntryState.SETUP_RETRY
+        assert client.get_account_main_data.call_count == 0
+
+        # Without any statistics selected, the statistics refresh only loads the account data again
+        hass.set_state(CoreState.running)
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+        await hass.async_block_till_done(wait_background_tasks=True)
+
+    assert entry.state is ConfigEntryState.LOADED
+    assert client.get_account_main_data.call_count == 2
+    assert client.open_connection.call_count == 1
+    assert client.disconnect.call_count == 1
+
+
+async def test_login_error_should_not_be_hidden_by_disconnecting(hass: HomeAssistant):
+    """The client that failed to log in is disconnected without any errors of its own"""
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', 'Strefa 1:')
+    coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+    coordinator.load_empty_data()
+    with (
+        patch(f'{COORDINATOR_MODULE}.EnergaMyMeterClient', return_value=EnergaMyMeterClient()),
+        patch.object(EnergaWebsiteConnector, 'authenticate', side_effect=EnergaWebsiteLoadingError),
+    ):
+        await coordinator.async_refresh()
+
+    assert isinstance(coordinator.last_exception, EnergaWebsiteLoadingError)
+
+
+async def test_scan_interval_change_should_be_applied_without_reloading(hass: HomeAssistant):
+    """The coordinator (with its session) is kept and only its update interval changes"""
+    with patch_coordinator_refresh():
+        entry = await create_statistics_config_entry(hass, 'someentryid', 'Strefa 1:')
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+        with patch.object(hass.config_entries, 'async_reload') as reload_mock:
+            hass.config_entries.async_update_entry(entry, options={'scan_interval': 30})
+            await hass.async_block_till_done()
+
+        assert reload_mock.call_count == 0
+        assert hass.data[DOMAIN]['someentryid']['coordinator'] is coordinator
+        assert coordinator.update_interval == timedelta(minutes=30)
+
+
+async def test_zones_change_should_reload_the_entry(hass: HomeAssistant):
+    """A different selection of the zones requires creating other sensors"""
+    with patch_coordinator_refresh():
+        entry = await create_statistics_config_entry(hass, 'someentryid', 'Strefa 1:')
+        with patch.object(hass.config_entries, 'async_reload') as reload_mock:
+            hass.config_entries.async_update_entry(entry, data={**entry.data, 'selected_zones': ['Strefa 2:']})
+            await hass.async_block_till_done()
+
+        reload_mock.assert_called_once_with('someentryid')
+
+
+async def test_session_should_be_closed_when_the_setup_refresh_fails(hass: HomeAssistant):
+    """The session kept for the statistics refresh is disconnected when the refresh fails"""
+    client = create_client()
+    client.is_connected = False
+    client.get_account_main_data.side_effect = EnergaWebsiteLoadingError
+    with patch(f'{COORDINATOR_MODULE}.EnergaMyMeterClient', return_value=client):
+        entry = await create_config_entry(hass, 'someentryid', None, {
+            'username': 'some user', 'password': 'some password', 'selected_meter': '12345',
+            'selected_meter_internal_id': '1234', 'selected_zones': [], 'selected_modes': [],
+        })
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert client.disconnect.call_count == 1
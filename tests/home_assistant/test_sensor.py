@@ -1,11 +1,19 @@
 """Tests for sensor logic"""
+from datetime import timedelta
 from unittest.mock import patch
 
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.statistics import statistics_during_period
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers.recorder import get_instance
+from homeassistant.util import dt as dt_util
 from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
 
 from custom_components.energa_my_meter.common import generate_entity_name
-from .helpers import create_config_entry
+from custom_components.energa_my_meter.const import DOMAIN
+from custom_components.energa_my_meter.energa.data import EnergaData
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+from .helpers import create_client, create_config_entry, create_statistics_config_entry, patch_coordinator_refresh
 
 INTEGRATION_PACKAGE = 'custom_components.energa_my_meter.hass_integration'
 
@@ -60,3 +68,49 @@ async def test_creating_sensors( hass: HomeAssistant):
             state = hass.states.get(generate_entity_name('12345', state_name))
             assert state
             assert state.state == expected_data.get(state_name)
+
+
+async def test_statistics_sensor_imports_queued_statistics(hass: HomeAssistant):
+    """Statistics handed over by the refresh should be imported by the sensor and removed from the queue"""
+    zone = 'Strefa 1:'
+    start = dt_util.start_of_local_day() - timedelta(days=1)
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', zone)
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+
+        await hass.async_add_executor_job(coordinator.queue_statistics, EnergaStatsModes.ENERGY_CONSUMED, {
+            zone: [StatisticData(start=start + timedelta(hours=hour), state=1, sum=hour + 1) for hour in range(3)]
+        })
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+
+        assert coordinator.get_specific_statistic(EnergaStatsModes.ENERGY_CONSUMED, zone) == []
+        statistic_id = generate_entity_name('12345', 'consumed_strefa_1')
+        imported = await get_instance(hass).async_add_executor_job(
+            statistics_during_period, hass, start, None, {statistic_id}, 'hour', None, {'sum'}
+        )
+        assert [row['sum'] for row in imported[statistic_id]] == [1, 2, 3]
+
+
+async def test_statistics_without_a_sensor_should_be_dropped_by_the_next_refresh(hass: HomeAssistant):
+    """The statistics of a zone without any sensor importing them do not pile up in the queue"""
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', 'Strefa 1:')
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+    start = dt_util.start_of_local_day() - timedelta(days=1)
+    await hass.async_add_executor_job(coordinator.queue_statistics, EnergaStatsModes.ENERGY_CONSUMED, {
+        'Strefa 2:': [StatisticData(start=start, state=1, sum=1)]
+    })
+    await hass.async_block_till_done()
+    assert len(coordinator.get_specific_statistic(EnergaStatsModes.ENERGY_CONSUMED, 'Strefa 2:')) == 1
+
+    with (
+        patch(f'{INTEGRATION_PACKAGE}.energa_coordinator.EnergaMyMeterClient', return_value=create_client()),
+        patch(f'{INTEGRATION_PACKAGE}.energa_coordinator.EnergaCoordinator.refresh_data', return_value={
+            'main': EnergaData({'meter_name': 'Meter', 'meter_readings': []}), 'stats': {}
+        }),
+    ):
+        await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    assert coordinator.get_specific_statistic(EnergaStatsModes.ENERGY_CONSUMED, 'Strefa 2:') == []
@@ -0,0 +1,170 @@
+"""Tests of spreading the first refreshes of the entries over the Home Assistant startup"""
+import asyncio
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.energa_my_meter.common import generate_entity_name
+from custom_components.energa_my_meter.const import DOMAIN
+from custom_components.energa_my_meter.energa.data import EnergaData, EnergaMeterReading
+from custom_components.energa_my_meter.hass_integration.startup_scheduler import EnergaStartupScheduler, \
+    STARTUP_SCHEDULER_DATA_KEY
+from .helpers import create_config_entry, patch_coordinator_refresh
+
+COORDINATOR = 'custom_components.energa_my_meter.hass_integration.energa_coordinator.EnergaCoordinator'
+
+
+async def test_refreshes_should_be_spread_over_the_window(hass: HomeAssistant):
+    """Every configured entry gets its own slot, the first one starts right away"""
+    for entry_id in ['first', 'second']:
+        MockConfigEntry(entry_id=entry_id, domain=DOMAIN).add_to_hass(hass)
+    scheduler = EnergaStartupScheduler(hass, window=60)
+    first, second = AsyncMock(), AsyncMock()
+
+    scheduler.async_schedule('user1', first)
+    scheduler.async_schedule('user2', second)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert first.await_count == 1
+    assert second.await_count == 0
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    assert second.await_count == 1
+
+
+async def test_slots_should_start_over_when_they_have_passed(hass: HomeAssistant):
+    """The entry scheduled after all refreshes have started does not wait behind their slots"""
+    for entry_id in ['first', 'second']:
+        MockConfigEntry(entry_id=entry_id, domain=DOMAIN).add_to_hass(hass)
+    scheduler = EnergaStartupScheduler(hass, window=60)
+    scheduler.async_schedule('user1', AsyncMock())
+    scheduler.async_schedule('user1', AsyncMock())
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=31))
+    await hass.async_block_till_done()
+    refresh = AsyncMock()
+
+    scheduler.async_schedule('user2', refresh)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert refresh.await_count == 1
+
+
+async def test_cancelled_slot_should_not_hold_the_next_entries(hass: HomeAssistant):
+    """The slot of the unloaded entry does not keep the slots from starting over"""
+    for entry_id in ['first', 'second']:
+        MockConfigEntry(entry_id=entry_id, domain=DOMAIN).add_to_hass(hass)
+    scheduler = EnergaStartupScheduler(hass, window=60)
+    scheduler.async_schedule('user1', AsyncMock())
+    scheduler.async_schedule('user2', AsyncMock())()
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    refresh = AsyncMock()
+
+    scheduler.async_schedule('user3', refresh)
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert refresh.await_count == 1
+
+
+async def test_refreshes_of_the_same_account_should_not_overlap(hass: HomeAssistant):
+    """The refresh of the account waits until the previous one finishes, other accounts are not blocked"""
+    scheduler = EnergaStartupScheduler(hass, window=0)
+    release = asyncio.Event()
+    finished = []
+
+    async def _slow_refresh():
+        await release.wait()
+        finished.append('slow')
+
+    async def _refresh(name):
+        finished.append(name)
+
+    slow = hass.async_create_task(scheduler.async_run('user1', _slow_refresh))
+    same_account = hass.async_create_task(scheduler.async_run('user1', lambda: _refresh('same account')))
+    other_account = hass.async_create_task(scheduler.async_run('user2', lambda: _refresh('other account')))
+    await asyncio.sleep(0)
+    await other_account
+    assert finished == ['other account']
+
+    release.set()
+    await asyncio.gather(slow, same_account)
+    assert finished == ['other account', 'slow', 'same account']
+
+
+async def test_entry_should_use_warm_data_until_its_slot(hass: HomeAssistant, hass_storage: dict):
+    """During the startup the data saved before the restart is used and the refresh is postponed to the entry slot"""
+    hass_storage[f'{DOMAIN}.someentryid'] = {'version': 1, 'key': f'{DOMAIN}.someentryid', 'data': {'main_data': {
+        'meter_name': 'Saved meter', 'ppe_number': 'somenumber', 'tariff': 'G11', 'meter_readings': [
+            {'name': 'A+', 'time': '2024-01-01', 'value': 123.5}
+        ],
+    }}}
+    hass.set_state(CoreState.not_running)
+    scheduler = hass.data[STARTUP_SCHEDULER_DATA_KEY] = EnergaStartupScheduler(hass, window=60)
+    # The first slot starts right away, the second one keeps the entry waiting
+    scheduler.async_schedule('other user', AsyncMock())
+    scheduler.async_schedule('other user', AsyncMock())
+    with patch(f'{COORDINATOR}.async_refresh') as refresh_mock:
+        await create_config_entry(hass, 'someentryid', None, {
+            'username': 'some user',
+            'password': 'some password',
+            'selected_meter': '12345',
+            'selected_meter_internal_id': '1234',
+        })
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+
+        assert refresh_mock.await_count == 0
+        assert coordinator.get_data().meter_name == 'Saved meter'
+        assert coordinator.get_meter_readings()[0].value == 123.5
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=121))
+        await hass.async_block_till_done()
+        assert refresh_mock.await_count == 1
+
+
+async def test_entry_without_warm_data_should_be_set_up_before_its_slot(hass: HomeAssistant):
+    """The entry without the saved data is set up right away and gets its data and sensors in its slot"""
+    hass.set_state(CoreState.not_running)
+    scheduler = hass.data[STARTUP_SCHEDULER_DATA_KEY] = EnergaStartupScheduler(hass, window=60)
+    # The first slot starts right away, the second one keeps the entry waiting
+    scheduler.async_schedule('other user', AsyncMock())
+    scheduler.async_schedule('other user', AsyncMock())
+    with patch(f'{COORDINATOR}.async_refresh') as refresh_mock:
+        entry = await create_config_entry(hass, 'someentryid', None, {
+            'username': 'some user', 'password': 'some password', 'selected_meter': '12345',
+            'selected_meter_internal_id': '1234', 'selected_ppe': 'somenumber',
+        })
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+
+        assert entry.state is ConfigEntryState.LOADED
+        assert refresh_mock.await_count == 0
+        assert coordinator.get_meter_readings() == []
+
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=121))
+        await hass.async_block_till_done()
+        assert refresh_mock.await_count == 1
+
+    coordinator.async_set_updated_data({'main': EnergaData({
+        'meter_name': 'Some meter', 'ppe_number': 'somenumber', 'tariff': 'G11',
+        'meter_readings': [EnergaMeterReading('A+', '2024-01-01', 123.5)],
+    }), 'stats': {}})
+    await hass.async_block_till_done()
+    assert hass.states.get(generate_entity_name('12345', 'from_grid')).state == '123.5'
+
+
+async def test_entry_without_warm_data_and_ppe_should_wait_for_the_startup(hass: HomeAssistant):
+    """Without the PPE number the sensors could not get their unique IDs, so the setup is retried after the startup"""
+    hass.set_state(CoreState.not_running)
+    entry = MockConfigEntry(entry_id='someentryid', domain=DOMAIN, data={
+        'username': 'some user', 'password': 'some password', 'selected_meter': '12345',
+        'selected_meter_internal_id': '1234',
+    })
+    entry.add_to_hass(hass)
+    with patch_coordinator_refresh():
+        await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.SETUP_RETRY
@@ -0,0 +1,52 @@
+"""Tests of saving the statistics behind the statistics that are already saved"""
+from datetime import timedelta
+
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.recorder import get_instance
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from custom_components.energa_my_meter.common import generate_entity_name
+from custom_components.energa_my_meter.const import DOMAIN
+from custom_components.energa_my_meter.energa.stats_modes import EnergaStatsModes
+from custom_components.energa_my_meter.hass_integration.coverage_index import EnergaCoverageIndex
+from custom_components.energa_my_meter.hass_integration.statistics_rebaser import EnergaStatisticsRebaser
+from .helpers import create_statistics_config_entry, patch_coordinator_refresh
+
+
+async def test_older_periods_should_shift_the_later_sums(hass: HomeAssistant):
+    """Periods inserted before the saved statistics (newest first) move all later sums by their totals"""
+    zone = 'Strefa 1:'
+    statistic_id = generate_entity_name('12345', 'consumed_strefa_1')
+    day = dt_util.start_of_local_day() - timedelta(days=1)
+    with patch_coordinator_refresh():
+        await create_statistics_config_entry(hass, 'someentryid', zone)
+        coordinator = hass.data[DOMAIN]['someentryid']['coordinator']
+        coordinator.queue_statistics(EnergaStatsModes.ENERGY_CONSUMED, {zone: [
+            StatisticData(start=day + timedelta(hours=hour), state=1, sum=hour + 1) for hour in range(2)
+        ]})
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+
+        coverage = EnergaCoverageIndex()
+        coverage.mark(statistic_id, [day, day + timedelta(hours=1)])
+        rebaser = EnergaStatisticsRebaser(hass, coverage, coordinator.queue_statistics, coordinator.queue_adjustment)
+        older = day - timedelta(hours=2)
+        oldest = day - timedelta(hours=4)
+        await hass.async_add_executor_job(rebaser.rebase, EnergaStatsModes.ENERGY_CONSUMED, {zone: statistic_id}, [
+            ((older, day), {zone: {older.timestamp(): 2, older.timestamp() + 3600: 2}}),
+        ])
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+        await hass.async_add_executor_job(rebaser.rebase, EnergaStatsModes.ENERGY_CONSUMED, {zone: statistic_id}, [
+            ((oldest, older), {zone: {oldest.timestamp(): 3}}),
+        ])
+        await hass.async_block_till_done()
+        await async_wait_recording_done(hass)
+
+        imported = await get_instance(hass).async_add_executor_job(
+            statistics_during_period, hass, oldest, None, {statistic_id}, 'hour', None, {'state', 'sum'}
+        )
+        assert [row['sum'] for row in imported[statistic_id]] == [3, 5, 7, 8, 9]